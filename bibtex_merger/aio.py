@@ -0,0 +1,97 @@
+import asyncio, logging
+
+logger = logging.getLogger(__name__)
+__all__ = [	'AsyncExtension', 'AsyncCore'	]
+
+# asyncio counterparts of the blocking Extension/Core I/O (python 3 only),
+# mixed into Extension and Core. The blocking work (file I/O and parsing) is
+# run in an executor so that the event loop is never blocked.
+
+class AsyncExtension(object):
+	async def aread(self, filename, executor=None):
+		"""
+		Non-blocking read, runs Extension.read in executor (default: the
+		event loop's default executor).
+		"""
+		loop = asyncio.get_event_loop()
+		return await loop.run_in_executor(executor, self.read, filename)
+
+	async def awrite(self, filename, content, executor=None):
+		"""
+		Non-blocking write, runs Extension.write in executor (default: the
+		event loop's default executor).
+		"""
+		loop = asyncio.get_event_loop()
+		return await loop.run_in_executor(executor, self.write, filename, content)
+
+class AsyncCore(object):
+	@property
+	def ioConcurrency(self):
+		try:
+			return self._ioConcurrency
+		except AttributeError:
+			self._ioConcurrency = 4
+			return self._ioConcurrency
+
+	@property
+	def ioExecutor(self):
+		try:
+			return self._ioExecutor
+		except AttributeError:
+			self._ioExecutor = None
+			return self._ioExecutor
+
+	def __ioSemaphore__(self):
+		# at most ioConcurrency reads/writes in flight, per event loop
+		loop = asyncio.get_event_loop()
+		try:
+			if self._ioSemaphoreLoop is loop:
+				return self._ioSemaphore
+		except AttributeError:
+			pass
+
+		self._ioSemaphore		= asyncio.Semaphore(self.ioConcurrency)
+		self._ioSemaphoreLoop	= loop
+		return self._ioSemaphore
+
+	async def __aread__(self, filename):
+		"""
+		Non-blocking counterpart of __read__.
+		"""
+		async with self.__ioSemaphore__():
+			loop = asyncio.get_event_loop()
+			return await loop.run_in_executor(self.ioExecutor, self.__read__, filename)
+
+	async def __awrite__(self, filename, content):
+		"""
+		Non-blocking counterpart of __write__.
+		"""
+		async with self.__ioSemaphore__():
+			loop = asyncio.get_event_loop()
+			return await loop.run_in_executor(self.ioExecutor, self.__write__, filename, content)
+
+	async def __areadAll__(self, filenames):
+		"""
+		Read several files concurrently (at most ioConcurrency at a time),
+		returning their contents in the order of filenames.
+		"""
+		return await asyncio.gather(*[self.__aread__(filename) for filename in filenames])
+
+	async def __apreferencesRead__(self):
+		"""
+		Non-blocking counterpart of __preferencesRead__.
+		"""
+		if self.preferencesFile == None or self.preferences != None:
+			return self.__preferencesRead__()
+
+		self._preferences = await self.__aread__(self.preferencesFile)
+
+		return self.preferences
+
+	async def __apreferencesWrite__(self):
+		"""
+		Non-blocking counterpart of __preferencesWrite__.
+		"""
+		await self.__apreferencesRead__()
+
+		return await self.__awrite__(self.preferencesFile, self.preferences)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import logging, sys, unicodedata
+
+python2 = sys.version_info < (3, 0, 0)
+
+logger = logging.getLogger(__name__)
+__all__ = [	'AuthorTable', 'fold'	]
+
+def fold(text):
+	"""
+	Fold text to plain ASCII, dropping accents and anything that has no ASCII
+	equivalent (e.g. u"Schön" -> "Schon").
+	"""
+	if python2 and isinstance(text, str):
+		text = text.decode("utf-8", "ignore")
+
+	text = unicodedata.normalize("NFKD", text)
+	return str("".join(c for c in text if ord(c) < 128))
+
+class AuthorTable(object):
+	"""Table of every distinct author name with its precomputed attributes.
+
+	Each name is interned once and gets an integer id; the attributes that
+	ShallowCompare needs for every pair of authors are computed up front and
+	stored column-wise so that comparing two authors is only table lookups.
+
+	Columns (indexed by author id):
+		first			--	ASCII folded first name
+		last			--	ASCII folded last name
+		abbreviated		--	whether the first name is an abbreviation (e.g. "B.")
+		others			--	whether this is the "others" of an "and others" list
+		firstSoundex	--	soundex code of first
+		lastSoundex		--	soundex code of last
+
+	Attributes:
+		soundex	--	callable returning the soundex code of a str
+	"""
+
+	def __init__(self, soundex):
+		if not hasattr(soundex, '__call__'):
+			raise ValueError("AuthorTable soundex argument ({}) must be a method reference".format(soundex))
+		self._soundex = soundex
+
+		self._ids			= {}
+
+		self.first			= []
+		self.last			= []
+		self.abbreviated	= []
+		self.others			= []
+		self.firstSoundex	= []
+		self.lastSoundex	= []
+
+		return
+
+	def __len__(self):
+		return len(self.first)
+
+	def __soundex__(self, name):
+		try:
+			return self._soundex(name)
+		except (IndexError, KeyError, ValueError):
+			return ""
+
+	def intern(self, author):
+		"""
+		The id of author (a [first, last] list as produced by the author
+		customization), adding it to the table if it is new.
+		"""
+		key = tuple(author)
+
+		try:
+			return self._ids[key]
+		except KeyError:
+			pass
+
+		i = len(self.first)
+		self._ids[key] = i
+
+		others		= "others" in key
+		first, last	= (key[0], key[1]) if len(key) > 1 else ("", key[0])
+		first, last	= ("", "") if others else (fold(first), fold(last))
+
+		self.first.append(first)
+		self.last.append(last)
+		self.abbreviated.append(first[1:2] == ".")
+		self.others.append(others)
+		self.firstSoundex.append(self.__soundex__(first))
+		self.lastSoundex.append(self.__soundex__(last))
+
+		return i
+
+	def ids(self, authors):
+		"""
+		Tuple of the ids of a list of authors.
+		"""
+		return tuple(self.intern(a) for a in authors)
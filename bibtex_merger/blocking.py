@@ -0,0 +1,581 @@
+# -*- coding: utf-8 -*-
+import logging, re
+from timeit import default_timer as timer
+
+from bibtex_merger.authors import fold
+from bibtex_merger.index import PrefixIndex
+
+logger = logging.getLogger(__name__)
+__all__ = [	'BlockingStrategy', 'KeyedStrategy', 'AuthorCount', 'AuthorInitials', 'LastNames', 'YearWindow', 'Venue', 'Imprint', 'TitleTokens', 'SortedNeighbourhood', 'BlockingChain', 'strategies', 'normalize'	]
+
+reWord		= re.compile(r"[a-z0-9]+")
+reYear		= re.compile(r"\d{4}")
+stopWords	= frozenset(["a", "an", "and", "at", "for", "from", "in", "of", "on", "the", "to", "with"])
+
+def normalize(text):
+	"""
+	List of the lowercase ASCII words of text, without stop words
+	(e.g. u"The Journal of Schön" -> ["journal", "schon"]).
+	"""
+	return [w for w in reWord.findall(fold(text).lower()) if w not in stopWords]
+
+class BlockingStrategy(object):
+	"""Base class of the blocking strategies used by BibTeX_Merger.Bagging.
+
+	A strategy splits a block (list of rows of an EntryStore) into smaller,
+	possibly overlapping, blocks; only entries that share a block are ever
+	compared. Strategies are composed by applying each one to every block
+	the previous one produced.
+
+	Subclasses implement blocks, and may implement insert.
+	"""
+
+	name = None
+
+	def blocks(self, store, rows):
+		"""
+		Dict of block key -> list of rows, splitting rows (a list of row
+		numbers of store). A row may be put in several blocks.
+		"""
+		raise NotImplementedError("BlockingStrategy subclasses must implement blocks")
+
+	def insert(self, store, blocks, rows, new):
+		"""
+		Add the rows new to blocks (the blocks of the rows of rows before
+		new were appended to it) in place, s.t. they end up as the blocks of
+		rows, returning the dict of block key -> list of the rows added to
+		that block. A block that changed in any other way (e.g. lost a row)
+		is returned with all of its rows.
+
+		By default all of rows are blocked again, strategies that can place
+		a new row by itself only go through new.
+		"""
+		fresh = self.blocks(store, rows)
+
+		added = {}
+		for key, r in fresh.items():
+			before = set(blocks.get(key, []))
+			if key not in blocks or not before.issubset(r):
+				added[key] = list(r)
+			else:
+				extra = [e for e in r if e not in before]
+				if extra:
+					added[key] = extra
+
+		blocks.clear()
+		blocks.update(fresh)
+
+		return added
+
+	def __unkeyed__(self, keyed, missing):
+		# rows without a key can match anything, hence go in every block
+		if not keyed:
+			return {None: missing} if missing else {}
+
+		if missing:
+			for key in keyed:
+				keyed[key].extend(missing)
+
+		return keyed
+
+class KeyedStrategy(BlockingStrategy):
+	"""Base class of the strategies that block every entry by keys of its
+	own (e.g. its year), s.t. new entries are placed without looking at
+	the others.
+
+	Entries without a key can match anything, hence go in every block.
+
+	Subclasses implement __keys__.
+	"""
+
+	def __keys__(self, store, e):
+		"""
+		List of the block keys of row e of store, empty if it has none.
+		"""
+		raise NotImplementedError("KeyedStrategy subclasses must implement __keys__")
+
+	def blocks(self, store, rows):
+		return self.__unkeyed__(*self.__keyed__(store, rows))
+
+	def insert(self, store, blocks, rows, new):
+		keyed, missing = self.__keyed__(store, new)
+
+		# the rows so far without a key, these are in every block
+		if None in blocks:
+			old = blocks.pop(None)
+		elif blocks:
+			old = [e for e in min(blocks.values(), key=len) if not self.__keys__(store, e)]
+		else:
+			old = []
+
+		added = {}
+
+		if not keyed and not blocks:
+			# still no block with a key
+			if old or missing:
+				blocks[None] = old + missing
+			if missing:
+				added[None] = missing
+			return added
+
+		for key, r in keyed.items():
+			if key in blocks:
+				blocks[key].extend(r)
+				added[key] = r
+			else:
+				blocks[key] = old + r
+				added[key] = list(blocks[key])
+
+		if missing:
+			for key in blocks:
+				blocks[key].extend(missing)
+				added.setdefault(key, []).extend(missing)
+
+		return added
+
+	def __keyed__(self, store, rows):
+		"""
+		Dict of key -> list of the rows with that key, and the list of the
+		rows without a key.
+		"""
+		keyed	= {}
+		missing	= []
+
+		for e in rows:
+			keys = self.__keys__(store, e)
+			if not keys:
+				missing.append(e)
+
+			for key in keys:
+				keyed.setdefault(key, []).append(e)
+
+		return keyed, missing
+
+class AuthorCount(BlockingStrategy):
+	"""Block by number of authors.
+
+	Entries whose author list ends in "others" (et al.) may have any number
+	of authors beyond those listed, hence also go in the blocks of every
+	larger number of authors.
+
+	Attributes:
+		field	--	the (customized) author field
+	"""
+
+	name = "authors"
+
+	def __init__(self, field="author"):
+		self.field = field
+
+	def blocks(self, store, rows):
+		authors		= store.column(self.field)
+		bag			= {}
+
+		static_authors	= [e for e in rows if authors[e] != None and not (authors[e][-1][-1] == "others")]
+		etal_authors	= [e for e in rows if authors[e] != None and     (authors[e][-1][-1] == "others")]
+
+		for e in static_authors:
+			numAuthors = len(authors[e])
+
+			if numAuthors not in bag:
+				bag[numAuthors] = [e]
+			else:
+				bag[numAuthors].append(e)
+
+		for e in etal_authors:
+			numAuthors = len(authors[e])
+
+			for k in bag.keys():
+				if numAuthors <= k:
+					bag[k].append(e)
+
+			if numAuthors not in bag:
+				bag[numAuthors] = [e]
+			else:
+				bag[numAuthors].append(e)
+
+		return bag
+
+	def insert(self, store, blocks, rows, new):
+		authors	= store.column(self.field)
+		added	= {}
+
+		def etal(e):
+			return authors[e][-1][-1] == "others"
+
+		def place(key, e):
+			blocks.setdefault(key, []).append(e)
+			added.setdefault(key, []).append(e)
+
+		static = set()
+		for e in new:
+			if authors[e] == None or etal(e):
+				continue
+			numAuthors = len(authors[e])
+
+			# a bag with static authors holds every et al. entry with at most
+			# as many authors, the earlier ones are not in a new (or so far
+			# et al. only) bag yet
+			if numAuthors not in static:
+				static.add(numAuthors)
+				if numAuthors not in blocks or all(etal(r) for r in blocks[numAuthors]):
+					bagged = set(blocks.get(numAuthors, []))
+					for k in [k for k in blocks if k < numAuthors]:
+						for r in blocks[k]:
+							if r not in bagged and etal(r) and len(authors[r]) == k:
+								bagged.add(r)
+								place(numAuthors, r)
+
+			place(numAuthors, e)
+
+		for e in new:
+			if authors[e] == None or not etal(e):
+				continue
+			numAuthors = len(authors[e])
+
+			for k in list(blocks.keys()):
+				if numAuthors <= k:
+					place(k, e)
+
+			place(numAuthors, e)
+
+		return added
+
+class AuthorInitials(BlockingStrategy):
+	"""Block by the initials of all authors (except "others").
+
+	The key of an entry is the concatenation of the first and last name
+	initials of its authors. An entry joins every block whose key starts
+	with its own key (so that et al. entries join the blocks of their fuller
+	versions) and only opens a block of its own if there is none, which then
+	takes in the entries whose keys its key starts with (the et al. entries
+	that came first). Hence two entries share a block iff the key of one
+	starts with the key of the other, whatever order they come in.
+
+	Attributes:
+		field	--	the (customized) author field
+	"""
+
+	name = "initials"
+
+	def __init__(self, field="author"):
+		self.field = field
+
+	def blocks(self, store, rows):
+		bag = {}
+		self.insert(store, bag, rows, rows)
+
+		return bag
+
+	def insert(self, store, blocks, rows, new):
+		authors		= store.column(self.field)
+		alpha_bag	= PrefixIndex()
+		inserted	= {}
+
+		# in key order, s.t. every key is appended to the sorted keys
+		for key in sorted(blocks):
+			alpha_bag.add(key, blocks[key])
+
+		for e in new:
+			# generate the alpha key for this entry
+			alpha_key = self.__key__(authors[e])
+
+			# add this entry to all other alpha keys in this alpha bag that has matching alpha keys
+			# this forces all non "others" alpha keys to only be added once
+			# all "others" alpha keys can be included multiple times
+			added = False
+			for key in list(alpha_bag.startingWith(alpha_key)):
+				added = True
+				alpha_bag[key].append(e)
+				inserted.setdefault(key, []).append(e)
+
+			# if a key was not added, this means this is the first instance of that key
+			if not added:
+				assert alpha_key not in alpha_bag
+
+				# the entries whose keys this one starts with, those of every
+				# prefix are in every block starting with it, e.g. the first
+				bagged	= set()
+				values	= []
+				for i in range(len(alpha_key)):
+					prefix = alpha_key[:i]
+					for key in alpha_bag.startingWith(prefix):
+						for r in alpha_bag[key]:
+							if r not in bagged and self.__key__(authors[r]) == prefix:
+								bagged.add(r)
+								values.append(r)
+						break
+
+				blocks[alpha_key] = alpha_bag.add(alpha_key, values + [e])
+				inserted[alpha_key] = list(blocks[alpha_key])
+
+		return inserted
+
+	def __key__(self, authors):
+		alpha_key = ""
+		for a in authors:
+			# alpha key includes initials of all authors EXCEPT "others"
+			if a[-1] != "others":
+				alpha_key += a[0][0].lower()
+				alpha_key += a[1][0].lower()
+
+		return alpha_key
+
+class LastNames(AuthorInitials):
+	"""Block by the first length letters of the last names of all authors
+	(except "others"), a finer version of AuthorInitials.
+
+	Attributes:
+		length	--	number of letters of every last name, int > 0
+		field	--	the (customized) author field
+	"""
+
+	name = "lastnames"
+
+	def __init__(self, length=3, field="author"):
+		if not (isinstance(length, int) and length > 0):
+			raise ValueError("LastNames length argument must be int > 0 not ({} -> {})".format(type(length), length))
+		self.length	= length
+		self.field	= field
+
+	def __key__(self, authors):
+		# every name is padded to length s.t. et al. keys are still prefixes
+		return "".join(fold(a[-1]).lower()[:self.length].ljust(self.length) for a in authors if a[-1] != "others")
+
+class YearWindow(KeyedStrategy):
+	"""Block by publication year, within +/- window years.
+
+	An entry of year y goes in the blocks y, ..., y + window s.t. two entries
+	share a block iff their years are at most window apart. Entries without
+	a (4 digit) year go in every block.
+
+	Attributes:
+		window	--	maximum difference in years, int >= 0
+		field	--	the year field
+	"""
+
+	name = "year"
+
+	def __init__(self, window=1, field="year"):
+		if not (isinstance(window, int) and window >= 0):
+			raise ValueError("YearWindow window argument must be int >= 0 not ({} -> {})".format(type(window), window))
+		self.window	= window
+		self.field	= field
+
+	def __keys__(self, store, e):
+		year = reYear.search(str(store.get(e, self.field, "")))
+		if year == None:
+			return []
+
+		year = int(year.group(0))
+		return list(range(year, year + self.window + 1))
+
+class Venue(KeyedStrategy):
+	"""Block by normalized venue, i.e. the journal or else booktitle.
+
+	Entries without a venue go in every block.
+
+	Attributes:
+		fields	--	the venue fields, the first one an entry has is used
+	"""
+
+	name = "venue"
+
+	def __init__(self, fields=["journal", "booktitle"]):
+		self.fields = list(fields)
+
+	def __keys__(self, store, e):
+		for field in self.fields:
+			venue = " ".join(normalize(store.get(e, field, "")))
+			if venue:
+				return [venue]
+
+		return []
+
+class Imprint(Venue):
+	"""Block by normalized imprint, i.e. the publisher, else organization,
+	else editor; mostly of use for entries without authors.
+
+	Entries without any of them go in every block.
+
+	Attributes:
+		fields	--	the imprint fields, the first one an entry has is used
+	"""
+
+	name = "imprint"
+
+	def __init__(self, fields=["publisher", "organization", "editor"]):
+		self.fields = list(fields)
+
+class TitleTokens(KeyedStrategy):
+	"""Block by the first numTokens (non stop word) words of the title.
+
+	Entries without a title go in every block.
+
+	Attributes:
+		numTokens	--	number of leading title words in the key, int > 0
+		field		--	the title field
+	"""
+
+	name = "title"
+
+	def __init__(self, numTokens=1, field="title"):
+		if not (isinstance(numTokens, int) and numTokens > 0):
+			raise ValueError("TitleTokens numTokens argument must be int > 0 not ({} -> {})".format(type(numTokens), numTokens))
+		self.numTokens	= numTokens
+		self.field		= field
+
+	def __keys__(self, store, e):
+		tokens = normalize(store.get(e, self.field, ""))[:self.numTokens]
+
+		return [" ".join(tokens)] if tokens else []
+
+class SortedNeighbourhood(BlockingStrategy):
+	"""Sorted neighbourhood: sort by the normalized field and slide a window
+	over the sorted entries.
+
+	Every window of window consecutive entries is a block (keyed by its start
+	position), so each entry is paired with its window - 1 neighbours on
+	either side. Entries without the field sort first.
+
+	Attributes:
+		window	--	size of the sliding window, int > 1
+		field	--	the field to sort by
+	"""
+
+	name = "neighbourhood"
+
+	def __init__(self, window=10, field="title"):
+		if not (isinstance(window, int) and window > 1):
+			raise ValueError("SortedNeighbourhood window argument must be int > 1 not ({} -> {})".format(type(window), window))
+		self.window	= window
+		self.field	= field
+
+	def blocks(self, store, rows):
+		ordered = sorted(rows, key=lambda e: (" ".join(normalize(store.get(e, self.field, ""))), e))
+
+		if len(ordered) <= self.window:
+			return {0: ordered} if ordered else {}
+
+		return dict((i, ordered[i:i + self.window]) for i in range(len(ordered) - self.window + 1))
+
+class BlockingChain(object):
+	"""The blocks of a list of strategies, each one splitting the blocks of
+	the previous one, kept up to date as rows are added.
+
+	Added rows are only placed in the blocks of every stage that they fall
+	in (see BlockingStrategy.insert), the blocks that do not gain a row are
+	left as they are. A block that gains an earlier row (e.g. a new block
+	of a KeyedStrategy takes all rows without a key) is blocked again from
+	scratch by the following strategies.
+
+	The blocks of a stage are keyed by the tuple of the keys of the
+	strategies so far, the single block of stage 0 by ().
+
+	Attributes:
+		strategies	--	list of BlockingStrategy
+	"""
+
+	def __init__(self, strategies):
+		self._strategies	= list(strategies)
+		self._rows			= []
+
+		# stage s > 0: key of a block of stage s - 1 -> its blocks by strategy s - 1
+		self._stages		= [None] + [{} for s in self._strategies]
+		self._seconds		= [0.0 for s in self._strategies]
+
+		return
+
+	def __len__(self):
+		return len(self._rows)
+
+	@property
+	def strategies(self):
+		return self._strategies
+
+	@property
+	def seconds(self):
+		"""
+		Time spent by every strategy so far.
+		"""
+		return list(self._seconds)
+
+	def blocks(self, stage=None):
+		"""
+		Dict of key -> list of rows of the blocks of stage (default the last).
+		"""
+		if stage == None:
+			stage = len(self.strategies)
+
+		if stage == 0:
+			return {(): self._rows} if self._rows else {}
+
+		return dict((key + (k,), rows) for key, d in self._stages[stage].items() for k, rows in d.items())
+
+	def insert(self, store, rows):
+		"""
+		Add rows (row numbers of store, after all rows so far) and return
+		the dict of key -> list of rows of the last stage's blocks that
+		changed, and the set of the keys of its blocks that are gone.
+		"""
+		rows = list(rows)
+		if not rows:
+			return {}, set()
+
+		first = min(rows)
+		self._rows.extend(rows)
+
+		added	= {(): rows}
+		removed	= set()
+
+		for s, strategy in enumerate(self.strategies):
+			start	= timer()
+			stage	= self._stages[s + 1]
+			changed	= {}
+
+			for key, new in added.items():
+				r = self.__rows__(s, key)
+
+				if key not in stage or min(new) < first:
+					# a new block or one that gained earlier rows
+					blocks		= stage.get(key, {})
+					before		= set(blocks)
+					stage[key]	= strategy.blocks(store, r)
+					inserted	= stage[key]
+				else:
+					blocks		= stage[key]
+					before		= set(blocks)
+					inserted	= strategy.insert(store, blocks, r, new)
+
+				for k in before.difference(stage[key]):
+					self.__drop__(s + 1, key + (k,), removed)
+
+				for k, n in inserted.items():
+					changed[key + (k,)] = n
+
+			self._seconds[s] += timer() - start
+			added = changed
+
+		removed.difference_update(added)
+
+		return dict((key, self.__rows__(len(self.strategies), key)) for key in added), removed
+
+	def __rows__(self, stage, key):
+		if stage == 0:
+			return self._rows
+
+		return self._stages[stage][key[:-1]][key[-1]]
+
+	def __drop__(self, stage, key, removed):
+		# drop a block of stage together with all of the blocks it was split into
+		if stage == len(self.strategies):
+			removed.add(key)
+			return
+
+		for k in self._stages[stage + 1].pop(key, {}):
+			self.__drop__(stage + 1, key + (k,), removed)
+
+		return
+
+# blocking strategies by configuration name
+strategies = dict((s.name, s) for s in [AuthorCount, AuthorInitials, LastNames, YearWindow, Venue, Imprint, TitleTokens, SortedNeighbourhood])
@@ -0,0 +1,227 @@
+import os, sys, logging, hashlib, struct, zlib, types
+
+python2 = sys.version_info < (3, 0, 0)
+
+if python2:
+	import cPickle as pickle
+else:
+	import pickle
+
+logger = logging.getLogger(__name__)
+__all__ = [	'ParseCache', 'fingerprint'	]
+
+def fingerprint(*items):
+	"""
+	Short hex digest identifying a set of functions (by their byte code,
+	constants and names, including any nested functions) and/or strings.
+
+	Used to namespace a ParseCache so that changing the customizations that
+	were applied to the cached entries invalidates them.
+	"""
+	h = hashlib.sha1()
+
+	def feed(obj):
+		if isinstance(obj, types.CodeType):
+			h.update(obj.co_code)
+			h.update(repr(obj.co_names).encode("utf-8"))
+			for c in obj.co_consts:
+				feed(c)
+		elif hasattr(obj, "__func__"):
+			# bound method
+			feed(obj.__func__)
+		elif hasattr(obj, "__code__"):
+			feed(obj.__code__)
+		else:
+			h.update(repr(obj).encode("utf-8"))
+
+	for item in items:
+		feed(item)
+
+	return h.hexdigest()[:16]
+
+class ParseCache(object):
+	"""On-disk cache of the parsed (and customized) entries of each file.
+
+	Every cached file is stored in its own file under cacheDir/<salt>/ as a
+	fixed size header followed by the zlib compressed pickle of the entries.
+	The header holds the size, mtime and SHA-1 of the source file at the time
+	it was parsed; an entry is only reused if all three still match.
+
+	Attributes:
+		cacheDir	--	directory holding the cache (created if missing)
+		salt		--	namespace of this cache, e.g. a fingerprint of the
+						customizations applied while parsing. Any other
+						namespace found in cacheDir is considered stale and
+						removed.
+		maxSize		--	maximum number of bytes the cache may occupy, the
+						least recently used files are evicted beyond that
+	"""
+
+	MAGIC	= b"BMC1"
+	HEADER	= struct.Struct("<4sQq20s")
+
+	def __init__(self, cacheDir, salt="", maxSize=268435456):
+		if not isinstance(cacheDir, str):
+			raise ValueError("ParseCache cacheDir argument must be a str not ({} -> {})".format(type(cacheDir), cacheDir))
+
+		if not isinstance(salt, str):
+			raise ValueError("ParseCache salt argument must be a str not ({} -> {})".format(type(salt), salt))
+
+		if not (isinstance(maxSize, int) and maxSize >= 0):
+			raise ValueError("ParseCache maxSize argument must be int >= 0 not ({} -> {})".format(type(maxSize), maxSize))
+
+		self._cacheDir	= os.path.expanduser(cacheDir)
+		self._salt		= salt or "default"
+		self._maxSize	= maxSize
+
+		self._hits		= 0
+		self._misses	= 0
+
+		if not os.path.isdir(self.saltDir):
+			os.makedirs(self.saltDir)
+
+		# drop the namespaces of other (i.e. outdated) customizations
+		for d in os.listdir(self.cacheDir):
+			if d != self.salt:
+				self.__remove__(os.path.join(self.cacheDir, d))
+
+		return
+
+	@property
+	def cacheDir(self):
+		return self._cacheDir
+
+	@property
+	def salt(self):
+		return self._salt
+
+	@property
+	def saltDir(self):
+		return os.path.join(self.cacheDir, self.salt)
+
+	@property
+	def maxSize(self):
+		return self._maxSize
+
+	@property
+	def hits(self):
+		return self._hits
+
+	@property
+	def misses(self):
+		return self._misses
+
+	def __entryPath__(self, filename):
+		key = hashlib.sha1(os.path.abspath(filename).encode("utf-8")).hexdigest()
+		return os.path.join(self.saltDir, key)
+
+	def __stat__(self, filename):
+		st = os.stat(filename)
+
+		mtime = getattr(st, "st_mtime_ns", None)
+		if mtime == None:
+			mtime = int(st.st_mtime * 1e9)
+
+		h = hashlib.sha1()
+		with open(filename, "rb") as f:
+			for chunk in iter(lambda: f.read(1048576), b""):
+				h.update(chunk)
+
+		return st.st_size, mtime, h.digest()
+
+	def __remove__(self, path):
+		try:
+			if os.path.isdir(path):
+				for f in os.listdir(path):
+					self.__remove__(os.path.join(path, f))
+				os.rmdir(path)
+			else:
+				os.remove(path)
+		except OSError:
+			logger.debug("ParseCache unable to remove {}".format(path))
+
+	def get(self, filename):
+		"""
+		The cached entries of filename, or None if there are no cached entries
+		or filename has changed since they were cached.
+		"""
+		path = self.__entryPath__(filename)
+
+		try:
+			with open(path, "rb") as f:
+				header = f.read(self.HEADER.size)
+				magic, size, mtime, digest = self.HEADER.unpack(header)
+
+				if magic != self.MAGIC or (size, mtime, digest) != self.__stat__(filename):
+					self._misses += 1
+					return None
+
+				entries = pickle.loads(zlib.decompress(f.read()))
+		except (IOError, OSError, struct.error):
+			self._misses += 1
+			return None
+		except Exception:
+			# corrupted cache file
+			logger.warning("ParseCache dropping unreadable cache file for {}".format(filename))
+			self.__remove__(path)
+			self._misses += 1
+			return None
+
+		# mark as recently used for eviction
+		os.utime(path, None)
+
+		self._hits += 1
+		return entries
+
+	def put(self, filename, entries):
+		"""
+		Cache the parsed entries of filename and evict the least recently used
+		files if the cache has grown beyond maxSize.
+		"""
+		path	= self.__entryPath__(filename)
+		size, mtime, digest = self.__stat__(filename)
+
+		data	= self.HEADER.pack(self.MAGIC, size, mtime, digest)
+		data	+= zlib.compress(pickle.dumps(list(entries), pickle.HIGHEST_PROTOCOL))
+
+		# write to a temporary file and rename s.t. readers never see partial files
+		tmp = "{}.{}.tmp".format(path, os.getpid())
+		with open(tmp, "wb") as f:
+			f.write(data)
+		os.rename(tmp, path)
+
+		self.evict()
+
+		return
+
+	def evict(self):
+		"""
+		Remove the least recently used files until the cache fits in maxSize.
+		"""
+		files = []
+		total = 0
+		for f in os.listdir(self.saltDir):
+			path = os.path.join(self.saltDir, f)
+			try:
+				st = os.stat(path)
+			except OSError:
+				continue
+			files.append((st.st_mtime, st.st_size, path))
+			total += st.st_size
+
+		files.sort()
+		while total > self.maxSize and files:
+			mtime, size, path = files.pop(0)
+			self.__remove__(path)
+			total -= size
+
+		return
+
+	def clear(self):
+		"""
+		Remove every cached file.
+		"""
+		for f in os.listdir(self.saltDir):
+			self.__remove__(os.path.join(self.saltDir, f))
+
+		return
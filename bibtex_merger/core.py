@@ -4,64 +4,53 @@ python2 = sys.version_info < (3, 0, 0)
 
 if python2:
     import ConfigParser
+
+    class AsyncCore(object):
+        pass
 else:
     import configparser as ConfigParser
 
+    # asyncio counterparts of __read__, __write__, etc.
+    from bibtex_merger.aio import AsyncCore
+
 from bibtex_merger.extension import *
 
 logger = logging.getLogger(__name__)
 __all__ = [	'Core', 'CoreError'	]
 
-class Core(object):
-	DEBUG		= logging.DEBUG
-	INFO		= logging.INFO
-	WANRING		= logging.WANRING
-	ERROR		= logging.ERROR
-	CRITICAL	= logging.CRITICAL
-
-	_SOFT_LOG_LIST_	= [DEBUG, INFO]
-	_HARD_LOG_LIST_	= [WARNING, ERROR, CRITICAL]
-	_ALL_LOG_LIST_	= _SOFT_LOG_LVLS + _HARD_LOG_LVLS
-
-	_LOG_DICT_TO_INT_	= dict((lvl, getattr(Core, lvl)) for lvl in ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"])
-	_LOG_DICT_TO_STR_	= dict((getattr(Core, lvl), lvl) for lvl in ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"])
-
-	def __LOG_LVL_TO_INT__(self, lvl):
-		try:
-			return self._LOG_DICT_TO_INT_[lvl]
-		except KeyError:
-			return None
-	def __LOG_LVL_TO_STR__(self, lvl):
-		try:
-			return self._LOG_DICT_TO_STR_[lvl]
-		except KeyError:
-			return None
-
-	killLevels = ['warning', 'error']
-	killLevels = dict((v,k) for k, v in enumerate(killLevels))
-
+class Core(AsyncCore):
 	"""The core program. Processes and deals with the base functionality
-	
+
 	Attributes:
 		ext	--	The Extension objects that this Core accepts. Ordered from
 				most specific to generic extensions since the first match
 				found for a filename is the one used.
 		prefFile -- The filename for the preferences file. Default: "pref.cfg"
+		out -- The writable (e.g. sys.stdout) that all output goes to.
+				Default: sys.stdout
+		killLevel -- The level ('warning' or 'error') from which on a
+				reported exception is raised rather than only written to
+				out. Default: 'warning'
+		ioConcurrency -- The maximum number of asynchronous reads/writes in
+				flight at once (python 3 only). Default: 4
+		ioExecutor -- The concurrent.futures executor asynchronous reads/writes
+				run in, None for the event loop's default. Default: None
 	"""
-	def __init__(self, ext, prefFile='pref.cfg', out=OUT, loglvl=LOG_LVL, killlvl=KILL_LVL):
-		if not callable(getattr(out, "write", None)):
-			self.critical("Core <out> attribute must be a writable type (dflt: sys.stdout)")
-		self._OUT = out
 
-		# Verbose level that optionally prints more debugging code
-		if kill_lvl not in _HARD_LOG_LIST_:
-			self.critical("Core <kill_lvl> argument must be one of the accepted hard logging levels (dflt: WARNING)")
-		self._KILL_LVL = kill_lvl
+	killLevels = ['warning', 'error']
+	killLevels = dict((v,k) for k, v in enumerate(killLevels))
+
+	# width of the titles and subtitles
+	width = 80
 
-		if log_lvl not in _ALL_LOG_LIST_:
-			self.critical("Core <log_lvl> argument must be one of the accepted logging levels (dflt: INFO)")
-		self._LOG_LVL = log_lvl
+	def __init__(self, ext, prefFile='pref.cfg', out=sys.stdout, killLevel='warning', ioConcurrency=4, ioExecutor=None):
+		if not callable(getattr(out, "write", None)):
+			raise ValueError("Core out argument must be a writable type (e.g. sys.stdout) not ({} -> {})".format(type(out), out))
+		self._out = out
 
+		if not (isinstance(killLevel, str) and killLevel in self.killLevels):
+			raise ValueError("Core killLevel argument must be one of {} not ({} -> {})".format("|".join(sorted(self.killLevels)), type(killLevel), killLevel))
+		self._killLevel = self.killLevels[killLevel]
 
 		if isinstance(ext, Extension):
 			self._extensionObjects	= [ext]
@@ -82,44 +71,40 @@ class Core(object):
 				config.read(self._preferencesFile)
 				return config
 			def prefWrite(filename, content):
-				with open(self._preferencesFile, 'wb') as f:
+				with open(self._preferencesFile, 'w') as f:
 					return self.preferences.write(f)
 
 			self._preferencesFile	=	prefFile
-			self._extensionObjects	+=	[Extension(ext=r'^' + re.escape(prefFile) + r'$', reader=prefRead, writer=prefWrite)]
+			self._extensionObjects	=	self._extensionObjects + [Extension(ext=r'^' + re.escape(prefFile) + r'$', reader=prefRead, writer=prefWrite)]
 		else:
 			self._preferencesFile	=	None
 
 		self._preferences		= None
 
+		if not (isinstance(ioConcurrency, int) and ioConcurrency >= 1):
+			raise ValueError("Core ioConcurrency attribute must be int >= 1 not ({} -> {})".format(type(ioConcurrency), ioConcurrency))
+		self._ioConcurrency		= ioConcurrency
+		self._ioExecutor		= ioExecutor
+
 		self._extensionRegexs	= [x.reextension for x in self.extensionObjects]
 		self._extensionPatters	= [x.extension   for x in self.extensionObjects]
 
+		# filename -> Extension lookup tables
+		self._extensionRegistry	= ExtensionRegistry(self.extensionObjects)
+
 		return
 
 	@property
-	def OUT(self):
-		try:
-			return self._OUT
-		except AttributeError:
-			self._OUT = sys.stdout
-			return self._OUT
+	def out(self):
+		return self._out
 
 	@property
-	def LOG_LVL(self):
-		try:
-			return self._LOG_LVL
-		except AttributeError:
-			self._LOG_LVL = Core.INFO
-			return self._LOG_LVL
+	def OUT(self):
+		return self._out
 
 	@property
-	def KILL_LVL(self):
-		try:
-			return self._KILL_LVL
-		except AttributeError:
-			self._KILL_LVL = Core.WARNING
-			return self._KILL_LVL
+	def killLevel(self):
+		return self._killLevel
 
 	@property
 	def extensionObjects(self):
@@ -133,6 +118,10 @@ class Core(object):
 	def extensionPatterns(self):
 		return self._extensionPatters
 
+	@property
+	def extensionRegistry(self):
+		return self._extensionRegistry
+
 	@property
 	def preferences(self):
 		return self._preferences
@@ -141,149 +130,81 @@ class Core(object):
 	def preferencesFile(self):
 		return self._preferencesFile
 
-	def __title__(self, title, sym="#"):
+	def __banner__(self, title, left, right):
+		if not isinstance(title, str):
+			raise ValueError("Core title must be a str not ({} -> {})".format(type(title), title))
+
+		# trim what does not fit between the borders (and a space on each side)
+		title		= title.upper()[:self.width - len(left) - len(right) - 2]
+		whitespace	= self.width - len(left) - len(right) - len(title)
+
+		return left + (" " * (whitespace // 2)) + title + (" " * (whitespace - whitespace // 2)) + right + "\n"
+
+	def __title__(self, title):
 		"""
-		Pretty title maker
+		Write a title, framed by #, to out
 		"""
-		title	= str(title).upper()
-		sym		= str(sym).upper()
-
-		if len(sym) == 0:
-			self.info("Core.__title__: empty sym provided is reverting to the default")
-			sym = "#"
-		if len(sym) > 1:
-			self.info("Core.__title__: sym is being truncated to a single character")
-			sym = sym[0]
-
-		width, height = shutil.get_terminal_size()
-		border_width = 1
-		whitespace_width = 2
-
-		maxtextspace = width - ((border_width + whitespace_width) * 2)
-		whitespace = width - len(title) - (border_width * 2)
-
-		if whitespace < (whitespace_width * 2):
-			self.info("Core.__title__: title is too long, trimming")
-			whitespace = (whitespace_width * 2)
-
-			title = title[:maxtextspace - 3] + "..."
-
-		# get half of the whitespace and round down (truncate to remove decimal)
-		left_whitespace		= int(whitespace / 2)
-		# collect remaining whitespace on the right side
-		right_whitespace	= whitespace - lspace
-
-		if sym in ["#", "!", "?"]:
-			text  = (sym * width) + "\n"
-			text += sym + (" " * lspace) + title + (" " * rspace) + sym + "\n"
-			text += (sym * width) + "\n"
-		else:
-			left_whitespace = left_symspace
-			right_whitespace = right_symspace
-			text =  (sym * left_symspace) + " " + title + " " + (sym * right_symspace) + "\n"
+		banner = self.__banner__(title, "#", "#")
 
-		return text
+		self.out.write(("#" * self.width) + "\n" + banner + ("#" * self.width) + "\n")
 
-	def __subtitle__(self, subtitle):
+	def __subtitle__(self, title):
 		"""
-		Pretty subtitle maker
+		Write a subtitle, underlined by =, to out
 		"""
-		return self.__title__(subtitle, sym="!")
+		banner = self.__banner__(title, "||", "||")
 
-	def __text__(self, text):
+		self.out.write(banner + ("=" * self.width) + "\n")
+
+	def __info__(self, msg):
 		"""
-		Pretty text maker
+		Write a message to out
 		"""
-		if isinstance(text, list):
-			return "\n".join(self.__text__(line) for line in text) + "\n"
-		else:
-			width, height = shutil.get_terminal_size()
+		if not isinstance(msg, str):
+			raise ValueError("Core info message must be a str not ({} -> {})".format(type(msg), msg))
 
-			return textwrap.indent(textwrap.fill(text=text, width=width - 4), " ")
+		self.out.write(msg + "\n")
 
-	def title(self, title):
-		self.OUT.write(self.__title__(title))
+	def __warning__(self, expt):
+		"""
+		Raise expt if killLevel is 'warning', otherwise only write it to out
+		"""
+		self.__report__(expt, self.killLevels['warning'], "WARNING")
 
-	def subtitle(self, subtitle):
-		self.OUT.write(self.__subtitle__(subtitle))
+	def __error__(self, expt):
+		"""
+		Raise expt if killLevel is 'error' (or lower), otherwise only write it
+		to out
+		"""
+		self.__report__(expt, self.killLevels['error'], "ERROR")
 
-	def text(self, text):
-		self.OUT.write(self.__text__(text))
+	def __report__(self, expt, level, name):
+		if not isinstance(expt, Exception):
+			raise ValueError("Core {} must be an Exception not ({} -> {})".format(name.lower(), type(expt), expt))
 
-	def __read__(self, filename):
-		try:
-			indeces = [bool(re.search(reex, filename)) for reex in self.extensionRegexs]
-			index   = indeces.index(True)
+		if level >= self.killLevel:
+			raise expt
+
+		self.out.write("{}: {}: {}\n".format(name, expt.__class__.__name__, expt))
 
-			assert bool(re.search(self.extensionObjects[index].reextension, filename)) == True
-		except ValueError:
+	def __read__(self, filename):
+		ext = self.extensionRegistry.find(filename)
+		if ext == None:
 			# unsupported extension
 			raise CoreError("Attempted to read an unsupported file format ({})".format(filename))
 
 		# if an error is thrown in the reading process then that should be dealt with by
 		# the Extension module
-		return self.extensionObjects[index].read(filename=filename)
+		return ext.read(filename=filename)
 
 	def __write__(self, filename, content):
-		try:
-			indeces = [bool(re.search(reex, filename)) for reex in self.extensionRegexs]
-			index   = indeces.index(True)
-
-			assert bool(re.search(self.extensionObjects[index].reextension, filename)) == True
-
-			return self.extensionObjects[index].write(filename=filename, content=content)
-		except ValueError:
+		ext = self.extensionRegistry.find(filename)
+		if ext == None:
 			# unsupported extension
 			raise CoreError("Attempted to write an unsupported file format ({})".format(filename))
 
-	def __log_kill__(self, lvl, msgexpt):
-		if lvl in self.HARD_LOG_LVLS:
-			if isinstance(msgexpt, Exception):
-				text = "({}) {}".format(msgexpt.__class__.__name__, str(msgexpt))
-			else:
-				self.critical(ValueError("Core.__log_kill__ msgexpt must be an Exception for lvl {}".format(self._LOG_DICT_TO_STR_[lvl])))
-		elif lvl in self.SOFT_LOG_LVLS:
-			if isinstance(msgexpt, str) or isinstance(expt, list):
-				text = self.__text__(msgexpt)
-			else:
-				self.critical(ValueError("Core.__log_kill__ msgexpt must be a str/list for lvl {}".format(self._LOG_DICT_TO_STR_[lvl])))
-		else:
-			self.critical(ValueError("Core.__log_kill__ only accepts the following lvls: {}".format(", ".join(self._LOG_DICT_TO_STR_[l] for l in self._ALL_LOG_LIST_))))
-
-		try:
-			if lvl == self.DEBUG:
-				self.logger.debug(text)
-			elif lvl == self.INFO:
-				self.logger.info(text)
-			elif lvl == self.WARNING:
-				self.logger.warning(text)
-			elif lvl == self.ERROR:
-				self.logger.error(text)
-			elif lvl == self.CRITICAL:
-				self.logger.critical(text)
-		except AttributeError:
-			# logger hasn't been initialized yet
-			pass
-
-		if lvl >= self.KILL_LVL:
-			raise expt
-
-	def debug(self, msg):
-		self.__log_kill__(self.DEBUG, msg)
-		
-
-	def info(self, msg):
-		self.__log_kill__(self.INFO, msg)
-
-	def warning(self, expt):
-		self.__log_kill__(self.WARNING, expt)
-
-	def error(self, expt):
-		self.__log_kill__(self.ERROR, expt)
+		return ext.write(filename=filename, content=content)
 
-	def critical(self, expt):
-		self.__log_kill__(self.CRITICAL, expt)
-	
 	def __preferencesRead__(self):
 		if self.preferencesFile == None:
 			raise CoreError("This core does not support preferences")
@@ -0,0 +1,182 @@
+import logging, hashlib, re
+
+from bibtex_merger.authors import fold
+
+logger = logging.getLogger(__name__)
+__all__ = [	'ExactIndex', 'exactGroups', 'contentKey', 'identifiers'	]
+
+reSpace		= re.compile(r"\s+")
+reDOI		= re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)", re.IGNORECASE)
+reISBN		= re.compile(r"[^0-9X]")
+reEprint	= re.compile(r"^arxiv:\s*|v\d+$", re.IGNORECASE)
+reURL		= re.compile(r"^(?:https?://)?(?:www\.)?", re.IGNORECASE)
+
+def normalizeDOI(doi):
+	return reDOI.sub("", doi.strip()).lower()
+
+def normalizeISBN(isbn):
+	isbn = reISBN.sub("", isbn.upper())
+
+	# ISBN-10 -> ISBN-13 s.t. both forms of the same book match
+	if len(isbn) == 10:
+		isbn = "978" + isbn[:9]
+		isbn += str((10 - sum(int(c) * (3 if i % 2 else 1) for i, c in enumerate(isbn)) % 10) % 10)
+
+	return isbn
+
+def normalizeEprint(eprint):
+	return reEprint.sub("", eprint.strip()).lower()
+
+def normalizeURL(url):
+	return reURL.sub("", url.strip()).rstrip("/").lower()
+
+# identifier field -> normalization
+identifiers = {	"doi":		normalizeDOI,
+				"isbn":		normalizeISBN,
+				"eprint":	normalizeEprint,
+				"url":		normalizeURL	}
+
+# chapters and papers share the ISBN (and often the url) of the book or
+# proceedings they are part of, hence are not matched by these
+partTypes	= frozenset(["inbook", "incollection", "inproceedings", "conference"])
+partFields	= frozenset(["isbn", "url"])
+
+def _normalize(value):
+	if isinstance(value, (list, tuple)):
+		return tuple(_normalize(v) for v in value)
+	if isinstance(value, dict):
+		return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+
+	return reSpace.sub(" ", fold(value).lower()).strip()
+
+def contentKey(entry, ignore=["ID"]):
+	"""
+	Digest of the normalized content (case, accents and whitespace folded)
+	of an entry, ignoring the fields in ignore.
+	"""
+	content = tuple(sorted((k.lower(), _normalize(v)) for k, v in entry.items() if k not in ignore))
+
+	return hashlib.sha1(repr(content).encode("utf-8")).digest()
+
+class ExactIndex(object):
+	"""The groups of exactGroups, kept up to date as rows are added to the
+	store: only the new rows are hashed, and looked up among the content
+	digests and identifiers of the rows so far.
+
+	Attributes:
+		idField		--	the id field, ignored by the content digest
+		typeField	--	the entry type field
+	"""
+
+	def __init__(self, idField="ID", typeField="ENTRYTYPE"):
+		self._idField	= idField
+		self._typeField	= typeField
+
+		self._parent	= []
+
+		# first row seen of every content digest and identifier
+		self._seen		= {}
+
+		# root -> sorted rows, of the groups of at least 2 rows
+		self._groups	= {}
+		self._pairs		= 0
+
+		return
+
+	def __len__(self):
+		return len(self._parent)
+
+	@property
+	def idField(self):
+		return self._idField
+
+	@property
+	def typeField(self):
+		return self._typeField
+
+	@property
+	def pairs(self):
+		"""
+		Number of pairs of rows within the groups.
+		"""
+		return self._pairs
+
+	def extend(self, store):
+		"""
+		Add the rows of store after those added so far, returning the list
+		of the groups that gained a row.
+		"""
+		first = len(self)
+		self._parent.extend(range(first, len(store)))
+
+		changed = set()
+		for i in range(first, len(store)):
+			entry = store.row(i)
+
+			keys = [("content", contentKey(entry, ignore=[self.idField]))]
+			for field, norm in identifiers.items():
+				value = entry.get(field)
+				if not value:
+					continue
+				if field in partFields and str(entry.get(self.typeField, "")).lower() in partTypes:
+					continue
+
+				value = norm(value)
+				if value:
+					keys.append((field, value))
+
+			for key in keys:
+				if key in self._seen:
+					changed.add(self.__union__(self._seen[key], i))
+				else:
+					self._seen[key] = i
+
+		return sorted(self._groups[root] for root in set(self.__find__(root) for root in changed))
+
+	def groups(self):
+		"""
+		Sorted list of the groups (sorted lists of rows, each of at least 2
+		rows).
+		"""
+		return sorted(self._groups.values())
+
+	def __find__(self, i):
+		parent = self._parent
+		while parent[i] != i:
+			parent[i] = parent[parent[i]]
+			i = parent[i]
+		return i
+
+	def __union__(self, i, j):
+		# the root of a group is its first row
+		i, j = self.__find__(i), self.__find__(j)
+		if i == j:
+			return i
+
+		i, j = min(i, j), max(i, j)
+		self._parent[j] = i
+
+		a, b = self._groups.pop(i, [i]), self._groups.pop(j, [j])
+		self._pairs += len(a) * len(b)
+
+		# mostly a new row joining a group of earlier rows
+		if a[-1] < b[0]:
+			a.extend(b)
+		else:
+			a = sorted(a + b)
+		self._groups[i] = a
+
+		return i
+
+def exactGroups(store, idField="ID", typeField="ENTRYTYPE"):
+	"""
+	List of the groups (sorted lists of rows, each of at least 2 rows) of
+	entries of store that are the same, i.e. have the same normalized
+	content or share a doi, isbn, eprint or url, transitively.
+
+	Runs in O(n), every entry is hashed once (see ExactIndex).
+	"""
+	index = ExactIndex(idField=idField, typeField=typeField)
+	index.extend(store)
+
+	return index.groups()
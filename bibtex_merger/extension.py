@@ -1,29 +1,80 @@
-import logging, os, re
+import logging, os, re, importlib, sys
+
+python2 = sys.version_info < (3, 0, 0)
+
+if python2:
+	class AsyncExtension(object):
+		pass
+else:
+	# asyncio counterparts of read/write
+	from bibtex_merger.aio import AsyncExtension
 
 logger = logging.getLogger(__name__)
-__all__ = [	'Extension', 'ExtensionError'	]
+__all__ = [	'Extension', 'ExtensionError', 'ExtensionRegistry'	]
+
+# a lazy "package.module:attribute" reference to a reader/writer
+_reReference	= re.compile(r'^[A-Za-z_][\w.]*:[A-Za-z_][\w.]*$')
+# an extension made only of literal characters, e.g. "bib" or "tar\.gz"
+_reLiteralExt	= re.compile(r'^\w+(?:\\\.\w+)*$')
+# a complete filename made only of literal (or escaped) characters
+_reLiteralName	= re.compile(r'^(?:[^\\.^$*+?{}\[\]|()]|\\\W)*$')
+
+def _resolve(reference):
+	"""
+	Import and return the object of a "package.module:attribute" reference.
+	"""
+	module, attr = reference.split(":")
+
+	obj = importlib.import_module(module)
+	for a in attr.split("."):
+		obj = getattr(obj, a)
+
+	if not hasattr(obj, '__call__'):
+		raise ValueError("Extension reference ({}) is not a method reference".format(reference))
+	return obj
+
+class Extension(AsyncExtension):
+	"""A file format, identified by its extension (or complete filename).
+
+	Attributes:
+		ext		--	the file extension (regular expression) or, if enclosed in
+					^...$, the complete filename
+		reader	--	method reference reading a file, or a lazy
+					"package.module:attribute" reference to one that is only
+					imported when a file of this type is first read
+		writer	--	method reference writing a file, or a lazy reference
+
+	On python 3 aread/awrite are the asyncio counterparts of read/write.
+	"""
 
-class Extension(object):
 	def __init__(self, ext=r".*", reader=None, writer=None):
 		# assert valid extension
 		if not isinstance(ext, str):
 			raise ValueError("Extension's ext argument ({}) must be a str".format(ext))
 		
 		# assert valid reader argument
-		if reader and not hasattr(reader, '__call__'):
+		if reader and not (hasattr(reader, '__call__') or (isinstance(reader, str) and _reReference.match(reader))):
 			raise ValueError("Extension's reader argument ({}) must be a method reference".format(reader))
 
 		# assert valid writer argument
-		if writer and not hasattr(writer, '__call__'):
+		if writer and not (hasattr(writer, '__call__') or (isinstance(writer, str) and _reReference.match(writer))):
 			raise ValueError("Extension's writer argument ({}) must be a method reference".format(writer))
 
 		# set  arguments
+		self._filename	= None
+		self._suffix	= None
 		if re.match(r'^\^.*\$$', ext):
 			# this is a complete filename, compile as-is
 			self._extension = re.compile(ext)
+
+			if _reLiteralName.match(ext[1:-1]):
+				self._filename = re.sub(r'\\(.)', r'\1', ext[1:-1])
 		else:
 			# this is only the extension, append '.'
 			self._extension = re.compile(r'\.' + ext + r'$')
+
+			if _reLiteralExt.match(ext):
+				self._suffix = "." + ext.replace("\\.", ".")
 		self._reader = reader
 		self._writer = writer
 		
@@ -42,11 +93,29 @@ class Extension(object):
 		"""
 		return self._extension
 
+	@property
+	def filename(self):
+		"""
+		The complete filename this Extension object matches, if it is a literal
+		(None otherwise).
+		"""
+		return self._filename
+
+	@property
+	def suffix(self):
+		"""
+		The literal suffix (including the leading '.') this Extension object
+		matches, if it is a literal (None otherwise).
+		"""
+		return self._suffix
+
 	@property
 	def reader(self):
 		"""
 		The reader method reference for this Extension object.
 		"""
+		if isinstance(self._reader, str):
+			self._reader = _resolve(self._reader)
 		return self._reader
 
 	@property
@@ -54,6 +123,8 @@ class Extension(object):
 		"""
 		The writer method reference for this Extension object.
 		"""
+		if isinstance(self._writer, str):
+			self._writer = _resolve(self._writer)
 		return self._writer
 
 	def read(self, filename):
@@ -80,6 +151,75 @@ class Extension(object):
 
 		return self.writer(filename, content)
 
+class ExtensionRegistry(object):
+	"""Lookup of the Extension object to use for a filename.
+
+	Equivalent to taking the first Extension (in the given order) whose regular
+	expression matches the filename, but literal filenames and suffixes are
+	looked up in tables and only the remaining (complex) patterns are tried
+	as regular expressions.
+
+	Attributes:
+		extensions	--	the Extension objects, ordered from most specific to
+						generic since the first match wins
+	"""
+
+	def __init__(self, extensions):
+		self._extensions	= list(extensions)
+
+		self._filenames		= {}
+		self._suffixes		= {}
+		self._patterns		= []
+
+		for i, ext in enumerate(self._extensions):
+			if ext.filename != None:
+				self._filenames.setdefault(ext.filename, i)
+			elif ext.suffix != None:
+				self._suffixes.setdefault(ext.suffix, i)
+			else:
+				self._patterns.append((i, ext.reextension))
+
+		return
+
+	@property
+	def extensions(self):
+		return self._extensions
+
+	def index(self, filename):
+		"""
+		The index of the Extension object to use for filename, None if there is
+		no matching Extension.
+		"""
+		best = self._filenames.get(filename)
+
+		# every dotted tail of the filename is a candidate suffix
+		if self._suffixes:
+			name = os.path.basename(filename)
+			dot = name.find(".")
+			while dot >= 0:
+				i = self._suffixes.get(name[dot:])
+				if i != None and (best == None or i < best):
+					best = i
+				dot = name.find(".", dot + 1)
+
+		# only the complex patterns ordered before the best match so far matter
+		for i, reex in self._patterns:
+			if best != None and i > best:
+				break
+			if reex.search(filename):
+				best = i
+				break
+
+		return best
+
+	def find(self, filename):
+		"""
+		The Extension object to use for filename, None if there is no matching
+		Extension.
+		"""
+		i = self.index(filename)
+		return None if i == None else self._extensions[i]
+
 class ExtensionError(Exception):
 	"""Exception raised for Extension object errors.
 
@@ -0,0 +1,161 @@
+import csv, json, logging
+
+from bibtex_merger.merger import MergerError
+from bibtex_merger.reader import streamEntries, readRange
+
+logger = logging.getLogger(__name__)
+__all__ = [	'bibRead', 'bibWrite', 'bibLoad', 'bibLoadRange', 'bibStream', 'bibParser', 'bibEntries', 'bibVersion', 'customizations', 'csvRead', 'csvWrite', 'jsonRead', 'jsonWrite'	]
+
+# These readers/writers are registered with BibTeX_Merger through lazy
+# "bibtex_merger.formats:..." references, this module (and its format
+# libraries) is only imported once a file of that type is first opened.
+# bibtexparser is imported by the functions that use it, s.t. loading this
+# module for a csv or json file does not pull it in either.
+
+def customizations(record):
+	# This is a formating specification of the BibtexParser package
+	# see https://bibtexparser.readthedocs.org/en/latest/bibtexparser.html#module-customization
+	import bibtexparser as bp
+
+	# record = bp.customization.homogenize_latex_encoding(record)
+
+	record = bp.customization.type(record)
+	record = bp.customization.author(record)
+	# record = bp.customization.editor(record)
+	# record = bp.customization.journal(record)
+	# record = bp.customization.keyword(record)
+	# record = bp.customization.page_double_hyphen(record)
+
+	return record
+
+def bibParser(customization=None):
+	"""
+	A fresh BibTexParser using customization (the module level
+	customizations by default); a parser keeps the entries and @string
+	macros of everything it has parsed, hence one is made per file.
+	"""
+	import bibtexparser as bp
+
+	parser = bp.bparser.BibTexParser()
+	parser.customization = customizations if customization == None else customization
+
+	return parser
+
+def bibLoad(filename, customization=None):
+	"""
+	Parse a single .bib file into a BibDatabase.
+
+	Lives at module level (rather than on BibTeX_Merger) so that it can be
+	handed to worker processes.
+	"""
+	import bibtexparser as bp
+
+	with open(filename, 'r') as f:
+		try:
+			return bp.load(f, parser=bibParser(customization))
+		except ValueError:
+			raise MergerError("This file ({}) has formatting errors and could not be parsed. Skipping.".format(filename))
+
+def bibLoadRange(task):
+	"""
+	Parse one (filename, start, end, strings) range of a .bib file, as found
+	by reader.chunkRanges, into a list of entries. A range with start None
+	stands for the whole file.
+
+	Lives at module level (rather than on BibTeX_Merger) so that it can be
+	handed to worker processes.
+	"""
+	import bibtexparser as bp
+
+	filename, start, end, strings = task
+
+	if start == None:
+		return bibLoad(filename).entries
+
+	try:
+		return bp.loads(readRange(filename, start, end, strings), parser=bibParser()).entries
+	except ValueError:
+		raise MergerError("This file ({}) has formatting errors and could not be parsed. Skipping.".format(filename))
+
+def bibStream(filename, budget=1048576, customization=None):
+	"""
+	Generator yielding the entries of a single .bib file, customized by
+	customization (the module level customizations by default), one at a
+	time, buffering at most ~budget characters of raw BibTeX at once.
+	"""
+	with open(filename, 'r') as f:
+		try:
+			for e in streamEntries(f, bibParser(customization), budget=budget):
+				yield e
+		except ValueError:
+			raise MergerError("This file ({}) has formatting errors and could not be parsed. Skipping.".format(filename))
+
+def bibEntries(db):
+	"""
+	The list of entries of a parsed .bib file, be it a BibDatabase, a list
+	or a stream of entries.
+	"""
+	if isinstance(db, list):
+		return db
+	if hasattr(db, 'entries'):
+		return db.entries
+	return list(db)
+
+def bibVersion():
+	"""
+	Version of the bibtexparser package, e.g. to invalidate cached entries.
+	"""
+	import bibtexparser as bp
+
+	return getattr(bp, "__version__", "")
+
+def bibRead(filename):
+	return bibLoad(filename)
+
+def bibWrite(filename, content):
+	if content != None:
+		import bibtexparser as bp
+
+		if isinstance(content, list):
+			# List of entries
+			db = bp.bibdatabase.BibDatabase()
+			db.entries = content
+		else:
+			db = content
+
+		with open(filename, 'w') as f:
+			f.write(bp.dumps(db))
+			return
+	raise MergerError("BibTeX content is None, write failed")
+
+def csvRead(filename):
+	with open(filename) as f:
+		return [e for e in csv.reader(f)]
+
+def csvWrite(filename, content):
+	if content != None:
+		if isinstance(content, list):
+			if len(content) > 0:
+				with open(filename, 'wb') as f:
+					filecontent = csv.writer(f)
+					if isinstance(content[0], list):
+						# Matrix, List of lists
+						filecontent.writerows(content)
+					else:
+						# Vector, List
+						filecontent.writerow(content)
+					return
+			raise MergerError("CSV content is empty, nothing to write")
+		raise MergerError("CSV content is not of matrix or vector format")
+	raise MergerError("CSV content is None, write failed")
+
+def jsonRead(filename):
+	with open(filename) as f:
+		return json.load(f)
+
+def jsonWrite(filename, content):
+	if content != None:
+		with open(filename, 'w') as f:
+			json.dump(content, f, indent=1, sort_keys=True)
+			return
+	raise MergerError("JSON content is None, write failed")
@@ -0,0 +1,74 @@
+import logging
+from bisect import bisect_left, insort
+
+logger = logging.getLogger(__name__)
+__all__ = [	'PrefixIndex'	]
+
+class PrefixIndex(object):
+	"""Sorted index of string keys, each with a list of values.
+
+	The keys are kept sorted so that all keys starting with a given prefix
+	form one contiguous run, found by binary search. Looking up a prefix
+	therefore costs O(log n) plus the number of matching keys rather than a
+	scan over every key.
+
+	Attributes:
+		keys	--	optional iterable of keys to initially add (with no values)
+	"""
+
+	def __init__(self, keys=None):
+		self._keys		= []
+		self._values	= {}
+
+		if keys != None:
+			for key in keys:
+				self.add(key)
+
+		return
+
+	def __len__(self):
+		return len(self._keys)
+
+	def __contains__(self, key):
+		return key in self._values
+
+	def __getitem__(self, key):
+		return self._values[key]
+
+	def keys(self):
+		"""
+		All keys, sorted.
+		"""
+		return list(self._keys)
+
+	def items(self):
+		"""
+		(key, values) pairs, sorted by key.
+		"""
+		return [(key, self._values[key]) for key in self._keys]
+
+	def add(self, key, values=None):
+		"""
+		Add key with the given list of values (default empty), returning that
+		list. An existing key keeps its values.
+		"""
+		try:
+			return self._values[key]
+		except KeyError:
+			pass
+
+		insort(self._keys, key)
+		self._values[key] = [] if values == None else values
+
+		return self._values[key]
+
+	def startingWith(self, prefix):
+		"""
+		Generator of all keys starting with prefix, in sorted order.
+		"""
+		i = bisect_left(self._keys, prefix)
+		while i < len(self._keys) and self._keys[i].startswith(prefix):
+			yield self._keys[i]
+			i += 1
+
+		return
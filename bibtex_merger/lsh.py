@@ -0,0 +1,170 @@
+import logging, zlib
+
+import numpy
+
+from bibtex_merger.blocking import normalize
+
+logger = logging.getLogger(__name__)
+__all__ = [	'MinHashLSH', 'shingles'	]
+
+# hashes are taken modulo the Mersenne prime 2^61 - 1
+MERSENNE	= numpy.uint64((1 << 61) - 1)
+MAXHASH		= numpy.uint64((1 << 32) - 1)
+
+def shingles(text, size=3):
+	"""
+	Set of the character shingles (substrings of length size) of the
+	normalized text, the whole normalized text if shorter than size and the
+	empty set if it has no words at all.
+	"""
+	text = " ".join(normalize(text))
+
+	if not text:
+		return set()
+	if len(text) <= size:
+		return set([text])
+
+	return set(text[i:i + size] for i in range(len(text) - size + 1))
+
+class MinHashLSH(object):
+	"""Locality sensitive hashing of texts by MinHash signatures.
+
+	Every text gets a signature of numBands * numRows MinHash values over its
+	character shingles. The signature is cut into numBands bands of numRows
+	values and two texts become a candidate pair as soon as any one of their
+	bands is identical. Texts of Jaccard similarity s are paired with
+	probability 1 - (1 - s^numRows)^numBands, i.e. a steep S-curve around
+	s ~ (1 / numBands)^(1 / numRows); more bands raise recall, more rows
+	raise precision.
+
+	A bucket holding more than maxBucketSize texts (e.g. of a title shared
+	by many entries, such as "Preface") would alone give a quadratic number
+	of pairs, hence such buckets are skipped; their texts are still paired
+	by any of their other bands.
+
+	Attributes:
+		numBands		--	number of bands, int > 0
+		numRows			--	number of MinHash values per band, int > 0
+		shingleSize		--	length of the character shingles, int > 0
+		seed			--	seed of the MinHash functions
+		maxBucketSize	--	maximum number of texts of a bucket that is
+							paired, None (default) for no maximum
+	"""
+
+	def __init__(self, numBands=16, numRows=4, shingleSize=3, seed=1, maxBucketSize=None):
+		if not (isinstance(numBands, int) and numBands > 0):
+			raise ValueError("MinHashLSH numBands argument must be int > 0 not ({} -> {})".format(type(numBands), numBands))
+		self._numBands = numBands
+
+		if not (isinstance(numRows, int) and numRows > 0):
+			raise ValueError("MinHashLSH numRows argument must be int > 0 not ({} -> {})".format(type(numRows), numRows))
+		self._numRows = numRows
+
+		if not (isinstance(shingleSize, int) and shingleSize > 0):
+			raise ValueError("MinHashLSH shingleSize argument must be int > 0 not ({} -> {})".format(type(shingleSize), shingleSize))
+		self._shingleSize = shingleSize
+
+		if not (maxBucketSize == None or (isinstance(maxBucketSize, int) and maxBucketSize > 1)):
+			raise ValueError("MinHashLSH maxBucketSize argument must be None or int > 1 not ({} -> {})".format(type(maxBucketSize), maxBucketSize))
+		self._maxBucketSize = maxBucketSize
+
+		# the universal hash functions (a * x + b) mod MERSENNE
+		rand	= numpy.random.RandomState(seed)
+		numHash	= numBands * numRows
+		self._a	= rand.randint(1, 1 << 32, size=numHash, dtype=numpy.int64).astype(numpy.uint64)
+		self._b	= rand.randint(0, 1 << 32, size=numHash, dtype=numpy.int64).astype(numpy.uint64)
+
+		self._buckets	= [{} for b in range(numBands)]
+		self._size		= 0
+		self._skipped	= 0
+
+		return
+
+	def __len__(self):
+		return self._size
+
+	@property
+	def numBands(self):
+		return self._numBands
+
+	@property
+	def numRows(self):
+		return self._numRows
+
+	@property
+	def shingleSize(self):
+		return self._shingleSize
+
+	@property
+	def maxBucketSize(self):
+		return self._maxBucketSize
+
+	@property
+	def skipped(self):
+		"""
+		Number of buckets larger than maxBucketSize that candidates skipped.
+		"""
+		return self._skipped
+
+	@property
+	def threshold(self):
+		"""
+		Approximate Jaccard similarity above which texts are likely paired.
+		"""
+		return (1.0 / self.numBands) ** (1.0 / self.numRows)
+
+	def signature(self, text):
+		"""
+		The MinHash signature (uint64 array of numBands * numRows values) of
+		text, None if text has no shingles.
+		"""
+		s = shingles(text, self.shingleSize)
+		if not s:
+			return None
+
+		x = numpy.fromiter((zlib.crc32(t.encode("utf-8")) & 0xffffffff for t in s), dtype=numpy.uint64, count=len(s))
+
+		# one row per shingle, one column per hash function (wraps mod 2^64)
+		h = (numpy.outer(x, self._a) + self._b) % MERSENNE & MAXHASH
+
+		return h.min(axis=0)
+
+	def add(self, key, text):
+		"""
+		Bucket key (e.g. a row number) by the bands of the signature of text,
+		returning whether text had any shingles at all.
+		"""
+		sig = self.signature(text)
+		if sig is None:
+			return False
+
+		for band, bucket in zip(sig.reshape(self.numBands, self.numRows), self._buckets):
+			bucket.setdefault(band.tobytes(), []).append(key)
+
+		self._size += 1
+
+		return True
+
+	def candidates(self):
+		"""
+		Generator of the candidate pairs (key1, key2) with key1 <= key2,
+		every unordered pair once, leaving out the buckets larger than
+		maxBucketSize (counted by skipped).
+		"""
+		seen = set()
+		self._skipped = 0
+
+		for bucket in self._buckets:
+			for keys in bucket.values():
+				if self.maxBucketSize != None and len(keys) > self.maxBucketSize:
+					self._skipped += 1
+					continue
+
+				for i in range(len(keys)):
+					for j in range(i + 1, len(keys)):
+						pair = (keys[i], keys[j]) if keys[i] <= keys[j] else (keys[j], keys[i])
+						if pair not in seen:
+							seen.add(pair)
+							yield pair
+
+		return
@@ -1,29 +1,239 @@
-import bibtexparser as bp
-
 import Levenshtein as le
 import fuzzy as fz
 
 import numpy
 
-import scipy.misc as ch
-
-from sklearn import linear_model
-from sklearn.cross_validation import train_test_split
-# from scipy import misc as ch
+# scikit-learn is only needed by Learner and is imported there on demand,
+# keeping it (and SciPy) out of the startup cost of `import bibtex_merger`;
+# likewise bibtexparser is only imported by bibtex_merger.formats
+# import scipy.misc as ch
 # import gmpy2 as ch
 
-import re, csv, os, threading, logging, sys
+import re, os, threading, logging, sys, multiprocessing
 from datetime import *
-from collections import OrderedDict
+from timeit import default_timer as timer
+from collections import OrderedDict, deque
+
+python2 = sys.version_info < (3, 0, 0)
+
+if python2:
+	import Queue as queue
+else:
+	import queue
 
 from bibtex_merger.core import *
 from bibtex_merger.extension import *
+from bibtex_merger.reader import chunkRanges
+from bibtex_merger.cache import ParseCache, fingerprint
+from bibtex_merger.store import EntryStore
+from bibtex_merger.authors import AuthorTable
+from bibtex_merger.similarity import NamePairCache
+from bibtex_merger.blocking import BlockingStrategy, BlockingChain, SortedNeighbourhood, strategies
+from bibtex_merger.lsh import MinHashLSH
+from bibtex_merger.tfidf import TfidfNeighbours
+from bibtex_merger.exact import ExactIndex
+from bibtex_merger.scores import ScoreHistogram, ScoreReservoir
 
 logger = logging.getLogger(__name__)
 __all__ = [	'BibTeX_Merger', 'MergerError'	]
 
+def comb2(n):
+	"""
+	Number of pairs among n items, i.e. n choose 2.
+	"""
+	return n * (n - 1) // 2 if n > 1 else 0
+
+def authorArrays(authorIDs, others):
+	"""
+	The author ids of every entry (authorIDs, by row) as flat arrays: the
+	offset of the first author of every row, the author ids of all rows one
+	after the other and the number of authors of every row, not counting a
+	trailing "others" (others being the AuthorTable column).
+	"""
+	lengths	= numpy.array([0 if a == None else len(a) - (1 if others[a[-1]] else 0) for a in authorIDs], dtype=numpy.int64)
+	flat	= numpy.fromiter((i for a in authorIDs if a != None for i in a), dtype=numpy.int64)
+	ptr		= numpy.concatenate(([0], numpy.cumsum([0 if a == None else len(a) for a in authorIDs]))).astype(numpy.int64)
+
+	return ptr, flat, lengths
+
+def shallowScores(chunk, authors, table, scores, threshold, bound=False, histogram=None, reservoir=None):
+	"""
+	Shallow compare (by authors) a chunk of candidate pairs, a list of
+	(entry1, partners) as given by BibTeX_Merger.__candidatePairs__.
+
+	authors holds the authorIDs and their authorArrays, table the (first,
+	last, abbreviated, firstSoundex, lastSoundex) columns of the
+	AuthorTable (abbreviated as a bool array), scores is the name pair
+	scorer (e.g. NamePairCache.scores) and threshold the
+	shallowDeepCompDiv.
+
+	All pairs of the chunk are scored at once, author position by author
+	position: the names of every distinct pair of authors are scored once
+	and the scores are summed up and thresholded as arrays, in the order
+	(hence with the rounding) of comparing pair by pair.
+
+	With bound set, a pair is abandoned as soon as it can no longer reach
+	threshold, i.e. after an author position even perfect scores (1 for
+	both the first and last name) on all of its remaining positions would
+	not lift its product above threshold. Abandoned pairs are not deep
+	compared.
+
+	The combined distances of the pairs scored in full are added to
+	histogram (a ScoreHistogram) and offered, with their (entry1, entry2)
+	rows, to reservoir (a ScoreReservoir), if given.
+
+	Returns the number of pairs compared, the list of the (chunk index,
+	entry2) pairs to deep compare (in order), the number of author
+	comparisons made and the number skipped by bound.
+
+	Lives at module level (rather than on BibTeX_Merger) so that it can be
+	run by worker processes.
+	"""
+	authorIDs, ptr, flat, lengths = authors
+	first, last, abbreviated, firstSoundex, lastSoundex = table
+
+	counts = numpy.array([len(p) for _, p in chunk], dtype=numpy.int64)
+	if counts.sum() == 0:
+		return 0, [], 0, 0
+
+	# every pair of the chunk, by the index of its item
+	item	= numpy.repeat(numpy.arange(len(chunk)), counts)
+	entry1	= numpy.array([e for e, _ in chunk], dtype=numpy.int64)[item]
+	entry2	= numpy.concatenate([p for _, p in chunk]).astype(numpy.int64)
+
+	numCompare		= numpy.minimum(lengths[entry1], lengths[entry2])
+	editDistance	= numpy.zeros(len(item))
+	phonDistance	= numpy.zeros(len(item))
+	alive			= numpy.ones(len(item), dtype=bool)
+	authorCompares	= 0
+
+	def pairScores(a1, a2, names, soundex):
+		# the (edit, phon) scores of the names of the author pairs a1, a2
+		# each distinct pair scored once
+		keys, inverse = numpy.unique(a1 * len(names) + a2, return_inverse=True)
+		edit = numpy.empty(len(keys))
+		phon = numpy.empty(len(keys))
+		for k, key in enumerate(keys.tolist()):
+			i, j = divmod(key, len(names))
+			edit[k], phon[k] = scores(names[i], soundex[i], names[j], soundex[j])
+
+		return edit[inverse], phon[inverse]
+
+	for compareIndex in xrange(0, int(numCompare.max())):
+		active	= numpy.flatnonzero((numCompare > compareIndex) & alive)
+		if len(active) == 0:
+			break
+		authorCompares += len(active)
+
+		a1		= flat[ptr[entry1[active]] + compareIndex]
+		a2		= flat[ptr[entry2[active]] + compareIndex]
+
+		# one of the authors' first name is an abbreviation hence a perfect
+		# match, otherwise test for similarity
+		edit	= numpy.ones(len(active))
+		phon	= numpy.ones(len(active))
+		full	= numpy.flatnonzero(~(abbreviated[a1] | abbreviated[a2]))
+		if len(full):
+			edit[full], phon[full] = pairScores(a1[full], a2[full], first, firstSoundex)
+		editDistance[active] += edit
+		phonDistance[active] += phon
+
+		edit, phon = pairScores(a1, a2, last, lastSoundex)
+		editDistance[active] += edit
+		phonDistance[active] += phon
+
+		if bound:
+			# the best product reachable with the remaining positions (with
+			# some slack s.t. rounding never abandons a pair that makes it)
+			n		= numCompare[active]
+			rest	= 2.0 * (n - compareIndex - 1)
+			best	= ((editDistance[active] + rest) / n) * ((phonDistance[active] + rest) / n)
+			alive[active[(best < threshold - 1e-9) & (rest > 0)]] = False
+
+	distance = (editDistance / numCompare) * (phonDistance / numCompare)
+
+	match	= alive & (distance >= threshold)
+	deep	= [(int(i), int(e)) for i, e in zip(item[match], entry2[match])]
+
+	if histogram != None:
+		histogram.add(distance[alive])
+
+	if reservoir != None and reservoir.size > 0:
+		kept = numpy.flatnonzero(alive)
+		reservoir.add(distance[kept], [(int(entry1[p]), int(entry2[p])) for p in kept])
+
+	return int(counts.sum()), deep, authorCompares, int(numCompare.sum()) - authorCompares
+
+def deepDistances(store, keys, entry1, entry2):
+	"""
+	Dict of the normalized edit distance (0 same .. 1 different) of every
+	field of keys that both entry1 and entry2 (rows of store) have a value
+	for.
+
+	Lives at module level (rather than on BibTeX_Merger) so that it can be
+	run by worker processes.
+	"""
+	l = {}
+	for k in keys:
+		if store.has(entry1, k) and store.has(entry2, k):
+			v1 = store.get(entry1, k)
+			v2 = store.get(entry2, k)
+
+			if v1 and v2:
+				l[k] = le.distance(v1, v2) / float(max(len(v1), len(v2)))
+
+	return l
+
+# the state of a shallow compare worker process, set up by shallowInit
+_shallow = {}
+
+def shallowInit(authors, table, lenSoundex, cacheSize, threshold, bound, histogram, reservoir):
+	"""
+	Initializer of the shallow compare worker processes, every worker gets
+	its own name pair cache.
+	"""
+	_shallow["authors"]		= authors
+	_shallow["table"]		= table
+	_shallow["cache"]		= NamePairCache(lenSoundex=lenSoundex, maxSize=cacheSize)
+	_shallow["threshold"]	= threshold
+	_shallow["bound"]		= bound
+	_shallow["histogram"]	= histogram
+	_shallow["reservoir"]	= reservoir
+
+def shallowTask(chunk):
+	"""
+	shallowScores of a chunk in a worker process, along with the score
+	histogram and reservoir of the chunk and the name pair cache hits and
+	misses it took.
+	"""
+	cache = _shallow["cache"]
+	hits, misses = cache.hits, cache.misses
+
+	histogram = _shallow["histogram"].empty()
+	reservoir = _shallow["reservoir"].empty()
+
+	result = shallowScores(chunk, _shallow["authors"], _shallow["table"], cache.scores, _shallow["threshold"], _shallow["bound"], histogram, reservoir)
+
+	return result + (histogram, reservoir, cache.hits - hits, cache.misses - misses)
+
+# the state of a deep compare worker process, set up by deepInit
+_deep = {}
+
+def deepInit(store, keys):
+	"""
+	Initializer of the deep compare worker processes.
+	"""
+	_deep["store"]	= store
+	_deep["keys"]	= keys
+
+def deepTask(batch):
+	"""
+	deepDistances of a batch of (entry1, entry2) pairs in a worker process.
+	"""
+	return [deepDistances(_deep["store"], _deep["keys"], entry1, entry2) for entry1, entry2 in batch]
+
 class BibTeX_Merger(Core):
-	def __init__(self, out=sys.stdout, importDir='.', numFiles=-1, killLevel='warning', shallowDeepCompDiv=3.4, summedPercentErrorDiv=[0.4, 1.0], learningModel='fminunc', doLearning='remakeModel'):
+	def __init__(self, out=sys.stdout, importDir='.', numFiles=-1, killLevel='warning', shallowDeepCompDiv=3.4, summedPercentErrorDiv=[0.4, 1.0], learningModel='fminunc', doLearning='remakeModel', numWorkers=1, streamBudget=None, cacheSize=None, chunkSize=None, nameCacheSize=65536, blocking=['authors', 'initials'], lshBands=None, lshRows=4, lshMaxBucketSize=1000, tfidfK=None, tfidfChunk=256, tfidfFields=['title'], tfidfMaxDF=0.1, exactMatch=False, maxBagSize=None, splitting=['lastnames', 'year', 'title'], reportFile=None, noAuthorBlocking=None, pipeline=False, prefetch=2, compareWorkers=1, compareChunk=65536, shallowBound=False, scoreBins=40, scoreExamples=0, scoreReportFile=None, deepWorkers=1, compareQueue=2):
 		super(BibTeX_Merger, self).__init__(ext=self.__initExtensions__(), out=out, killLevel=killLevel)
 
 		self.__initConstants__()
@@ -66,6 +276,189 @@ class BibTeX_Merger(Core):
 			raise ValueError("BibTeX_Merger doLearning argument must be {} not ({} -> {})".format("|".join(self.doLearnings), type(doLearning), doLearning))
 		self._doLearning = self.doLearnings[doLearning]
 
+		# Number of worker processes used to parse the imported files
+		# If set to 1 (default) then the files are parsed serially
+		if not (isinstance(numWorkers, int) and numWorkers >= 1):
+			raise ValueError("BibTeX_Merger numWorkers argument must be int >= 1 not ({} -> {})".format(type(numWorkers), numWorkers))
+		self._numWorkers = numWorkers
+
+		# Number of raw characters the .bib reader may buffer at once
+		# If set to None (default) then every file is parsed whole, otherwise the
+		# entries are streamed (only applies to serial parsing, worker processes
+		# always return whole databases)
+		if not (streamBudget == None or (isinstance(streamBudget, int) and streamBudget > 0)):
+			raise ValueError("BibTeX_Merger streamBudget argument must be None or int > 0 not ({} -> {})".format(type(streamBudget), streamBudget))
+		self._streamBudget = streamBudget
+
+		# Size (in bytes) of the ranges that a single large file is split into so
+		# that its parsing is also spread across the worker processes
+		# If set to None (default) then each file is parsed by a single worker
+		if not (chunkSize == None or (isinstance(chunkSize, int) and chunkSize > 0)):
+			raise ValueError("BibTeX_Merger chunkSize argument must be None or int > 0 not ({} -> {})".format(type(chunkSize), chunkSize))
+		self._chunkSize = chunkSize
+
+		# Maximum number of name pairs whose similarity scores are memoized
+		# If set to 0 then every name pair is scored again
+		if not (isinstance(nameCacheSize, int) and nameCacheSize >= 0):
+			raise ValueError("BibTeX_Merger nameCacheSize argument must be int >= 0 not ({} -> {})".format(type(nameCacheSize), nameCacheSize))
+		self._nameCache = NamePairCache(lenSoundex=self.lenSoundex, maxSize=nameCacheSize)
+
+		# Blocking strategies that Bagging splits the entries by, in order, each
+		# either a name (see blocking.strategies) or a BlockingStrategy
+		if not (isinstance(blocking, list) and all(isinstance(b, BlockingStrategy) or (isinstance(b, str) and b in strategies) for b in blocking)):
+			raise ValueError("BibTeX_Merger blocking argument must be a list of BlockingStrategy|{} not ({} -> {})".format("|".join(sorted(strategies)), type(blocking), blocking))
+		self._blocking = [strategies[b]() if isinstance(b, str) else b for b in blocking]
+
+		# MinHash LSH on the titles, which also pairs up the entries that the
+		# (author based) blocking keeps apart, e.g. those without authors
+		# If lshBands is None (default) then no title comparison is done
+		if not (lshBands == None or (isinstance(lshBands, int) and lshBands > 0)):
+			raise ValueError("BibTeX_Merger lshBands argument must be None or int > 0 not ({} -> {})".format(type(lshBands), lshBands))
+		self._lshBands = lshBands
+
+		if not (isinstance(lshRows, int) and lshRows > 0):
+			raise ValueError("BibTeX_Merger lshRows argument must be int > 0 not ({} -> {})".format(type(lshRows), lshRows))
+		self._lshRows = lshRows
+
+		# LSH buckets of more than lshMaxBucketSize titles are not paired up
+		# If lshMaxBucketSize is None then every bucket is paired up
+		if not (lshMaxBucketSize == None or (isinstance(lshMaxBucketSize, int) and lshMaxBucketSize > 1)):
+			raise ValueError("BibTeX_Merger lshMaxBucketSize argument must be None or int > 1 not ({} -> {})".format(type(lshMaxBucketSize), lshMaxBucketSize))
+		self._lshMaxBucketSize = lshMaxBucketSize
+
+		# TF-IDF (character n-grams of tfidfFields) top-k nearest neighbours,
+		# computed tfidfChunk entries at a time, as yet another source of pairs
+		# If tfidfK is None (default) then no neighbour comparison is done
+		if not (tfidfK == None or (isinstance(tfidfK, int) and tfidfK > 0)):
+			raise ValueError("BibTeX_Merger tfidfK argument must be None or int > 0 not ({} -> {})".format(type(tfidfK), tfidfK))
+		self._tfidfK = tfidfK
+
+		if not (isinstance(tfidfChunk, int) and tfidfChunk > 0):
+			raise ValueError("BibTeX_Merger tfidfChunk argument must be int > 0 not ({} -> {})".format(type(tfidfChunk), tfidfChunk))
+		self._tfidfChunk = tfidfChunk
+
+		if not (isinstance(tfidfFields, list) and len(tfidfFields) > 0 and all(isinstance(f, str) for f in tfidfFields)):
+			raise ValueError("BibTeX_Merger tfidfFields argument must be a non-empty list of str not ({} -> {})".format(type(tfidfFields), tfidfFields))
+		self._tfidfFields = list(tfidfFields)
+
+		# n-grams found in more than this fraction of the texts are dropped
+		if not ((isinstance(tfidfMaxDF, int) or isinstance(tfidfMaxDF, float)) and 0 < tfidfMaxDF <= 1):
+			raise ValueError("BibTeX_Merger tfidfMaxDF argument must be int|float in (0, 1] not ({} -> {})".format(type(tfidfMaxDF), tfidfMaxDF))
+		self._tfidfMaxDF = tfidfMaxDF
+
+		# Group the byte/normalized identical entries and those sharing an
+		# identifier (doi, isbn, eprint, url) right after Import, keeping only
+		# one of each group in the fuzzy comparisons
+		# If exactMatch is False (default) then every entry is compared
+		if not isinstance(exactMatch, bool):
+			raise ValueError("BibTeX_Merger exactMatch argument must be a bool not ({} -> {})".format(type(exactMatch), exactMatch))
+		self._exactMatch = exactMatch
+
+		# Bags larger than maxBagSize are split further by the splitting
+		# strategies, in order, until they fit (or the strategies run out)
+		# If set to None (default) then bags are never split
+		if not (maxBagSize == None or (isinstance(maxBagSize, int) and maxBagSize > 1)):
+			raise ValueError("BibTeX_Merger maxBagSize argument must be None or int > 1 not ({} -> {})".format(type(maxBagSize), maxBagSize))
+		self._maxBagSize = maxBagSize
+
+		if not (isinstance(splitting, list) and all(isinstance(b, BlockingStrategy) or (isinstance(b, str) and b in strategies) for b in splitting)):
+			raise ValueError("BibTeX_Merger splitting argument must be a list of BlockingStrategy|{} not ({} -> {})".format("|".join(sorted(strategies)), type(splitting), splitting))
+		self._splitting = [strategies[b]() if isinstance(b, str) else b for b in splitting]
+
+		# JSON file that Bagging writes its blocking cost report to
+		# If set to None (default) then the report is not written and the
+		# (costly) deduplicated pair counts of every stage are skipped
+		if not (reportFile == None or isinstance(reportFile, str)):
+			raise ValueError("BibTeX_Merger reportFile argument must be None or a str not ({} -> {})".format(type(reportFile), reportFile))
+		self._reportFile = reportFile
+
+		# Blocking strategies for the entries without authors, whose bags are
+		# deep compared right away (there are no authors to shallow compare)
+		# If set to None (default) then the entries without authors are ignored
+		if not (noAuthorBlocking == None or (isinstance(noAuthorBlocking, list) and all(isinstance(b, BlockingStrategy) or (isinstance(b, str) and b in strategies) for b in noAuthorBlocking))):
+			raise ValueError("BibTeX_Merger noAuthorBlocking argument must be None or a list of BlockingStrategy|{} not ({} -> {})".format("|".join(sorted(strategies)), type(noAuthorBlocking), noAuthorBlocking))
+		self._noAuthorBlocking = None if noAuthorBlocking == None else [strategies[b]() if isinstance(b, str) else b for b in noAuthorBlocking]
+
+		# Pipelined run: every file is bagged and compared (against the entries
+		# of the files before it) as soon as it is imported, while the next
+		# prefetch files are parsed in the background
+		# If set to False (default) then every stage runs over all of the files
+		if not isinstance(pipeline, bool):
+			raise ValueError("BibTeX_Merger pipeline argument must be a bool not ({} -> {})".format(type(pipeline), pipeline))
+
+		# the pipeline splits a bag once it outgrows maxBagSize by the entries
+		# seen so far, which depends on the order the files come in, hence it
+		# could compare other pairs than a run over all of the files
+		if pipeline and maxBagSize != None:
+			raise ValueError("BibTeX_Merger pipeline argument cannot be True with a maxBagSize ({})".format(maxBagSize))
+		self._pipeline = pipeline
+
+		if not (isinstance(prefetch, int) and prefetch > 0):
+			raise ValueError("BibTeX_Merger prefetch argument must be int > 0 not ({} -> {})".format(type(prefetch), prefetch))
+		self._prefetch = prefetch
+
+		# Number of worker processes that shallow compare the candidate pairs,
+		# in chunks of about compareChunk pairs
+		# If set to 1 (default) then the pairs are compared serially
+		if not (isinstance(compareWorkers, int) and compareWorkers >= 1):
+			raise ValueError("BibTeX_Merger compareWorkers argument must be int >= 1 not ({} -> {})".format(type(compareWorkers), compareWorkers))
+		self._compareWorkers = compareWorkers
+
+		if not (isinstance(compareChunk, int) and compareChunk > 0):
+			raise ValueError("BibTeX_Merger compareChunk argument must be int > 0 not ({} -> {})".format(type(compareChunk), compareChunk))
+		self._compareChunk = compareChunk
+
+		# Number of worker processes that deep compare (field by field) the
+		# pairs passing the shallow compare, sized apart from compareWorkers
+		# If set to 1 (default) then the pairs are deep compared serially
+		if not (isinstance(deepWorkers, int) and deepWorkers >= 1):
+			raise ValueError("BibTeX_Merger deepWorkers argument must be int >= 1 not ({} -> {})".format(type(deepWorkers), deepWorkers))
+		self._deepWorkers = deepWorkers
+
+		# Number of chunks (or batches of deep pairs) in flight per worker,
+		# beyond which the shallow or deep stage waits for its oldest one
+		if not (isinstance(compareQueue, int) and compareQueue > 0):
+			raise ValueError("BibTeX_Merger compareQueue argument must be int > 0 not ({} -> {})".format(type(compareQueue), compareQueue))
+		self._compareQueue = compareQueue
+
+		# Abandon a shallow comparison as soon as the remaining authors can no
+		# longer lift it to shallowDeepCompDiv (same deep comparisons, fewer
+		# author comparisons)
+		# If set to False (default) then every author position is compared
+		if not isinstance(shallowBound, bool):
+			raise ValueError("BibTeX_Merger shallowBound argument must be a bool not ({} -> {})".format(type(shallowBound), shallowBound))
+		self._shallowBound = shallowBound
+
+		# The shallow scores (editDistance * phonDistance, in 0..4) are counted
+		# in a histogram of scoreBins bins, and the scoreExamples pairs closest
+		# to shallowDeepCompDiv are kept as examples
+		if not (isinstance(scoreBins, int) and scoreBins > 0):
+			raise ValueError("BibTeX_Merger scoreBins argument must be int > 0 not ({} -> {})".format(type(scoreBins), scoreBins))
+		self._scoreBins = scoreBins
+
+		if not (isinstance(scoreExamples, int) and scoreExamples >= 0):
+			raise ValueError("BibTeX_Merger scoreExamples argument must be int >= 0 not ({} -> {})".format(type(scoreExamples), scoreExamples))
+		self._scoreExamples = scoreExamples
+
+		# JSON file that ShallowCompare writes the score report to
+		# If set to None (default) then the report is not written
+		if not (scoreReportFile == None or isinstance(scoreReportFile, str)):
+			raise ValueError("BibTeX_Merger scoreReportFile argument must be None or a str not ({} -> {})".format(type(scoreReportFile), scoreReportFile))
+		self._scoreReportFile = scoreReportFile
+
+		# Maximum size (in bytes) of the parsed file cache kept in installDir
+		# If set to None (default) then no cache is used and every file is parsed
+		if not (cacheSize == None or (isinstance(cacheSize, int) and cacheSize >= 0)):
+			raise ValueError("BibTeX_Merger cacheSize argument must be None or int >= 0 not ({} -> {})".format(type(cacheSize), cacheSize))
+		if cacheSize == None:
+			self._parseCache = None
+		else:
+			# entries are cached after customization, hence the cache is invalidated
+			# whenever the customizations (or the parser) change
+			from bibtex_merger.formats import customizations, bibVersion
+			salt = fingerprint(self.__customizations__, customizations, bibVersion())
+			self._parseCache = ParseCache(os.path.join(self.installDir, "cache"), salt=salt, maxSize=cacheSize)
+
 		self.__run__()
 
 		return
@@ -102,40 +495,126 @@ class BibTeX_Merger(Core):
 	def doLearning(self):
 		return self._doLearning
 
+	@property
+	def numWorkers(self):
+		return self._numWorkers
+
+	@property
+	def streamBudget(self):
+		return self._streamBudget
+
+	@property
+	def chunkSize(self):
+		return self._chunkSize
+
+	@property
+	def parseCache(self):
+		return self._parseCache
+
+	@property
+	def nameCache(self):
+		return self._nameCache
+
+	@property
+	def blocking(self):
+		return self._blocking
+
+	@property
+	def lshBands(self):
+		return self._lshBands
+
+	@property
+	def lshRows(self):
+		return self._lshRows
+
+	@property
+	def lshMaxBucketSize(self):
+		return self._lshMaxBucketSize
+
+	@property
+	def tfidfK(self):
+		return self._tfidfK
+
+	@property
+	def tfidfChunk(self):
+		return self._tfidfChunk
+
+	@property
+	def tfidfFields(self):
+		return self._tfidfFields
+
+	@property
+	def tfidfMaxDF(self):
+		return self._tfidfMaxDF
+
+	@property
+	def exactMatch(self):
+		return self._exactMatch
+
+	@property
+	def maxBagSize(self):
+		return self._maxBagSize
+
+	@property
+	def splitting(self):
+		return self._splitting
+
+	@property
+	def reportFile(self):
+		return self._reportFile
+
+	@property
+	def noAuthorBlocking(self):
+		return self._noAuthorBlocking
+
+	@property
+	def pipeline(self):
+		return self._pipeline
+
+	@property
+	def prefetch(self):
+		return self._prefetch
+
+	@property
+	def compareWorkers(self):
+		return self._compareWorkers
+
+	@property
+	def compareChunk(self):
+		return self._compareChunk
+
+	@property
+	def deepWorkers(self):
+		return self._deepWorkers
+
+	@property
+	def compareQueue(self):
+		return self._compareQueue
+
+	@property
+	def shallowBound(self):
+		return self._shallowBound
+
+	@property
+	def scoreBins(self):
+		return self._scoreBins
+
+	@property
+	def scoreExamples(self):
+		return self._scoreExamples
+
+	@property
+	def scoreReportFile(self):
+		return self._scoreReportFile
+
 	def __initExtensions__(self):
-		def bibRead(filename):
-			with open(filename, 'r') as f:
-				try:
-					return bp.load(f, parser=self.parser)
-				except ValueError:
-					raise MergerError("This file ({}) has formatting errors and could not be parsed. Skipping.".format(filename))
-				
-		bibExt = Extension(ext=r'bib', reader=bibRead)
-
-		def csvRead(filename):
-			with open(filename) as f:
-				return [e for e in csv.reader(f)]
-
-		def csvWrite(filename, content):
-			if content != None:
-				if isinstance(content, list):
-					if len(content) > 0:
-						with open(filename, 'wb') as f:
-							filecontent = csv.writer(f)
-							if isinstance(content[0], list):
-								# Matrix, List of lists
-								filecontent.writerows(content)
-							else:
-								# Vector, List
-								filecontent.writerow(content)
-							return
-					raise MergerError("CSV content is empty, nothing to write")
-				raise MergerError("CSV content is not of matrix or vector format")
-			raise MergerError("CSV content is None, write failed")
-				
-		csvExt = Extension(ext=r'csv', reader=csvRead, writer=csvWrite)
-
-		return [bibExt, csvExt]
+		bibExt = Extension(ext=r'bib', reader='bibtex_merger.formats:bibRead', writer='bibtex_merger.formats:bibWrite')
+
+		csvExt = Extension(ext=r'csv', reader='bibtex_merger.formats:csvRead', writer='bibtex_merger.formats:csvWrite')
+
+		jsonExt = Extension(ext=r'json', reader='bibtex_merger.formats:jsonRead', writer='bibtex_merger.formats:jsonWrite')
+
+		return [bibExt, csvExt, jsonExt]
 
 	def __initConstants__(self):
 		self.doLearnings = ['off', 'remakeData', 'remakeModel']
@@ -144,16 +623,17 @@ class BibTeX_Merger(Core):
 		self.learningModels = ['fminunc', 'glmfit']
 		self.learningModels = dict((v,k) for k, v in enumerate(self.learningModels))
 
-		self.parser = bp.bparser.BibTexParser()
-		self.parser.customization = self.__customizations__
-
 		self.id = "ID"
+		self.entryType = "ENTRYTYPE"
 		self.author = "author"
 		self.title = "title"
 		self.key = "key"
 
 		self.label = "label"
 
+		self.lenSoundex = 10
+		self.soundex = fz.Soundex(self.lenSoundex)
+
 		self.mapToUnderscore = ''.join(chr(c) if chr(c).isupper() or chr(c).islower() or chr(c).isdigit() else '_' for c in range(256))
 
 		# Static vars
@@ -231,33 +711,149 @@ class BibTeX_Merger(Core):
 		return
 
 	def __run__(self):
-		self.Import()
-		self.Bagging()
-		self.ShallowCompare()
+		if self.pipeline:
+			self.Pipeline()
+		else:
+			self.Import()
+			self.ExactMatch()
+			self.Normalize()
+			self.Bagging()
+			self.ShallowCompare()
+			if self.noAuthorBlocking != None:
+				self.NoAuthorCompare()
+		if self.lshBands != None:
+			self.TitleCompare()
+		if self.tfidfK != None:
+			self.NeighbourCompare()
 
 		# if self.doLearning != self.doLearnings['off']:
 		# 	self.Learner()
 
 		return
 
+	def Pipeline(self):
+		"""
+		Import, ExactMatch, Normalize, Bagging, ShallowCompare and
+		NoAuthorCompare one file at a time.
+
+		Once a file is imported its entries are looked up among the exact
+		duplicates and put in the bags (see __exactMatch__ and __bagging__)
+		and only the candidate pairs with an entry of that file are compared,
+		so every pair is compared once (in the round its later entry came
+		in) and the first duplicates are found right after the first file.
+		A round only goes through the new entries and the bags they land
+		in, the counts of the pairs are kept as the pairs are compared.
+		Meanwhile the following files are parsed by a background thread
+		(see __prefetch__).
+		"""
+		self.__title__("Pipeline")
+
+		importFiles, importPaths = self.__importInit__()
+
+		self.exactIndex = ExactIndex(idField=self.id, typeField=self.entryType)
+		self.exactRedundant = numpy.zeros(0, dtype=bool)
+		self.authorTable = AuthorTable(self.soundex)
+		self.authorIDs = []
+		self.__baggingInit__()
+		self.__compareInit__()
+
+		def counted(pairs):
+			for lenID, alphaID, entry1, partners in pairs:
+				self.maxCompares += len(partners)
+				yield lenID, alphaID, entry1, partners
+
+		for filename, temp_db in zip(importFiles, self.__prefetch__(importPaths)):
+			first = len(self.store)
+			self.__importFile__(filename, temp_db)
+
+			self.__exactMatch__(first)
+			self.__normalize__(first)
+			units, keys = self.__bagging__(first)
+
+			self.__shallowCompare__(counted(self.__candidatePairs__(first, units)))
+			if self.noAuthorBlocking != None:
+				self.noAuthorCompares += self.__noAuthorCompare__(first, keys)[1]
+
+		self.workUnits = sorted(((lenID, alphaID) for lenID, d in self.bag.iteritems() for alphaID in d), key=lambda u: -len(self.bag[u[0]][u[1]]))
+
+		self.__exactReport__()
+		self.__baggingReport__()
+		self.__compareReport__()
+
+		return
+
+	def __prefetch__(self, filenames):
+		"""
+		Generator yielding the list of the parsed entries of each file, in
+		order, as __parseFiles__ does, but parsing up to prefetch files ahead
+		in a background thread.
+
+		Every file is parsed by a parser of its own (see formats.bibLoad) and
+		only its list of entries crosses over, so the consumer never sees
+		anything that the producer still works on. The thread shares the GIL with the
+		comparisons, hence with numWorkers = 1 the parsing (pure Python)
+		barely overlaps with them; with numWorkers > 1 the files are parsed
+		by worker processes (see __parse__) and the thread mostly waits.
+		"""
+		from bibtex_merger.formats import bibEntries
+
+		parsed = queue.Queue(maxsize=self.prefetch)
+
+		def produce():
+			try:
+				for temp_db in self.__parseFiles__(filenames):
+					# streamed entries are read here, not by the consumer
+					parsed.put((bibEntries(temp_db), None))
+			except Exception as e:
+				parsed.put((None, e))
+
+		# a daemon thread, s.t. an abandoned producer never holds up the exit
+		producer = threading.Thread(target=produce)
+		producer.daemon = True
+		producer.start()
+
+		for filename in filenames:
+			temp_db, error = parsed.get()
+			if error != None:
+				raise error
+			yield temp_db
+
+		producer.join()
+
+		return
+
 	def __customizations__(self, record):
-		# This is a formating specification of the BibtexParser package
-		# see https://bibtexparser.readthedocs.org/en/latest/bibtexparser.html#module-customization
+		from bibtex_merger.formats import customizations
 
-		# record = bp.customization.homogenize_latex_encoding(record)
+		return customizations(record)
 
-		record = bp.customization.type(record)
-		record = bp.customization.author(record)
-		# record = bp.customization.editor(record)
-		# record = bp.customization.journal(record)
-		# record = bp.customization.keyword(record)
-		# record = bp.customization.page_double_hyphen(record)
-		
-		return record
+	def __customized__(self):
+		"""
+		Whether __customizations__ is overridden (by a subclass).
+		"""
+		method = type(self).__customizations__
+		return getattr(method, "__func__", method) is not BibTeX_Merger.__dict__["__customizations__"]
 
 	def Import(self):
 		self.__title__("Import")
 
+		importFiles, importPaths = self.__importInit__()
+
+		for filename, temp_db in zip(importFiles, self.__parseFiles__(importPaths)):
+			self.__importFile__(filename, temp_db)
+
+		# nothing is known to be a duplicate until ExactMatch
+		self.exactGroups	= []
+		self.exactRedundant	= numpy.zeros(len(self.store), dtype=bool)
+		self.exactCompares	= 0
+
+		return
+
+	def __importInit__(self):
+		"""
+		Reset the store and pick the files to import, returning the list of
+		their filenames and the list of their paths.
+		"""
 		importDirFiles = [f for f in os.listdir(self.importDir) if os.path.isfile(os.path.join(self.importDir, f)) and os.path.splitext(f)[1] == ".bib"]
 
 		maxNumFiles = len(importDirFiles)
@@ -267,78 +863,404 @@ class BibTeX_Merger(Core):
 		# determine whether we are only reading in the first subset or whether we are reading in the maximum
 		self._numFiles = maxNumFiles if self.numFiles < 0 else min(self.numFiles, maxNumFiles)
 
-		# self.db = None
-		self.db = bp.bibdatabase.BibDatabase()
+		# entries are kept column-wise, an entry's row number is its internal id
+		self.store = EntryStore()
 
-		lengths = []
+		importFiles = importDirFiles[0:self.numFiles]
+		importPaths = ["{}/{}".format(self.importDir, filename) for filename in importFiles]
 
 		self.tags = []
-		for filename in importDirFiles[0:self.numFiles]:
-			self.__subtitle__("Importing '{}'".format(filename))
 
-			# pull out the filename w/o the extension
-			# map any non-alpha-numeric to '_'
-			baseFilename = filename[:filename.index(".")]
-			baseFilename = baseFilename.translate(self.mapToUnderscore)
+		return importFiles, importPaths
+
+	def __importFile__(self, filename, temp_db):
+		"""
+		Tag the ids of the parsed entries of filename and append them to the
+		store, returning the number of entries.
+		"""
+		self.__subtitle__("Importing '{}'".format(filename))
+
+		# pull out the filename w/o the extension
+		# map any non-alpha-numeric to '_'
+		baseFilename = filename[:filename.index(".")]
+		baseFilename = baseFilename.translate(self.mapToUnderscore)
 
-			# find a unique tag (this should rarely occur)
+		# find a unique tag (this should rarely occur)
 
-			while baseFilename in self.tags:
-				baseFilename += "_"
+		while baseFilename in self.tags:
+			baseFilename += "_"
 
-			# import the specified file and parse
-			temp_db = self.__read__("{}/{}".format(self.importDir, filename))
+		# the bib reader either hands back a whole BibDatabase or streams the entries
+		if hasattr(temp_db, 'entries'):
+			temp_entries = temp_db.entries
+		else:
+			temp_entries = temp_db
+
+		# append all ids in the entries dictionary with this file's unique tag
+		# s.t. all resulting ids are entirely unique w/r to all of the imported files
+		# and merge them into the master self.store as they come in
+		numEntries = 0
+		for e in temp_entries:
+
+			# is virtually impossible since we are reading in via the bib extension module
+			# if self.id not in e.keys():
+			# 	raise MergerError("'{}' key not in this entry ({})".format(self.id, e.keys()))
+
+			e[self.id] = "{}_{}".format(baseFilename, e[self.id])
+
+			self.store.append(e)
+			numEntries += 1
+
+		# append all ids in the string dictionary with this file's unique tag
+		# s.t. all resulting ids are entirely unique w/r to all of the imported files
+		# temp_strings = OrderedDict()
+		# for k, v in temp_db.strings.iteritems():
+		# 	newID = "{}_{}".format(baseFilename, k)
+		# 	temp_strings[newID] = v
+		# temp_db.strings = temp_strings
+
+		self.tags += [baseFilename]
+
+		# the comments, preambles and strings of temp_db are not merged
 
-			# append all ids in the entries dictionary with this file's unique tag
-			# s.t. all resulting ids are entirely unique w/r to all of the imported files
-			for i, e in enumerate(temp_db.entries):
+		return numEntries
 
-				# is virtually impossible since we are reading in via the bib extension module
-				# if self.id not in e.keys():
-				# 	raise MergerError("'{}' key not in this entry ({})".format(self.id, e.keys()))
+	def __parseFiles__(self, filenames):
+		"""
+		Generator yielding the parsed entries of each file, in order.
 
-				e[self.id] = "{}_{}".format(baseFilename, e[self.id])
+		Files found unchanged in the parse cache are not parsed again. The
+		remaining files are parsed by __parse__ and stored in the cache.
+		"""
+		if self.parseCache == None:
+			for db in self.__parse__(filenames):
+				yield db
+			return
 
-			# append all ids in the string dictionary with this file's unique tag
-			# s.t. all resulting ids are entirely unique w/r to all of the imported files
-			# temp_strings = OrderedDict()
-			# for k, v in temp_db.strings.iteritems():
-			# 	newID = "{}_{}".format(baseFilename, k)
-			# 	temp_strings[newID] = v
-			# temp_db.strings = temp_strings
+		cached = [self.parseCache.get(filename) for filename in filenames]
+		parsed = self.__parse__([filename for filename, entries in zip(filenames, cached) if entries == None])
 
-			self.tags += [baseFilename]
-				
-			# merge the following from the current temp_dic to the master self.db
-			self.db.entries += temp_db.entries
-			# self.db.comments += temp_db.comments
-			# self.db.preambles += temp_db.preambles
-			# self.db.strings.update(temp_db.strings)
+		for filename, entries in zip(filenames, cached):
+			if entries != None:
+				yield entries
+			else:
+				yield self.__cachePut__(filename, next(parsed))
+
+	def __cachePut__(self, filename, db):
+		if hasattr(db, 'entries'):
+			self.parseCache.put(filename, db.entries)
+			return db
+
+		if isinstance(db, list):
+			self.parseCache.put(filename, db)
+			return db
+
+		# streamed entries are only cached once the whole file has been read,
+		# copies are kept since Import tags the ids of the handed out entries
+		def stream():
+			entries = []
+			for e in db:
+				entries.append(dict(e))
+				yield e
+			self.parseCache.put(filename, entries)
+
+		return stream()
+
+	def __parse__(self, filenames):
+		"""
+		Generator yielding the parsed entries of each file, in order.
+
+		With numWorkers > 1 the files are parsed across a pool of worker
+		processes. With chunkSize set, files larger than chunkSize are also
+		split (see reader.chunkRanges) so that a single huge file is parsed by
+		several workers. imap hands the results back in order, and the ranges
+		are stitched back together per file, so the merged database (and hence
+		the unique ID tags) is identical regardless of the number of workers.
+
+		The workers only apply the module level customizations, hence a
+		merger whose __customizations__ is overridden always parses serially.
+		"""
+		serial = self.numWorkers <= 1 or (len(filenames) <= 1 and self.chunkSize == None)
+		if not serial and self.__customized__():
+			logger.warning("BibTeX_Merger parsing serially, the overridden __customizations__ cannot be handed to the worker processes")
+			serial = True
+
+		if serial:
+			for filename in filenames:
+				yield self.__parseFile__(filename)
+			return
+
+		from bibtex_merger.formats import bibLoadRange
+
+		tasks	= []
+		counts	= []
+		for filename in filenames:
+			if self.chunkSize != None and os.path.getsize(filename) > self.chunkSize:
+				ranges = chunkRanges(filename, self.chunkSize)
+				tasks += [(filename, start, end, strings) for start, end, strings in ranges]
+				counts.append(len(ranges))
+			else:
+				tasks.append((filename, None, None, None))
+				counts.append(1)
 
-			lengths.append(len(temp_db.entries))
+		pool = multiprocessing.Pool(processes=min(self.numWorkers, len(tasks)))
+		try:
+			results = pool.imap(bibLoadRange, tasks)
+			for count in counts:
+				entries = []
+				for i in xrange(count):
+					entries += next(results)
+				yield entries
+		finally:
+			pool.terminate()
+			pool.join()
+
+	def __parseFile__(self, filename):
+		"""
+		Parse a single .bib file, customized by __customizations__ (unlike
+		the registered .bib reader, which always uses the module level
+		customizations): with a streamBudget into a generator of its entries,
+		otherwise into a whole BibDatabase.
+		"""
+		from bibtex_merger.formats import bibLoad, bibStream
+
+		if self.streamBudget != None:
+			return bibStream(filename, budget=self.streamBudget, customization=self.__customizations__)
+		return bibLoad(filename, customization=self.__customizations__)
+
+	def ExactMatch(self):
+		self.__title__("Exact Match")
+
+		self.exactIndex		= ExactIndex(idField=self.id, typeField=self.entryType)
+		self.exactRedundant	= numpy.zeros(0, dtype=bool)
+		self.__exactMatch__(0)
+
+		self.__exactReport__()
+
+		return
+
+	def __exactMatch__(self, first):
+		"""
+		Look up the rows first onwards among the earlier rows (see
+		ExactIndex), marking the rows that only repeat an earlier row of
+		their group as redundant, these are left out of every fuzzy
+		comparison.
+		"""
+		self.exactRedundant = numpy.concatenate((self.exactRedundant, numpy.zeros(len(self.store) - first, dtype=bool)))
+
+		if not self.exactMatch:
+			return
+
+		for group in self.exactIndex.extend(self.store):
+			for e in group[1:]:
+				# a row stays redundant once it is, report it only the first time
+				if self.exactRedundant[e]:
+					continue
+				self.exactRedundant[e] = True
+
+				if self.doLearning == self.doLearnings['off']:
+					self.OUT.write("duplicates: {} {}\n".format(self.store.get(group[0], self.id), self.store.get(e, self.id)))
+
+		return
+
+	def __exactReport__(self):
+		# every pair within a group is settled without being compared
+		self.exactGroups	= self.exactIndex.groups() if self.exactMatch else []
+		self.exactCompares	= self.exactIndex.pairs if self.exactMatch else 0
+
+		self.__info__("""exact & identifier matches
+# groups:                 {:10d}
+# entries dropped:        {:10d}
+# comparisons saved:      {:10d}
+""".format(
+	len(self.exactGroups),
+	int(self.exactRedundant.sum()),
+	self.exactCompares))
+
+		return
+
+	def Normalize(self):
+		self.__title__("Normalize")
+
+		# intern every distinct author name once, precomputing everything
+		# ShallowCompare needs to know about it
+		self.authorTable = AuthorTable(self.soundex)
+
+		# the author ids of every entry, by row (None for non-author entries)
+		self.authorIDs = []
+		self.__normalize__(0)
+
+		self.__info__("""normalized
+# authors:        {:10d}
+# unique authors: {:10d}
+""".format(
+	sum(len(a) for a in self.authorIDs if a != None),
+	len(self.authorTable)))
+
+		return
+
+	def __normalize__(self, first):
+		"""
+		Extend authorIDs by the author ids of the rows first onwards.
+		"""
+		self.authorIDs += [None if a == None else self.authorTable.ids(a) for a in self.store.column(self.author)[first:]]
 
 		return
 
 	def Bagging(self):
 		self.__title__("Bagging")
 
+		self.__baggingInit__()
+
+		# the work units of ShallowCompare, largest (most pairs) first s.t. the
+		# biggest bag is not left to the end
+		self.workUnits, keys = self.__bagging__(0)
+
+		# overlapping bags (the "others" entries) repeat pairs, count the
+		# unique candidate pairs that ShallowCompare will actually compare
+		self.maxCompares		= sum([len(partners) for l, a, e, partners in self.__candidatePairs__()])
+		self.noAuthorCompares	= sum(len(partners) for b, e, partners in self.__uniquePairs__([self.noAuthorBag[key] for key in keys]))
+
+		self.__baggingReport__()
+
+		return
+
+	def __baggingInit__(self):
+		"""
+		Reset the bags, see __bagging__.
+		"""
+		self.blockingChain	= BlockingChain(self.blocking)
+		self.noAuthorChain	= BlockingChain(self.noAuthorBlocking if self.noAuthorBlocking != None else [])
+
+		self.static_authors	= self.__rows__([])
+		self.etal_authors	= self.__rows__([])
+		self.no_authors		= self.__rows__([])
+
+		# the bags, and the keys of the bags that every block of the last
+		# blocking stage was split into
+		self.bag			= {}
+		self.bagSplits		= {}
+		self.noAuthorBag	= {}
+		self.noAuthorSplits	= {}
+		self.splitSeconds	= 0.0
+
+		self.workUnits			= []
+		self.bagCompares		= 0
+		self.maxCompares		= 0
+		self.noAuthorCompares	= 0
+
+		return
+
+	def __bagging__(self, first):
+		"""
+		Bag the rows first onwards (but the exact duplicates), returning the
+		work units (lenID, alphaID) of the author bags and the keys of the
+		no-author bags that changed, both largest first.
+
+		Only the new rows are placed by the blocking strategies (see
+		BlockingChain) and only the blocks that changed are split again, so
+		a round costs about as much as the rows and the blocks it touches.
+		Rows are never taken out of the bags, a row that only turns out to
+		be an exact duplicate once it is bagged stays in.
+		"""
 		# Bagging based on initials
-		
+		# all bags hold the row numbers (in self.store) of their entries
+		authors = self.store.column(self.author)[first:]
+
+		# exact duplicates were already settled by ExactMatch
+		redundant = self.exactRedundant[first:]
+
 		# pull out author entires
-		self.static_authors	= [e for e in self.db.entries if self.author     in e.keys() and not (e[self.author][-1][-1] == "others")]
-		self.etal_authors	= [e for e in self.db.entries if self.author     in e.keys() and     (e[self.author][-1][-1] == "others")]
+		static_authors	= self.__rows__(first + i for i, a in enumerate(authors) if a != None and not redundant[i] and not (a[-1][-1] == "others"))
+		etal_authors	= self.__rows__(first + i for i, a in enumerate(authors) if a != None and not redundant[i] and     (a[-1][-1] == "others"))
 
 		# pull out non-author entries
-		self.no_authors		= [e for e in self.db.entries if self.author not in e.keys()]
+		no_authors		= self.__rows__(first + i for i, a in enumerate(authors) if a == None and not redundant[i])
+
+		self.static_authors	= numpy.concatenate((self.static_authors, static_authors))
+		self.etal_authors	= numpy.concatenate((self.etal_authors, etal_authors))
+		self.no_authors		= numpy.concatenate((self.no_authors, no_authors))
+
+		# split the author entries by every blocking strategy in turn, each one
+		# splitting the blocks of the previous one
+		changed, removed = self.blockingChain.insert(self.store, [int(e) for e in sorted(numpy.concatenate((static_authors, etal_authors)))])
+
+		for key in removed.union(changed):
+			for split in self.bagSplits.pop(key, []):
+				lenID, alphaID = self.__bagKey__(split)
+				self.bagCompares -= comb2(len(self.bag[lenID].pop(alphaID)))
+				if not self.bag[lenID]:
+					del self.bag[lenID]
+
+		start = timer()
+		units = []
+		for key, rows in changed.iteritems():
+			blocks = self.__split__({key: rows}) if self.maxBagSize != None else {key: rows}
+			self.bagSplits[key] = list(blocks)
+
+			for split, rows in blocks.iteritems():
+				lenID, alphaID = self.__bagKey__(split)
+				self.bag.setdefault(lenID, {})[alphaID] = self.__rows__(rows)
+				self.bagCompares += comb2(len(rows))
+				units.append((lenID, alphaID))
+		self.splitSeconds += timer() - start
+
+		keys = []
+		if self.noAuthorBlocking != None:
+			changed, removed = self.noAuthorChain.insert(self.store, [int(e) for e in no_authors])
+
+			for key in removed.union(changed):
+				for split in self.noAuthorSplits.pop(key, []):
+					del self.noAuthorBag[split]
+
+			# bags larger than maxBagSize are cut into sorted neighbourhood
+			# windows over the title s.t. every candidate set stays bounded
+			for key, rows in changed.iteritems():
+				if self.maxBagSize != None and len(rows) > self.maxBagSize:
+					window = SortedNeighbourhood(window=self.maxBagSize, field=self.title)
+					blocks = dict((key + (k,), r) for k, r in window.blocks(self.store, rows).iteritems())
+				else:
+					blocks = {key: rows}
+				self.noAuthorSplits[key] = list(blocks)
+
+				for split, rows in blocks.iteritems():
+					self.noAuthorBag[split] = self.__rows__(rows)
+					keys.append(split)
+
+		units.sort(key=lambda u: -len(self.bag[u[0]][u[1]]))
+		keys.sort(key=lambda k: -len(self.noAuthorBag[k]))
+
+		return units, keys
+
+	def __bagKey__(self, key):
+		"""
+		The (lenID, alphaID) of the bag of a block: two levels of bags, by the
+		first strategy's key, then by the others'.
+		"""
+		if len(key) < 2:
+			alphaID = ""
+		elif len(key) == 2:
+			alphaID = key[1]
+		else:
+			alphaID = key[1:]
 
+		return key[0] if key else None, alphaID
+
+	def __baggingReport__(self):
+		"""
+		Report the bags, and the costs of every stage of Bagging in
+		blockingReport (see __stageReport__), writing it to reportFile.
+		"""
 		self.__info__("""initial
 static_authors: {:10d}
 etal_authors:   {:10d}
-no_author:      {:10d} (these are ignored)
+no_author:      {:10d} ({})
+exact_dups:     {:10d} (these are merged)
 """.format(
 	len(self.static_authors),
 	len(self.etal_authors),
-	len(self.no_authors)))
+	len(self.no_authors),	"these are ignored" if self.noAuthorBlocking == None else "these are bagged apart",
+	int(self.exactRedundant.sum())))
 
 		best_case	= len(self.static_authors) + len(self.etal_authors)
 		worst_case	= best_case
@@ -347,89 +1269,280 @@ no_author:      {:10d} (these are ignored)
 best_case  | {:10d} | {:10d}
 worst_case | {:10d} | {:10d}
 """.format(
-	best_case,	int(ch.comb(best_case,	2)),
-	worst_case,	int(ch.comb(worst_case,	2))))
+	best_case,	comb2(best_case),
+	worst_case,	comb2(worst_case)))
+
+		# the blocks of every blocking strategy in turn, each one splitting the
+		# blocks of the previous one
+		self.blockingCompares = []
+
+		self.blockingReport = {"entries": len(self.blockingChain), "allPairs": comb2(len(self.blockingChain)), "stages": []}
+		self.__stageReport__("none", self.blockingChain.blocks(0), 0.0)
+
+		for s, strategy in enumerate(self.blocking):
+			blocks = self.blockingChain.blocks(s + 1)
+			self.__stageReport__(strategy.name, blocks, self.blockingChain.seconds[s])
+
+			sizes		= [len(e) for k, e in blocks.iteritems()] or [0]
+			best_case	= min(sizes)
+			worst_case	= max(sizes)
+			compares	= sum(comb2(n) for n in sizes)
+			self.blockingCompares.append((strategy.name, compares))
+			self.__info__("""by {} split costs
+           |  # entries | # comparisons
+best_case  | {:10d} | {:10d}
+worst_case | {:10d} | {:10d}
+# candidate pairs:       {:10d}
+""".format(
+	" and ".join(name for name, n in self.blockingCompares),
+	best_case,	comb2(best_case),
+	worst_case,	comb2(worst_case),
+	compares))
+
+		if self.maxBagSize != None:
+			blocks = dict((split, self.bag[lenID][alphaID]) for key, splits in self.bagSplits.iteritems() for split in splits for lenID, alphaID in [self.__bagKey__(split)])
+			self.__stageReport__("split", blocks, self.splitSeconds)
+
+			sizes = [len(e) for k, e in blocks.iteritems()] or [0]
+			self.__info__("""by splitting bags > {} ({}) split costs
+# bags split:            {:10d}
+           |  # entries | # comparisons
+worst_case | {:10d} | {:10d}
+# candidate pairs:       {:10d}
+# bags still too large:  {:10d}
+""".format(
+	self.maxBagSize,
+	" then ".join(s.name for s in self.splitting),
+	sum(1 for key, splits in self.bagSplits.iteritems() if splits != [key]),
+	max(sizes),	comb2(max(sizes)),
+	sum(comb2(n) for n in sizes),
+	sum(1 for n in sizes if n > self.maxBagSize)))
+
+		self.redundantCompares = self.bagCompares - self.maxCompares
+		self.__info__("""candidate pairs
+# pairs in bags:          {:10d}
+# unique pairs:           {:10d}
+# redundant eliminated:   {:10d}
+""".format(
+	self.bagCompares,
+	self.maxCompares,
+	self.redundantCompares))
+
+		# the pairs ShallowCompare is left with
+		allPairs = self.blockingReport["allPairs"]
+		self.blockingReport["uniquePairs"]		= self.maxCompares
+		self.blockingReport["reductionRatio"]	= 1.0 - self.maxCompares / float(allPairs) if allPairs > 0 else 0.0
+		self.blockingReport["seconds"]			= sum(stage["seconds"] for stage in self.blockingReport["stages"])
 
-		self.bag = {}
+		if self.noAuthorBlocking != None:
+			self.__noAuthorReport__()
 
-		# bag entries by number of authors
-		for e in self.static_authors:
-			numAuthors = len(e[self.author])
+		if self.reportFile != None:
+			self.__write__(self.reportFile, self.blockingReport)
+
+		return
+
+	def __noAuthorReport__(self):
+		"""
+		Report the bags of the entries without authors, bagged by the
+		noAuthorBlocking strategies, in blockingReport.
+		"""
+		report = {"entries": len(self.noAuthorChain), "allPairs": comb2(len(self.noAuthorChain)), "stages": []}
+		self.blockingReport["noAuthors"] = report
+		self.__stageReport__("none", self.noAuthorChain.blocks(0), 0.0, report)
+
+		for s, strategy in enumerate(self.noAuthorBlocking):
+			self.__stageReport__(strategy.name, self.noAuthorChain.blocks(s + 1), self.noAuthorChain.seconds[s], report)
+
+		if any(splits != [key] for key, splits in self.noAuthorSplits.iteritems()):
+			self.__stageReport__("split", self.noAuthorBag, 0.0, report)
+
+		allPairs = report["allPairs"]
+		report["uniquePairs"]		= self.noAuthorCompares
+		report["reductionRatio"]	= 1.0 - self.noAuthorCompares / float(allPairs) if allPairs > 0 else 0.0
+		report["seconds"]			= sum(stage["seconds"] for stage in report["stages"])
+
+		sizes = [len(rows) for rows in self.noAuthorBag.itervalues()] or [0]
+		self.__info__("""no_author bags by {}
+# bags:                   {:10d}
+           |  # entries | # comparisons
+worst_case | {:10d} | {:10d}
+# unique pairs:           {:10d}
+""".format(
+	" and ".join(s.name for s in self.noAuthorBlocking),
+	len(self.noAuthorBag),
+	max(sizes),	comb2(max(sizes)),
+	self.noAuthorCompares))
+
+		return
 
-			if numAuthors not in self.bag:
-				self.bag[numAuthors] = [e]
+	def __stageReport__(self, stage, blocks, seconds, report=None):
+		"""
+		Add the costs of the blocks of a stage of Bagging to blockingReport:
+		the bag size histogram (as [size, # bags] pairs), the number of pairs
+		in the bags and the time spent. With a reportFile the deduplicated
+		number of pairs and the reduction ratio (the fraction of all pairs
+		that no longer need comparing) are included as well; the pairs are
+		only deduplicated if some row is in several blocks of the stage.
+
+		The stage is added to report (default blockingReport), a dict with the
+		allPairs of its entries and the list of its stages.
+		"""
+		if report == None:
+			report = self.blockingReport
+
+		histogram = {}
+		for key, rows in blocks.iteritems():
+			histogram[len(rows)] = histogram.get(len(rows), 0) + 1
+
+		costs = {	"stage":		stage,
+					"seconds":		seconds,
+					"bags":			len(blocks),
+					"histogram":	[[size, n] for size, n in sorted(histogram.iteritems())],
+					"pairs":		sum(comb2(size) * n for size, n in histogram.iteritems())	}
+
+		if self.reportFile != None:
+			allPairs = report["allPairs"]
+
+			# without a row in several bags (or twice in one) every pair is
+			# counted once already, only overlapping stages need deduplicating
+			rows = numpy.concatenate([numpy.asarray(entries, dtype=numpy.int64) for entries in blocks.itervalues()] + [numpy.zeros(0, dtype=numpy.int64)])
+			if len(numpy.unique(rows)) == len(rows):
+				uniquePairs = costs["pairs"]
 			else:
-				self.bag[numAuthors].append(e)
+				uniquePairs = sum(len(partners) for i, e, partners in self.__uniquePairs__(list(blocks.itervalues())))
 
-		for e in self.etal_authors:
-			numAuthors = len(e[self.author])
+			costs["uniquePairs"]		= uniquePairs
+			costs["reductionRatio"]	= 1.0 - uniquePairs / float(allPairs) if allPairs > 0 else 0.0
 
-			for k in self.bag.keys():
-				if numAuthors <= k:
-					self.bag[k].append(e)
+		report["stages"].append(costs)
 
-			if numAuthors not in self.bag:
-				self.bag[numAuthors] = [e]
+		return
+
+	def __split__(self, blocks):
+		"""
+		Recursively split the blocks larger than maxBagSize by the splitting
+		strategies, moving on to the next strategy whenever one does not
+		split a block any further.
+		"""
+		split	= {}
+		pending	= [(key, rows, 0) for key, rows in blocks.iteritems()]
+
+		while pending:
+			key, rows, depth = pending.pop()
+
+			if len(rows) <= self.maxBagSize or depth >= len(self.splitting):
+				split[key] = rows
+				continue
+
+			sub = self.splitting[depth].blocks(self.store, rows)
+			if len(sub) > 1:
+				pending += [(key + (k,), r, depth + 1) for k, r in sub.iteritems()]
 			else:
-				self.bag[numAuthors].append(e)
+				# no split by this strategy, try the next one
+				pending.append((key, rows, depth + 1))
+
+		return split
+
+	def __rows__(self, rows):
+		"""
+		Compact int32 array of row numbers.
+		"""
+		return numpy.fromiter(rows, dtype=numpy.int32)
+
+	def __candidatePairs__(self, first=0, units=None):
+		"""
+		Generator of the candidate pairs of the bags, each unordered pair of
+		entries exactly once, as (lenID, alphaID, entry1, partners) with
+		partners the rows to compare entry1 against.
+
+		The bags are gone through in workUnits order (largest first), see
+		__uniquePairs__. With units only the bags of those work units are,
+		which must include every bag with a row >= first.
+		"""
+		if units == None:
+			units = self.workUnits
+
+		for i, entry1, partners in self.__uniquePairs__([self.bag[lenID][alphaID] for lenID, alphaID in units], first):
+			lenID, alphaID = units[i]
+			yield lenID, alphaID, entry1, partners
+
+		return
+
+	def __uniquePairs__(self, bags, first=0):
+		"""
+		Generator of the pairs of a list of bags (of rows), each unordered
+		pair of entries exactly once, as (bag index, entry1, partners).
+
+		A pair is owned by the first bag it is met in. A pair can only be met
+		again if one of its rows appears in several bags (or several times in
+		one bag), so only such pairs go through the seen set. A pair with a
+		row >= first can only be in the bags with such a row, hence bags is
+		free to leave out all other bags.
+
+		With first > 0 only the pairs with at least one row >= first are
+		generated, i.e. those of the rows added since the pairs of the earlier
+		rows were; the bags without any such row are skipped altogether.
+		"""
+		bags = [numpy.asarray(entries, dtype=numpy.int32) for entries in bags]
+
+		# number of times each row appears across all bags
+		numBags = numpy.zeros(len(self.store), dtype=numpy.int32)
+		for entries in bags:
+			numpy.add.at(numBags, entries, 1)
+		shared = numBags > 1
+
+		numRows	= len(self.store)
+		seen	= set()
+
+		for b, entries in enumerate(bags):
+			if first > 0 and not (entries >= first).any():
+				continue
+
+			for e1 in xrange(0, len(entries)):
+				entry1 = int(entries[e1])
+				partners = entries[e1 + 1:]
+
+				if entry1 < first:
+					partners = partners[partners >= first]
+
+				# a pair can only come up again if one of its rows is shared
+				check = shared[partners] | shared[entry1]
+				if check.any():
+					keep = numpy.ones(len(partners), dtype=bool)
+					for i in numpy.flatnonzero(check):
+						entry2 = int(partners[i])
+						pair = min(entry1, entry2) * numRows + max(entry1, entry2)
+
+						if entry1 == entry2 or pair in seen:
+							keep[i] = False
+						else:
+							seen.add(pair)
+					partners = partners[keep]
+
+				yield b, entry1, partners
 
-		best_case	= min([len(e) for i, e in self.bag.iteritems()])
-		worst_case	= max([len(e) for i, e in self.bag.iteritems()])
-		self.__info__("""by # authors split costs
-           |  # entries | # comparisons
-best_case  | {:10d} | {:10d}
-worst_case | {:10d} | {:10d}
-""".format(
-	best_case,	int(ch.comb(best_case,	2)),
-	worst_case,	int(ch.comb(worst_case,	2))))
-
-		# bag entries by alpha keys
-		for num_authors, entries in dict(self.bag).iteritems():
-			alpha_bag = {}
-
-			for e in entries:
-				# generate the alpha key for this entry
-				alpha_key = ""
-				for a in e[self.author]:
-					# alpha key includes initials of all authors EXCEPT "others"
-					if a[-1] != "others":
-						alpha_key += a[0][0].lower()
-						alpha_key += a[1][0].lower()
-
-				# add this entry to all other alpha keys in this alpha bag that has matching alpha keys
-				# this forces all non "others" alpha keys to only be added once
-				# all "others" alpha keys can be included multiple times
-				added = False
-				for key in [key for key in alpha_bag.keys() if key.find(alpha_key) == 0]:
-					added = True
-					alpha_bag[key].append(e)
-
-				# if a key was not added, this means this is the first instance of that key
-				if not added:
-					assert alpha_key not in alpha_bag
-					alpha_bag[alpha_key] = [e]
-
-			self.bag[num_authors] = alpha_bag
-
-		best_case	= min([min([len(e) for a, e in d.iteritems()]) for i, d in self.bag.iteritems()])
-		worst_case	= max([max([len(e) for a, e in d.iteritems()]) for i, d in self.bag.iteritems()])
-		self.__info__("""by # authors and alpha key split costs
-           |  # entries | # comparisons
-best_case  | {:10d} | {:10d}
-worst_case | {:10d} | {:10d}
-""".format(
-	best_case,	int(ch.comb(best_case,	2)),
-	worst_case,	int(ch.comb(worst_case,	2))))
 		return
 
 	def ShallowCompare(self):
 		self.__title__("Shallow Compare")
 
-		lenSoundex = 10
-		soundex = fz.Soundex(lenSoundex)
+		self.__compareInit__()
+
+		# each unordered pair of entries is compared once, however many bags it is in
+		self.__shallowCompare__(self.__candidatePairs__())
 
-		combDist = {}
-		numComp = {}
+		self.__compareReport__()
+
+		return
+
+	def __compareInit__(self):
+		"""
+		Reset the state shared by all of the comparison stages.
+		"""
+		self.scoreHistogram = ScoreHistogram(numBins=self.scoreBins)
+		self.scoreReservoir = ScoreReservoir(size=self.scoreExamples, target=self.shallowDeepCompDiv)
+		self.numComp = {}
 		self.deepComp = {}
 		self.learning = []
 		# self.learningKeys = set()
@@ -437,81 +1550,142 @@ worst_case | {:10d} | {:10d}
 		self.allPredictionsClass = []
 
 		self.shallowCompares = 0
+		self.authorCompares = 0
+		self.authorSkipped = 0
 		self.deepCompares = 0
-		self.maxCompares = sum([sum([ch.comb(len(e), 2) for a, e in d.iteritems() if len(e) > 1]) for i, d in self.bag.iteritems()])
-
-		for lenID, lenDic in self.bag.iteritems():
-			numComp[lenID] = {}
-			for alphaID, entries in lenDic.iteritems():
-				numComp[lenID][alphaID] = 0
-				for e1 in xrange(0, len(entries)):
-					entry1 = entries[e1]
-					# authors1 = [l + ", " + f for f, l in entry1[self.author]]
-					authors1 = entry1[self.author]
-
-					lenAuthors1 = len(authors1)
-					if "others" in authors1[-1]:
-						lenAuthors1 -= 1
-
-
-					for e2 in xrange(e1 + 1, len(entries)):
-
-						self.shallowCompares += 1
-
-						try: 
-							entry2 = entries[e2]
-							# authors2 = [l + ", " + f for f, l in entry2[self.author]]
-							authors2 = entry2[self.author]
-
-							lenAuthors2 = len(authors2)
-							if "others" in authors2[-1]:
-								lenAuthors2 -= 1
-							
-							numCompare = min(lenAuthors1, lenAuthors2)
-
-							editDistance = 0
-							phonDistance = 0
-							for compareIndex in xrange(0, numCompare):
-								a1 = authors1[compareIndex]
-								a2 = authors2[compareIndex]
-
-								f1 = a1[0]
-								l1 = a1[1]
-								f2 = a2[0]
-								l2 = a2[1]
-
-								if f1[1] == '.' or f2[1] == '.':
-									# one of the authors' first name is an abbreviation
-									# hence a perfect match
-									editDistance += 1
-									phonDistance += 1
-								else:
-									# neither first name is an abbreviation
-									# test for similarity
-									editDistance += le.jaro_winkler(f1, f2)
-									phonDistance += 1.0 - (le.distance(soundex(f1), soundex(f2)) / float(lenSoundex))
-
-								editDistance += le.jaro_winkler(l1, l2)
-								phonDistance += 1.0 - (le.distance(soundex(l1), soundex(l2)) / float(lenSoundex))
-
-							editDistance /= numCompare
-							phonDistance /= numCompare
-
-
-							if (editDistance * phonDistance) >= self.shallowDeepCompDiv:
-								# self.OUT.write("COMPARE", editDistance, phonDistance, editDistance * phonDistance, authors1, authors2)
-								self.DeepCompare(entry1, entry2)
-								numComp[lenID][alphaID] += 1
-
-
-							combDist[editDistance * phonDistance] = [authors1, authors2]
-						except UnicodeEncodeError:
-							self.__warn__(MergerError("unable to properly analyze these two entries ({}, {})".format(entry1[self.id], entry2[self.id])))
-							# if self.killLevel:
-							# 	self.OUT.write("ERROR: skipping")
-
-		best_case = min([min([n for a, n in d.iteritems()]) for l, d in numComp.iteritems()])
-		worst_case = max([max([n for a, n in d.iteritems()]) for l, d in numComp.iteritems()])
+		self.deepCompared = set()
+
+		return
+
+	def __shallowCompare__(self, pairs):
+		"""
+		Shallow compare (by authors) the candidate pairs, as given by
+		__candidatePairs__, deep comparing those that are similar enough.
+
+		The pairs are cut into chunks of about compareChunk pairs (slicing
+		the large bags, grouping the small ones) that are scored by
+		shallowScores, across a pool of compareWorkers worker processes if
+		compareWorkers > 1. The pairs of a chunk that pass go on as one batch
+		to deepDistances, across a separate pool of deepWorkers worker
+		processes if deepWorkers > 1. Each stage has at most compareQueue
+		chunks (batches) per worker in flight and waits for its oldest one
+		beyond that, which bounds memory.
+
+		Results are handled oldest first and all deep comparisons are labeled
+		here, in that order, so the results are the same whatever the number
+		of workers.
+		"""
+		# all author attributes are precomputed by Normalize, only lookups remain
+		table = (	self.authorTable.first,
+					self.authorTable.last,
+					numpy.array(self.authorTable.abbreviated, dtype=bool),
+					self.authorTable.firstSoundex,
+					self.authorTable.lastSoundex	)
+		authors = (self.authorIDs,) + authorArrays(self.authorIDs, self.authorTable.others)
+
+		numComp = self.numComp
+
+		def chunks():
+			# (lenID, alphaID, entry1) of every item, along with the chunk
+			units	= []
+			chunk	= []
+			size	= 0
+			for lenID, alphaID, entry1, partners in pairs:
+				units.append((lenID, alphaID, entry1))
+				chunk.append((entry1, partners))
+				size += len(partners)
+
+				if size >= self.compareChunk:
+					yield units, chunk
+					units	= []
+					chunk	= []
+					size	= 0
+
+			if chunk:
+				yield units, chunk
+
+		shallowPool = None
+		if self.compareWorkers > 1:
+			shallowPool = multiprocessing.Pool(processes=self.compareWorkers, initializer=shallowInit,
+				initargs=(authors, table, self.lenSoundex, self.nameCache.maxSize, self.shallowDeepCompDiv, self.shallowBound, self.scoreHistogram.empty(), self.scoreReservoir.empty()))
+
+		deepPool = None
+		if self.deepWorkers > 1:
+			deepPool = multiprocessing.Pool(processes=self.deepWorkers, initializer=deepInit, initargs=(self.store, self.defaultKeysToDeepComp))
+
+		# the chunks and the batches of deep pairs in flight, oldest first, at
+		# most compareQueue per worker of either stage (none without workers)
+		shallowPending	= deque()
+		deepPending		= deque()
+
+		def deepDone():
+			batch, handle = deepPending.popleft()
+			distances = handle.get() if deepPool != None else handle
+
+			for (entry1, entry2), l in zip(batch, distances):
+				# self.OUT.write("COMPARE", entry1, entry2)
+				self.__deepLabel__(entry1, entry2, l)
+
+		def shallowDone():
+			units, handle = shallowPending.popleft()
+			compared, deep, authorCompares, authorSkipped, histogram, reservoir, hits, misses = handle.get() if shallowPool != None else handle
+
+			for lenID, alphaID, entry1 in units:
+				numComp.setdefault(lenID, {}).setdefault(alphaID, 0)
+
+			self.shallowCompares += compared
+			self.authorCompares += authorCompares
+			self.authorSkipped += authorSkipped
+
+			batch = []
+			for i, entry2 in deep:
+				lenID, alphaID, entry1 = units[i]
+				batch.append((entry1, entry2))
+				numComp[lenID][alphaID] += 1
+
+			# the worker's share of the scores
+			if histogram != None:
+				self.scoreHistogram.merge(histogram)
+				self.scoreReservoir.merge(reservoir)
+			self.nameCache.tally(hits, misses)
+
+			if batch:
+				if deepPool != None:
+					deepPending.append((batch, deepPool.apply_async(deepTask, (batch,))))
+				else:
+					deepPending.append((batch, [deepDistances(self.store, self.defaultKeysToDeepComp, entry1, entry2) for entry1, entry2 in batch]))
+
+			# back-pressure, wait for the oldest batch of deep pairs
+			while len(deepPending) > (self.compareQueue * self.deepWorkers if deepPool != None else 0):
+				deepDone()
+
+		try:
+			for units, chunk in chunks():
+				if shallowPool != None:
+					shallowPending.append((units, shallowPool.apply_async(shallowTask, (chunk,))))
+				else:
+					# the same name pairs come up again and again within a bag
+					shallowPending.append((units, shallowScores(chunk, authors, table, self.nameCache.scores, self.shallowDeepCompDiv, self.shallowBound, self.scoreHistogram, self.scoreReservoir) + (None, None, 0, 0)))
+
+				# back-pressure, wait for the oldest chunk
+				while len(shallowPending) > (self.compareQueue * self.compareWorkers if shallowPool != None else 0):
+					shallowDone()
+
+			while shallowPending:
+				shallowDone()
+			while deepPending:
+				deepDone()
+		finally:
+			for pool in [shallowPool, deepPool]:
+				if pool != None:
+					pool.terminate()
+					pool.join()
+
+		return
+
+	def __compareReport__(self):
+		best_case = min([min([n for a, n in d.iteritems()]) for l, d in self.numComp.iteritems()] or [0])
+		worst_case = max([max([n for a, n in d.iteritems()]) for l, d in self.numComp.iteritems()] or [0])
 		self.__info__("""shallow & deep compare complete
            |  # entries
 best_case  | {:10d}
@@ -526,34 +1700,190 @@ worst_case | {:10d}
 # of deep comparisons:    {}
 # of shallow comparisons: {}
 max # comparisons:        {}
+redundant eliminated:     {}
+# author comparisons:     {}
+author comparisons saved: {} ({:.1%}, {})
 """.format(
 	sum(self.allPredictionsClass),
 	self.deepCompares,
 	self.shallowCompares,
-	self.maxCompares))
+	self.maxCompares,
+	self.redundantCompares,
+	self.authorCompares,
+	self.authorSkipped,	self.authorSkipped / float(max(1, self.authorCompares + self.authorSkipped)),	"bounded" if self.shallowBound else "bound off"))
+
+		# with compareWorkers > 1 every worker process fills a cache of its
+		# own, hence unlike the above these depend on the number of workers
+		self.__info__("""name pair cache ({})
+# hits:                   {}
+# misses:                 {}
+""".format(
+	"summed over {} worker caches".format(self.compareWorkers) if self.compareWorkers > 1 else "one cache",
+	self.nameCache.hits,
+	self.nameCache.misses))
+
+		# the distribution of the shallow scores, with example pairs around the
+		# threshold (by their ids)
+		self.scoreReport = {	"threshold":	self.shallowDeepCompDiv,
+								"histogram":	self.scoreHistogram.report(),
+								"examples":		[{"score": score, "ids": [self.store.get(e, self.id) for e in pair]} for score, pair in self.scoreReservoir.items()]	}
+
+		edges = self.scoreHistogram.edges
+		self.__info__("""shallow scores
+     score     |  # pairs
+""" + "".join("{:5.2f} .. {:5.2f} | {:10d}\n".format(edges[b], edges[b + 1], n) for b, n in enumerate(self.scoreHistogram.counts) if n > 0))
+
+		if self.scoreReportFile != None:
+			self.__write__(self.scoreReportFile, self.scoreReport)
+
+		return
+
+	def TitleCompare(self):
+		self.__title__("Title Compare")
+
+		# candidate pairs of near duplicate titles, whatever their authors
+		lsh = MinHashLSH(numBands=self.lshBands, numRows=self.lshRows, maxBucketSize=self.lshMaxBucketSize)
+		redundant = self.exactRedundant
+		for e, title in enumerate(self.store.column(self.title)):
+			if title != None and not redundant[e]:
+				lsh.add(e, title)
+
+		self.titleCompares = 0
+		titleSkipped = 0
+		deepCompares = self.deepCompares
+
+		for entry1, entry2 in lsh.candidates():
+			self.titleCompares += 1
+
+			# already deep compared by ShallowCompare
+			if (entry1, entry2) in self.deepCompared:
+				titleSkipped += 1
+				continue
+
+			self.DeepCompare(entry1, entry2)
+
+		self.__info__("""title LSH ({} bands x {} rows, threshold ~{:.2f})
+# titles:                 {}
+# candidate pairs:        {}
+# oversized buckets:      {}
+# already compared:       {}
+# of deep comparisons:    {}
+# duplicate matches:      {}
+""".format(
+	lsh.numBands,
+	lsh.numRows,
+	lsh.threshold,
+	len(lsh),
+	self.titleCompares,
+	lsh.skipped,
+	titleSkipped,
+	self.deepCompares - deepCompares,
+	sum(self.allPredictionsClass)))
+
+		return
+
+	def NeighbourCompare(self):
+		self.__title__("Neighbour Compare")
+
+		# the text of every entry is its tfidfFields, rows without any have none
+		columns = [self.store.column(f) for f in self.tfidfFields]
+		texts = [" ".join(v for v in values if v) or None for values in zip(*columns)]
+
+		# exact duplicates were already settled by ExactMatch
+		for e in numpy.flatnonzero(self.exactRedundant):
+			texts[e] = None
+
+		tfidf = TfidfNeighbours(k=self.tfidfK, chunkSize=self.tfidfChunk, maxDF=self.tfidfMaxDF).fit(texts)
+
+		self.neighbourCompares = 0
+		neighbourSkipped = 0
+		deepCompares = self.deepCompares
+
+		for entry1, entry2 in tfidf.pairs():
+			self.neighbourCompares += 1
+
+			# already deep compared by an earlier stage
+			if (entry1, entry2) in self.deepCompared:
+				neighbourSkipped += 1
+				continue
+
+			self.DeepCompare(entry1, entry2)
+
+		self.__info__("""TF-IDF top-{} neighbours of {} (chunks of {}, max df {})
+# n-grams:                {}
+# candidate pairs:        {}
+# already compared:       {}
+# of deep comparisons:    {}
+# duplicate matches:      {}
+""".format(
+	tfidf.k,
+	"/".join(self.tfidfFields),
+	tfidf.chunkSize,
+	tfidf.maxDF,
+	tfidf.numTerms,
+	self.neighbourCompares,
+	neighbourSkipped,
+	self.deepCompares - deepCompares,
+	sum(self.allPredictionsClass)))
+
+		return
+
+	def NoAuthorCompare(self):
+		self.__title__("No Author Compare")
+
+		deepCompares = self.deepCompares
+
+		bags, pairs = self.__noAuthorCompare__()
+
+		self.__info__("""no_author bags
+# bags:                   {}
+# of deep comparisons:    {}
+# duplicate matches:      {}
+""".format(
+	len(bags),
+	self.deepCompares - deepCompares,
+	sum(self.allPredictionsClass)))
 
 		return
 
+	def __noAuthorCompare__(self, first=0, keys=None):
+		"""
+		Deep compare the pairs of the bags of the entries without authors
+		(see __uniquePairs__ for first), or of the bags of keys only (which
+		must include every bag with a row >= first), returning the bags and
+		the number of pairs compared.
+		"""
+		if keys == None:
+			# the bags of the entries without authors, largest first
+			bags = sorted(self.noAuthorBag.itervalues(), key=lambda rows: -len(rows))
+		else:
+			bags = [self.noAuthorBag[key] for key in keys]
+
+		pairs = 0
+		for b, entry1, partners in self.__uniquePairs__(bags, first):
+			pairs += len(partners)
+			for entry2 in partners:
+				self.DeepCompare(entry1, int(entry2))
+
+		return bags, pairs
+
 	def DeepCompare(self, entry1, entry2):
 		# self.__title__("deepCompare")
+		# entry1 and entry2 are row numbers in self.store
 
-		self.deepCompares += 1
-
-		try:
-			keys1 = entry1.keys()
-			keys2 = entry2.keys()
+		self.__deepLabel__(entry1, entry2, deepDistances(self.store, self.defaultKeysToDeepComp, entry1, entry2))
 
-			keysToComp = set(keys1).intersection(set(keys2))
-			keysToComp = keysToComp.intersection(self.defaultKeysToDeepComp)
+		return
 
-			l = {}
-			for k in keysToComp:
-				v1 = entry1[k]
-				v2 = entry2[k]
+	def __deepLabel__(self, entry1, entry2, l):
+		"""
+		Label (or predict) the pair entry1, entry2 from the distances l of
+		their fields, as given by deepDistances.
+		"""
+		self.deepCompares += 1
+		self.deepCompared.add((min(entry1, entry2), max(entry1, entry2)))
 
-				if v1 and v2:
-					l[k] = le.distance(v1, v2) / float(max(len(v1), len(v2)))
-			
+		try:
 			if self.doLearning == self.doLearnings['remakeData']:
 				sv = sum(l.values())
 				if sv <= self.summedPercentErrorDiv[0]:
@@ -573,8 +1903,8 @@ max # comparisons:        {}
 						self.OUT.write("prediction: {} (0.4 means low error, 1 means high error)".format(sv))
 						# display all of the shared fields to manually compare
 						# CONSIDER: maybe also outputting non-shared fields is also useful???
-						for k in keysToComp:
-							self.OUT.write("e1: {}\ne2: {}\n".format(entry1[k], entry2[k]))
+						for k in [k for k in self.defaultKeysToDeepComp if self.store.has(entry1, k) and self.store.has(entry2, k)]:
+							self.OUT.write("e1: {}\ne2: {}\n".format(self.store.get(entry1, k), self.store.get(entry2, k)))
 						label = raw_input("Are the entries the same? [y, n] ")
 
 						label = str(label).lower()
@@ -600,20 +1930,23 @@ max # comparisons:        {}
 
 				if prediction > 0.5:
 					self.allPredictionsClass.append(1)
-					self.OUT.write("duplicates", entry1[self.id], entry2[self.id])
+					self.OUT.write("duplicates: {} {}\n".format(self.store.get(entry1, self.id), self.store.get(entry2, self.id)))
 				else:
 					self.allPredictionsClass.append(0)
 		except KeyError:
 			if self.killLevel:
-				self.OUT.write("ERROR: skipping")
+				self.OUT.write("ERROR: skipping\n")
 
 		return
 
 	def Learner(self):
 		self.__title__("Learner")
 
-		self.OUT.write("defaultKeysToDeepCompSorted:", self.defaultKeysToDeepCompSorted)
-		self.OUT.write("# defaultKeysToDeepCompSorted:", len(self.defaultKeysToDeepCompSorted))
+		from sklearn import linear_model
+		from sklearn.cross_validation import train_test_split
+
+		self.OUT.write("defaultKeysToDeepCompSorted: {}\n".format(self.defaultKeysToDeepCompSorted))
+		self.OUT.write("# defaultKeysToDeepCompSorted: {}\n".format(len(self.defaultKeysToDeepCompSorted)))
 
 		dataset = []
 		if self.doLearning == self.doLearnings['remakeData']:
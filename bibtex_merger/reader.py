@@ -0,0 +1,218 @@
+import logging, re, os, sys, mmap, locale
+
+python2 = sys.version_info < (3, 0, 0)
+
+logger = logging.getLogger(__name__)
+__all__ = [	'entryBlocks', 'streamEntries', 'chunkRanges', 'readRange'	]
+
+# start of a top level block, e.g. "@article{" or "@string("
+_reStart	= re.compile(r'@[ \t\r\n]*[a-zA-Z_]+[ \t\r\n]*([{(])')
+# the characters that change the nesting depth of a block, or a new block
+# starting at the beginning of a line (used to resync after unbalanced braces)
+_reDelim	= re.compile(r'[{}()]|\n(?=@[ \t]*[a-zA-Z_]+[ \t]*[{(])')
+
+# byte versions of the above used when scanning memory-mapped files
+_reStartBytes	= re.compile(br'@[ \t\r\n]*[a-zA-Z_]+[ \t\r\n]*([{(])')
+_reDelimBytes	= re.compile(br'[{}()]|\n(?=@[ \t]*[a-zA-Z_]+[ \t]*[{(])')
+_reLineStart	= re.compile(br'\n(?=@[ \t]*[a-zA-Z_]+[ \t]*[{(])')
+_reString		= re.compile(br'@[ \t\r\n]*string[ \t\r\n]*[{(]', re.IGNORECASE)
+
+def _blockEnd(buf, pos, opener, depth, reDelim):
+	"""
+	Scan buf from pos for the close of a block opened with opener.
+
+	"{" blocks close when the brace depth returns to 0, "(" blocks close on
+	the first ")" outside of any braces. A line starting with a new "@type{"
+	closes a block with unbalanced braces, leaving it to the parser to
+	complain about it.
+
+	Returns (end, pos, depth) where end is None if buf ran out first, in
+	which case the scan can be resumed with the returned pos and depth.
+	"""
+	while True:
+		d = reDelim.search(buf, pos)
+		if not d:
+			return None, pos, depth
+
+		c	= d.group()[:1]
+		pos	= d.end()
+		if c in ("\n", b"\n"):
+			return d.start(), pos, depth
+		elif c in ("{", b"{"):
+			depth += 1
+		elif c in ("}", b"}"):
+			depth -= 1
+			if opener in ("{", b"{") and depth == 0:
+				return pos, pos, depth
+		elif c in (")", b")") and opener in ("(", b"(") and depth == 0:
+			return pos, pos, depth
+
+def entryBlocks(f, chunkSize=65536):
+	"""
+	Generator yielding the raw text of each top level @ block in a BibTeX file.
+
+	The file object is read in chunks of chunkSize characters and only the
+	block currently being scanned is kept in memory. Any text between blocks
+	is treated as a comment (as BibTeX does) and dropped.
+
+	Arguments:
+		f			--	file-like object opened for reading
+		chunkSize	--	number of characters read from f at a time
+	"""
+	if not (isinstance(chunkSize, int) and chunkSize > 0):
+		raise ValueError("entryBlocks chunkSize argument must be int > 0 not ({} -> {})".format(type(chunkSize), chunkSize))
+
+	buf		= ""
+	start	= 0
+	eof		= False
+
+	def more(keep):
+		# drop everything before keep and append the next chunk
+		# returns the new buffer and how far positions shifted
+		chunk = f.read(chunkSize)
+		return buf[keep:] + chunk, keep, not chunk
+
+	while True:
+		# find the start of the next block
+		m = _reStart.search(buf, start)
+		while not m and not eof:
+			# keep a short tail that may contain a partially read "@type{"
+			at = buf.rfind("@", start)
+			keep = at if at >= 0 and len(buf) - at < 256 else len(buf)
+			buf, shift, eof = more(keep)
+			start = 0
+			m = _reStart.search(buf)
+		if not m:
+			return
+
+		start	= m.start()
+		opener	= m.group(1)
+		pos		= m.end()
+
+		# scan to the matching close of this block
+		depth	= 1 if opener == "{" else 0
+		end, pos, depth = _blockEnd(buf, pos, opener, depth, _reDelim)
+		while end == None:
+			if eof:
+				# hand it over anyways, leaving it to the parser to complain
+				logger.warning("Unterminated block at the end of the file")
+				end = len(buf)
+				break
+			buf, shift, eof = more(start)
+			start	= 0
+			pos		-= shift
+			end, pos, depth = _blockEnd(buf, pos, opener, depth, _reDelim)
+
+		yield buf[start:end]
+		start = end
+
+def streamEntries(f, parser, budget=1048576, chunkSize=65536):
+	"""
+	Generator yielding the parsed entries of a BibTeX file one at a time.
+
+	Blocks are collected until budget characters of raw text are buffered,
+	parsed as one batch and handed out, so memory use is bounded by budget
+	rather than by the size of the file. The same parser is used for every
+	batch so that @string macros defined earlier in the file still resolve
+	(the parser's database keeps its strings, its entries are drained after
+	each batch).
+
+	Arguments:
+		f			--	file-like object opened for reading
+		parser		--	a bibtexparser BibTexParser, including customization
+		budget		--	number of raw characters to buffer before parsing
+		chunkSize	--	number of characters read from f at a time
+	"""
+	if not (isinstance(budget, int) and budget > 0):
+		raise ValueError("streamEntries budget argument must be int > 0 not ({} -> {})".format(type(budget), budget))
+
+	batch	= []
+	size	= 0
+	for block in entryBlocks(f, chunkSize=min(chunkSize, budget)):
+		batch.append(block)
+		size += len(block)
+
+		if size >= budget:
+			for e in _parseBatch(parser, batch):
+				yield e
+			batch	= []
+			size	= 0
+
+	for e in _parseBatch(parser, batch):
+		yield e
+
+def _parseBatch(parser, batch):
+	if not batch:
+		return []
+
+	db = parser.parse("\n\n".join(batch))
+
+	# drain the entries, the parser holds on to everything it has parsed
+	entries = list(db.entries)
+	del db.entries[:]
+	return entries
+
+def chunkRanges(filename, chunkSize):
+	"""
+	Split a BibTeX file into byte ranges of roughly chunkSize bytes that can
+	be parsed independently, without parsing the file.
+
+	The file is memory-mapped and each range is extended to the next line
+	starting with an "@type{" (the same boundaries entryBlocks resyncs on).
+	Since @string macros may be used anywhere after their definition, every
+	range comes with the raw text of all @string blocks defined before it.
+
+	Returns a list of (start, end, strings) tuples, in file order.
+
+	Arguments:
+		filename	--	the BibTeX file to split
+		chunkSize	--	target number of bytes per range
+	"""
+	if not (isinstance(chunkSize, int) and chunkSize > 0):
+		raise ValueError("chunkRanges chunkSize argument must be int > 0 not ({} -> {})".format(type(chunkSize), chunkSize))
+
+	with open(filename, "rb") as f:
+		size = os.fstat(f.fileno()).st_size
+		if size == 0:
+			return [(0, 0, b"")]
+
+		mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		try:
+			bounds = [0]
+			while bounds[-1] + chunkSize < size:
+				m = _reLineStart.search(mm, bounds[-1] + chunkSize)
+				if not m:
+					break
+				bounds.append(m.end())
+			bounds.append(size)
+
+			# the @string blocks (start offset, raw text)
+			strings = []
+			for m in _reString.finditer(mm):
+				opener = mm[m.end() - 1:m.end()]
+				end, pos, depth = _blockEnd(mm, m.end(), opener, 1 if opener == b"{" else 0, _reDelimBytes)
+				strings.append((m.start(), mm[m.start():end if end != None else size]))
+		finally:
+			mm.close()
+
+	ranges = []
+	for start, end in zip(bounds[:-1], bounds[1:]):
+		ranges.append((start, end, b"\n\n".join(text for offset, text in strings if offset < start)))
+
+	return ranges
+
+def readRange(filename, start, end, strings=b""):
+	"""
+	The text of the byte range [start, end) of filename, preceded by strings
+	(see chunkRanges), decoded the same way open(filename, 'r') would.
+	"""
+	with open(filename, "rb") as f:
+		f.seek(start)
+		data = f.read(end - start)
+
+	if strings:
+		data = strings + b"\n\n" + data
+
+	if python2:
+		return data
+	return data.decode(locale.getpreferredencoding(False))
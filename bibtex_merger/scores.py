@@ -0,0 +1,184 @@
+import logging
+
+import numpy
+
+logger = logging.getLogger(__name__)
+__all__ = [	'ScoreHistogram', 'ScoreReservoir'	]
+
+class ScoreHistogram(object):
+	"""Fixed-size histogram of a stream of scores.
+
+	The range low..high is cut into numBins equal bins, scores outside of
+	it are counted in the first or last bin (NaNs are not counted). Memory
+	stays at numBins counts however many scores are added, and histograms
+	with the same bins (e.g. of different worker processes) merge exactly.
+
+	Attributes:
+		low		--	lower edge of the first bin
+		high	--	upper edge of the last bin, > low
+		numBins	--	number of bins, int > 0
+	"""
+
+	def __init__(self, low=0.0, high=4.0, numBins=40):
+		if not ((isinstance(low, int) or isinstance(low, float)) and (isinstance(high, int) or isinstance(high, float)) and low < high):
+			raise ValueError("ScoreHistogram low and high arguments must be int|float with low < high not ({} -> {}, {} -> {})".format(type(low), low, type(high), high))
+		self._low	= float(low)
+		self._high	= float(high)
+
+		if not (isinstance(numBins, int) and numBins > 0):
+			raise ValueError("ScoreHistogram numBins argument must be int > 0 not ({} -> {})".format(type(numBins), numBins))
+		self._numBins = numBins
+
+		self._counts = numpy.zeros(numBins, dtype=numpy.int64)
+
+		return
+
+	def __len__(self):
+		return int(self._counts.sum())
+
+	@property
+	def low(self):
+		return self._low
+
+	@property
+	def high(self):
+		return self._high
+
+	@property
+	def numBins(self):
+		return self._numBins
+
+	@property
+	def counts(self):
+		"""
+		Number of scores in every bin (a copy).
+		"""
+		return self._counts.copy()
+
+	@property
+	def edges(self):
+		"""
+		The numBins + 1 bin edges.
+		"""
+		return numpy.linspace(self.low, self.high, self.numBins + 1)
+
+	def add(self, scores):
+		"""
+		Count an array of scores.
+		"""
+		scores = numpy.asarray(scores, dtype=float)
+		scores = scores[~numpy.isnan(scores)]
+
+		bins = numpy.floor((scores - self.low) / (self.high - self.low) * self.numBins)
+		bins = numpy.clip(bins, 0, self.numBins - 1).astype(numpy.int64)
+		self._counts += numpy.bincount(bins, minlength=self.numBins)
+
+		return
+
+	def merge(self, other):
+		"""
+		Add the counts of other, a ScoreHistogram with the same bins.
+		"""
+		if (other.low, other.high, other.numBins) != (self.low, self.high, self.numBins):
+			raise ValueError("ScoreHistogram can only merge a histogram with the same bins")
+		self._counts += other._counts
+
+		return
+
+	def empty(self):
+		"""
+		A new, empty ScoreHistogram with the same bins.
+		"""
+		return ScoreHistogram(self.low, self.high, self.numBins)
+
+	def report(self):
+		"""
+		The histogram as a dict, e.g. for a JSON report.
+		"""
+		return {	"low":		self.low,
+					"high":		self.high,
+					"total":	len(self),
+					"counts":	self._counts.tolist()	}
+
+class ScoreReservoir(object):
+	"""Bounded set of the size scored items whose scores are closest to
+	target, e.g. the example pairs around a decision threshold.
+
+	Ties are broken by item, so the items kept do not depend on the order
+	(or the grouping) in which they were added.
+
+	Attributes:
+		size	--	maximum number of items kept, int >= 0 (0 keeps none)
+		target	--	the score that the items are closest to
+	"""
+
+	def __init__(self, size=0, target=0.0):
+		if not (isinstance(size, int) and size >= 0):
+			raise ValueError("ScoreReservoir size argument must be int >= 0 not ({} -> {})".format(type(size), size))
+		self._size = size
+
+		if not (isinstance(target, int) or isinstance(target, float)):
+			raise ValueError("ScoreReservoir target argument must be int|float not ({} -> {})".format(type(target), target))
+		self._target = target
+
+		# (distance to target, item, score), closest first
+		self._items = []
+
+		return
+
+	def __len__(self):
+		return len(self._items)
+
+	@property
+	def size(self):
+		return self._size
+
+	@property
+	def target(self):
+		return self._target
+
+	def add(self, scores, items):
+		"""
+		Offer an array of scores with the list of their items (e.g. pairs of
+		rows), keeping the size closest to target.
+		"""
+		if self.size == 0 or len(items) == 0:
+			return
+
+		scores		= numpy.asarray(scores, dtype=float)
+		distance	= numpy.abs(scores - self.target)
+
+		# only the size closest of the new ones can make it
+		if len(items) > self.size:
+			keep = numpy.argpartition(distance, self.size - 1)
+			cut = distance[keep[self.size - 1]]
+			keep = numpy.flatnonzero(distance <= cut)
+		else:
+			keep = range(len(items))
+
+		self.__keep__(self._items + [(float(distance[i]), items[i], float(scores[i])) for i in keep])
+
+		return
+
+	def merge(self, other):
+		"""
+		Offer the items of other, a ScoreReservoir.
+		"""
+		self.__keep__(self._items + other._items)
+
+		return
+
+	def __keep__(self, candidates):
+		self._items = sorted(candidates)[:self.size]
+
+	def empty(self):
+		"""
+		A new, empty ScoreReservoir of the same size and target.
+		"""
+		return ScoreReservoir(self.size, self.target)
+
+	def items(self):
+		"""
+		List of the (score, item) kept, closest to target first.
+		"""
+		return [(score, item) for distance, item, score in self._items]
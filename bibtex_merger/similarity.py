@@ -0,0 +1,103 @@
+import Levenshtein as le
+
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+__all__ = [	'NamePairCache', 'nameScores'	]
+
+def nameScores(name1, soundex1, name2, soundex2, lenSoundex=10):
+	"""
+	The (edit, phonetic) similarity of two names: the Jaro-Winkler score of
+	the names and one minus the normalized edit distance of their soundex
+	codes.
+	"""
+	return le.jaro_winkler(name1, name2), 1.0 - (le.distance(soundex1, soundex2) / float(lenSoundex))
+
+class NamePairCache(object):
+	"""Bounded LRU memo of nameScores, keyed by the unordered name pair.
+
+	Within a bag the same names (e.g. the same lab's co-authors) are compared
+	over and over, this keeps the most recently used maxSize pairs around.
+
+	Attributes:
+		lenSoundex	--	length of the soundex codes
+		maxSize		--	maximum number of name pairs kept, 0 disables caching
+	"""
+
+	def __init__(self, lenSoundex=10, maxSize=65536):
+		if not (isinstance(lenSoundex, int) and lenSoundex > 0):
+			raise ValueError("NamePairCache lenSoundex argument must be int > 0 not ({} -> {})".format(type(lenSoundex), lenSoundex))
+		self._lenSoundex = lenSoundex
+
+		if not (isinstance(maxSize, int) and maxSize >= 0):
+			raise ValueError("NamePairCache maxSize argument must be int >= 0 not ({} -> {})".format(type(maxSize), maxSize))
+		self._maxSize = maxSize
+
+		self._pairs		= OrderedDict()
+		self._hits		= 0
+		self._misses	= 0
+
+		return
+
+	def __len__(self):
+		return len(self._pairs)
+
+	@property
+	def lenSoundex(self):
+		return self._lenSoundex
+
+	@property
+	def maxSize(self):
+		return self._maxSize
+
+	@property
+	def hits(self):
+		return self._hits
+
+	@property
+	def misses(self):
+		return self._misses
+
+	def scores(self, name1, soundex1, name2, soundex2):
+		"""
+		The (edit, phonetic) similarity of two names, see nameScores.
+		"""
+		key = (name1, name2) if name1 <= name2 else (name2, name1)
+
+		try:
+			# re-insert to mark as most recently used
+			value = self._pairs.pop(key)
+			self._pairs[key] = value
+			self._hits += 1
+			return value
+		except KeyError:
+			pass
+
+		self._misses += 1
+		value = nameScores(name1, soundex1, name2, soundex2, self.lenSoundex)
+
+		if self.maxSize > 0:
+			if len(self._pairs) >= self.maxSize:
+				# evict the least recently used pair
+				self._pairs.popitem(last=False)
+			self._pairs[key] = value
+
+		return value
+
+	def tally(self, hits, misses):
+		"""
+		Add the hits and misses of another cache, e.g. of a worker process,
+		to the counts of this one.
+		"""
+		self._hits		+= hits
+		self._misses	+= misses
+
+		return
+
+	def clear(self):
+		self._pairs.clear()
+		self._hits		= 0
+		self._misses	= 0
+
+		return
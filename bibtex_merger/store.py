@@ -0,0 +1,102 @@
+import logging
+
+logger = logging.getLogger(__name__)
+__all__ = [	'EntryStore'	]
+
+class EntryStore(object):
+	"""Columnar store of BibTeX entries.
+
+	Rather than a dict per entry, every field gets a single column (list)
+	holding that field's value for every entry, None where the entry does not
+	have the field. An entry is identified by its row number, which is what
+	the bags built by BibTeX_Merger.Bagging hold.
+
+	Attributes:
+		entries	--	optional iterable of entry dicts to initially append
+	"""
+
+	def __init__(self, entries=None):
+		self._columns	= {}
+		self._numRows	= 0
+
+		if entries != None:
+			self.extend(entries)
+
+		return
+
+	def __len__(self):
+		return self._numRows
+
+	def __iter__(self):
+		for i in range(self._numRows):
+			yield self.row(i)
+
+	@property
+	def fields(self):
+		"""
+		All of the field names found in any entry.
+		"""
+		return list(self._columns.keys())
+
+	def append(self, entry):
+		"""
+		Add an entry dict as the next row, returning its row number.
+		"""
+		if not isinstance(entry, dict):
+			raise ValueError("EntryStore entry must be a dict not ({} -> {})".format(type(entry), entry))
+
+		i = self._numRows
+
+		for k, v in entry.items():
+			try:
+				self._columns[k].append(v)
+			except KeyError:
+				# new field, pad the rows that came before
+				self._columns[k] = [None] * i + [v]
+
+		self._numRows += 1
+
+		# pad the fields this entry does not have
+		for column in self._columns.values():
+			if len(column) < self._numRows:
+				column.append(None)
+
+		return i
+
+	def extend(self, entries):
+		for e in entries:
+			self.append(e)
+
+		return
+
+	def column(self, field):
+		"""
+		The values of field for every row (None where missing).
+		"""
+		try:
+			return self._columns[field]
+		except KeyError:
+			return [None] * self._numRows
+
+	def get(self, i, field, default=None):
+		"""
+		The value of field for row i, default if row i does not have it.
+		"""
+		try:
+			v = self._columns[field][i]
+		except KeyError:
+			return default
+
+		return default if v == None else v
+
+	def has(self, i, field):
+		return field in self._columns and self._columns[field][i] != None
+
+	def row(self, i):
+		"""
+		Row i rebuilt as an entry dict.
+		"""
+		if not (0 <= i < self._numRows):
+			raise IndexError("EntryStore row {} out of range".format(i))
+
+		return dict((k, column[i]) for k, column in self._columns.items() if column[i] != None)
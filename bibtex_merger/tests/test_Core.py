@@ -1,4 +1,4 @@
-import unittest, sys, os
+import unittest, sys, os, threading, time
 
 python2 = sys.version_info < (3, 0, 0)
 
@@ -6,6 +6,7 @@ if python2:
     from StringIO import StringIO
 else:
     from io import StringIO
+    import asyncio
 
 from bibtex_merger.core import *
 from bibtex_merger.extension import *
@@ -227,6 +228,13 @@ class test_core(unittest.TestCase):
 
 		self.assertEqual(c.__read__("{}/sample.txt".format(self.dataDir)), "Sample file with text")
 
+	def test_read_registry(self):
+		c = Core(ext=[	Extension(ext="txt", reader=self.tRead),
+						Extension(ext=r"^.*\.txt$", reader=lambda filename: "GENERIC")	], prefFile=None)
+
+		self.assertEqual(c.extensionRegistry.find("{}/sample.txt".format(self.dataDir)), c.extensionObjects[0])
+		self.assertEqual(c.__read__("{}/sample.txt".format(self.dataDir)), "Sample file with text")
+
 	def test_read_bad_ext(self):
 		c = Core(ext=Extension(ext="txt", reader=self.tRead))
 
@@ -323,6 +331,80 @@ class test_core(unittest.TestCase):
 		self.assertEqual(pref.sections(), [self.samplePrefSect])
 		self.assertEqual(pref.items(self.samplePrefSect), self.samplePrefItems)
 
+	###########
+	# asyncio
+	###########
+
+	def test_ioConcurrency_bad(self):
+		self.assertRaises(ValueError, Core, ext=Extension(ext="none"), ioConcurrency=0)
+		self.assertRaises(ValueError, Core, ext=Extension(ext="none"), ioConcurrency="4")
+
+	@unittest.skipIf(python2, "asyncio requires python 3")
+	def test_aread(self):
+		c = Core(ext=Extension(ext="txt", reader=self.tRead))
+
+		loop = asyncio.new_event_loop()
+		try:
+			self.assertEqual(loop.run_until_complete(c.__aread__("{}/sample.txt".format(self.dataDir))), "Sample file with text")
+			self.assertRaises(CoreError, loop.run_until_complete, c.__aread__("{}/sample.random".format(self.dataDir)))
+		finally:
+			loop.close()
+
+	@unittest.skipIf(python2, "asyncio requires python 3")
+	def test_awriteread(self):
+		c = Core(ext=Extension(ext="txt", reader=self.tRead, writer=self.tWrite))
+
+		f = "{}/sample2.txt".format(self.dataDir)
+		t = "Some random text to insert"
+
+		loop = asyncio.new_event_loop()
+		try:
+			loop.run_until_complete(c.__awrite__(f, t))
+			self.assertEqual(loop.run_until_complete(c.__aread__(f)), t)
+		finally:
+			loop.close()
+
+		os.remove(f)
+
+	@unittest.skipIf(python2, "asyncio requires python 3")
+	def test_areadAll_bounded(self):
+		lock = threading.Lock()
+		state = {"inflight": 0, "max": 0}
+
+		def slowRead(filename):
+			with lock:
+				state["inflight"] += 1
+				state["max"] = max(state["max"], state["inflight"])
+			time.sleep(0.01)
+			with lock:
+				state["inflight"] -= 1
+			return filename
+
+		c = Core(ext=Extension(ext="txt", reader=slowRead), prefFile=None, ioConcurrency=2)
+
+		filenames = ["{}.txt".format(i) for i in range(8)]
+
+		loop = asyncio.new_event_loop()
+		try:
+			self.assertEqual(loop.run_until_complete(c.__areadAll__(filenames)), filenames)
+		finally:
+			loop.close()
+
+		self.assertEqual(state["max"] <= 2, True)
+
+	@unittest.skipIf(python2, "asyncio requires python 3")
+	def test_apreferencesRead(self):
+		c = Core(ext=Extension(ext="none"), prefFile="{}/sample.cfg".format(self.dataDir))
+
+		loop = asyncio.new_event_loop()
+		try:
+			pref = loop.run_until_complete(c.__apreferencesRead__())
+		finally:
+			loop.close()
+
+		self.assertEqual(pref.sections(), [self.samplePrefSect])
+		self.assertEqual(pref.items(self.samplePrefSect), self.samplePrefItems)
+
 	###########
 	# __info__
 	###########
@@ -1,4 +1,9 @@
-import unittest
+import unittest, sys
+
+python2 = sys.version_info < (3, 0, 0)
+
+if not python2:
+	import asyncio
 
 from bibtex_merger.extension import *
 
@@ -127,6 +132,86 @@ class test_extension(unittest.TestCase):
 	def test_Extension_extension_change(self):
 		self.assertRaises(AttributeError, self.extensionAttemptWriterChange)
 
+	###########
+	# lazy reader/writer
+	###########
+
+	def test_Extension_lazy(self):
+		testExt = Extension(ext="test", reader="os.path:basename", writer="os.path:join")
+
+		self.assertEqual(testExt.read("dir/sample.test"), "sample.test")
+		self.assertEqual(testExt.write("dir/sample.test", "more"), "dir/sample.test/more")
+
+	def test_Extension_lazy_bad(self):
+		self.assertRaises(ValueError, Extension, ext="test", reader="os.path")
+
+		testExt = Extension(ext="test", reader="os.path:sep")
+		self.assertRaises(ValueError, testExt.read, "sample.test")
+
+	###########
+	# filename/suffix
+	###########
+
+	def test_Extension_filename(self):
+		self.assertEqual(Extension(ext=r"^pref\.cfg$").filename, "pref.cfg")
+		self.assertEqual(Extension(ext=r"^.*\.cfg$").filename, None)
+		self.assertEqual(Extension(ext="test").filename, None)
+
+	def test_Extension_suffix(self):
+		self.assertEqual(Extension(ext="test").suffix, ".test")
+		self.assertEqual(Extension(ext=r"tar\.gz").suffix, ".tar.gz")
+		self.assertEqual(Extension(ext=r"te.t").suffix, None)
+		self.assertEqual(Extension().suffix, None)
+		self.assertEqual(Extension(ext=r"^pref\.cfg$").suffix, None)
+
+	###########
+	# aread/awrite
+	###########
+
+	@unittest.skipIf(python2, "asyncio requires python 3")
+	def test_Extension_aread(self):
+		testExt = Extension(ext="test", reader=self.tRead, writer=self.tWrite)
+
+		loop = asyncio.new_event_loop()
+		try:
+			self.assertEqual(loop.run_until_complete(testExt.aread("sample.test")), "READING")
+			self.assertEqual(loop.run_until_complete(testExt.awrite("sample.test", None)), "WRITING")
+			self.assertRaises(ExtensionError, loop.run_until_complete, testExt.aread("sample.txt"))
+		finally:
+			loop.close()
+
+class test_extension_registry(unittest.TestCase):
+
+	def firstMatch(self, extensions, filename):
+		for i, ext in enumerate(extensions):
+			if ext.reextension.search(filename):
+				return i
+		return None
+
+	def test_ExtensionRegistry_base(self):
+		r = ExtensionRegistry([Extension(ext="bib"), Extension(ext="csv")])
+
+		self.assertEqual(r.index("sample.bib"), 0)
+		self.assertEqual(r.index("dir/sample.csv"), 1)
+		self.assertEqual(r.index("sample.txt"), None)
+		self.assertEqual(r.find("sample.txt"), None)
+		self.assertEqual(r.find("sample.csv"), r.extensions[1])
+
+	def test_ExtensionRegistry_first_match(self):
+		extensions = [	Extension(ext=r"^x\.bib$"),
+						Extension(ext=r"b.b"),
+						Extension(ext="bib"),
+						Extension(ext=r"tar\.gz"),
+						Extension(ext="gz"),
+						Extension(ext=r"^.*foo$"),
+						Extension()	]
+		filenames = ["x.bib", "a.bib", "a.bab", "a.tar.gz", "b.gz", "qfoo", "foo.bar", "abc", "dir.d/a.bib"]
+
+		for order in [extensions, extensions[::-1], extensions[2:], extensions[:4]]:
+			r = ExtensionRegistry(order)
+			for f in filenames:
+				self.assertEqual(r.index(f), self.firstMatch(order, f))
+
 class test_extension_error(unittest.TestCase):
 
 	###########
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from bibtex_merger.authors import *
+
+class test_authors(unittest.TestCase):
+
+	###########
+	# Helpers
+	###########
+
+	def tSoundex(self, name):
+		return name[:1].upper()
+
+	###########
+	# fold
+	###########
+
+	def test_fold(self):
+		self.assertEqual(fold(u"Schön"), "Schon")
+		self.assertEqual(fold(u"Chavarría"), "Chavarria")
+		self.assertEqual(fold(u"Ångström"), "Angstrom")
+		self.assertEqual(fold("Qux"), "Qux")
+		self.assertEqual(fold(u"张"), "")
+
+	###########
+	# __init__
+	###########
+
+	def test_base(self):
+		AuthorTable(self.tSoundex)
+
+	def test_base_bad(self):
+		self.assertRaises(ValueError, AuthorTable, "nonmethod")
+
+	###########
+	# intern
+	###########
+
+	def test_intern(self):
+		t = AuthorTable(self.tSoundex)
+
+		self.assertEqual(t.intern(["B.", "Qux"]), 0)
+		self.assertEqual(t.intern(["Foo", "Bar"]), 1)
+		self.assertEqual(t.intern(["B.", "Qux"]), 0)
+		self.assertEqual(len(t), 2)
+
+	def test_intern_attributes(self):
+		t = AuthorTable(self.tSoundex)
+
+		i = t.intern(["B.", "Qux"])
+		self.assertEqual((t.first[i], t.last[i], t.abbreviated[i], t.others[i]), ("B.", "Qux", True, False))
+		self.assertEqual((t.firstSoundex[i], t.lastSoundex[i]), ("B", "Q"))
+
+		i = t.intern([u"Jörg", u"Müller"])
+		self.assertEqual((t.first[i], t.last[i], t.abbreviated[i], t.others[i]), ("Jorg", "Muller", False, False))
+
+		i = t.intern(["others"])
+		self.assertEqual((t.first[i], t.last[i], t.others[i]), ("", "", True))
+
+		i = t.intern(["Plato"])
+		self.assertEqual((t.first[i], t.last[i], t.abbreviated[i]), ("", "Plato", False))
+
+	def test_ids(self):
+		t = AuthorTable(self.tSoundex)
+
+		self.assertEqual(t.ids([["Foo", "Bar"], ["B.", "Qux"]]), (0, 1))
+		self.assertEqual(t.ids([["B.", "Qux"], ["others"]]), (1, 2))
+
+if __name__ == '__main__':
+	unittest.main()
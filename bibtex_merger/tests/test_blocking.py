@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from bibtex_merger.store import EntryStore
+from bibtex_merger.blocking import *
+
+class test_blocking(unittest.TestCase):
+
+	entries = [	{"ID": "a", "author": [["Foo", "Bar"], ["Baz", "Qux"]], "title": "The Fancy Paper", "year": "1999", "journal": "Journal of Things"},
+				{"ID": "b", "author": [["F.", "Bar"], ["others"]], "title": "A fancy paper", "year": "2000", "booktitle": "Proc. of Stuff"},
+				{"ID": "c", "author": [["Baz", "Qux"]], "title": "Another paper", "year": "2003", "journal": "The journal of things"},
+				{"ID": "d", "author": [["Foo", "Bar"], ["Bob", "Quux"]], "title": "Fancy stuff"},
+				{"ID": "e", "author": [["Foo", "Bar"], ["Baz", "Qux"], ["Qed", "Xyz"]], "title": "Other", "year": "in 1999"}	]
+
+	def setUp(self):
+		self.store	= EntryStore(self.entries)
+		self.rows	= list(range(len(self.store)))
+
+	def pairs(self, blocks):
+		return set((min(a, b), max(a, b)) for rows in blocks.values() for a in rows for b in rows if a != b)
+
+	###########
+	# normalize
+	###########
+
+	def test_normalize(self):
+		self.assertEqual(normalize("The Journal of Things"), ["journal", "things"])
+		self.assertEqual(normalize(u"Schön, et al."), ["schon", "et", "al"])
+		self.assertEqual(normalize(""), [])
+
+	###########
+	# strategies
+	###########
+
+	def test_strategies(self):
+		self.assertEqual(sorted(strategies.keys()), ["authors", "imprint", "initials", "lastnames", "neighbourhood", "title", "venue", "year"])
+		self.assertEqual(all(issubclass(s, BlockingStrategy) for s in strategies.values()), True)
+
+	def test_base(self):
+		self.assertRaises(NotImplementedError, BlockingStrategy().blocks, self.store, self.rows)
+
+	def test_AuthorCount(self):
+		blocks = AuthorCount().blocks(self.store, self.rows)
+
+		# the "others" entry also goes in the bags with more authors
+		self.assertEqual(blocks, {1: [2], 2: [0, 3, 1, 1], 3: [4, 1]})
+
+	def test_AuthorInitials(self):
+		# "fb" et al. joins the "fbbq" block rather than opening its own
+		self.assertEqual(AuthorInitials().blocks(self.store, [0, 3, 1]), {"fbbq": [0, 3, 1]})
+		self.assertEqual(AuthorInitials().blocks(self.store, [2, 0]), {"bq": [2], "fbbq": [0]})
+
+		# and the "fbbq" block takes in "fb" et al. if that came first
+		self.assertEqual(AuthorInitials().blocks(self.store, [1, 0, 3]), {"fb": [1], "fbbq": [1, 0, 3]})
+
+	def test_LastNames(self):
+		self.assertRaises(ValueError, LastNames, length=0)
+
+		# "Bar" et al. joins the "barqux" block rather than opening its own
+		self.assertEqual(LastNames().blocks(self.store, [0, 3, 1]), {"barqux": [0, 1], "barquu": [3, 1]})
+		self.assertEqual(LastNames(length=1).blocks(self.store, [0, 3, 1]), {"bq": [0, 3, 1]})
+
+	def test_YearWindow(self):
+		self.assertRaises(ValueError, YearWindow, window=-1)
+		self.assertRaises(ValueError, YearWindow, window="1")
+
+		# d has no year, hence is in every block
+		self.assertEqual(self.pairs(YearWindow(window=1).blocks(self.store, self.rows)), set([(0, 1), (0, 4), (1, 4), (0, 3), (1, 3), (2, 3), (3, 4)]))
+		self.assertEqual(self.pairs(YearWindow(window=0).blocks(self.store, [0, 1, 4])), set([(0, 4)]))
+		self.assertEqual(YearWindow().blocks(self.store, [3]), {None: [3]})
+
+	def test_Venue(self):
+		blocks = Venue().blocks(self.store, self.rows)
+
+		self.assertEqual(blocks["journal things"], [0, 2, 3, 4])
+		self.assertEqual(blocks["proc stuff"], [1, 3, 4])
+
+	def test_Imprint(self):
+		store = EntryStore([	{"ID": "a", "title": "Proceedings", "publisher": "ACM Press"},
+								{"ID": "b", "title": "Proceedings", "organization": "The ACM press"},
+								{"ID": "c", "title": "Manual", "editor": "Foo Bar"},
+								{"ID": "d", "title": "Manual"}	])
+
+		self.assertEqual(Imprint().blocks(store, [0, 1, 2, 3]), {"acm press": [0, 1, 3], "foo bar": [2, 3]})
+
+	def test_TitleTokens(self):
+		self.assertRaises(ValueError, TitleTokens, numTokens=0)
+
+		self.assertEqual(TitleTokens().blocks(self.store, self.rows), {"fancy": [0, 1, 3], "another": [2], "other": [4]})
+		self.assertEqual(TitleTokens(numTokens=2).blocks(self.store, [0, 1, 3]), {"fancy paper": [0, 1], "fancy stuff": [3]})
+
+	def test_SortedNeighbourhood(self):
+		self.assertRaises(ValueError, SortedNeighbourhood, window=1)
+
+		# sorted by title: c, a, b, d, e
+		blocks = SortedNeighbourhood(window=2).blocks(self.store, self.rows)
+		self.assertEqual(sorted(blocks.values()), sorted([[2, 0], [0, 1], [1, 3], [3, 4]]))
+
+		self.assertEqual(SortedNeighbourhood(window=10).blocks(self.store, self.rows), {0: [2, 0, 1, 3, 4]})
+		self.assertEqual(SortedNeighbourhood().blocks(self.store, []), {})
+
+	###########
+	# insert
+	###########
+
+	def test_insert(self):
+		for strategy in [AuthorCount(), AuthorInitials(), LastNames(), YearWindow(), Venue(), TitleTokens(), SortedNeighbourhood(window=2)]:
+			for split in range(len(self.rows) + 1):
+				blocks = strategy.blocks(self.store, self.rows[:split])
+				added = strategy.insert(self.store, blocks, self.rows, self.rows[split:])
+
+				# the same pairs as blocking all of the rows at once
+				self.assertEqual(self.pairs(blocks), self.pairs(strategy.blocks(self.store, self.rows)))
+				self.assertEqual(all(set(rows) <= set(blocks[key]) for key, rows in added.items()), True)
+
+	def test_insert_keyed(self):
+		blocks = YearWindow(window=0).blocks(self.store, [3])
+
+		# d (no year) moves from the block without a key into the new one
+		self.assertEqual(YearWindow(window=0).insert(self.store, blocks, [3, 2], [2]), {2003: [3, 2]})
+		self.assertEqual(blocks, {2003: [3, 2]})
+
+		self.assertEqual(YearWindow(window=0).insert(self.store, blocks, [3, 2, 0], [0]), {1999: [3, 0]})
+		self.assertEqual(blocks, {1999: [3, 0], 2003: [3, 2]})
+
+	###########
+	# BlockingChain
+	###########
+
+	def test_BlockingChain(self):
+		strategies = [AuthorCount(), AuthorInitials()]
+		chain = BlockingChain(strategies)
+
+		self.assertEqual(chain.strategies, strategies)
+		self.assertEqual(chain.insert(self.store, []), ({}, set()))
+		self.assertEqual(chain.blocks(), {})
+
+		changed, removed = chain.insert(self.store, [0, 1])
+		self.assertEqual(changed, {(2, "fbbq"): [0, 1, 1]})
+		self.assertEqual(removed, set())
+
+		# only the blocks that d and e land in change, e opens the 3 authors
+		# block that takes in b et al. (hence is blocked from scratch)
+		changed, removed = chain.insert(self.store, [3, 4])
+		self.assertEqual(changed, {(2, "fbbq"): [0, 1, 1, 3], (3, "fb"): [1], (3, "fbbqqx"): [1, 4]})
+		self.assertEqual(removed, set())
+
+		self.assertEqual(len(chain), 4)
+		self.assertEqual(chain.blocks(0), {(): [0, 1, 3, 4]})
+		self.assertEqual(chain.blocks(1), {(2,): [0, 1, 1, 3], (3,): [1, 4]})
+
+		# the same pairs as blocking all of the rows at once
+		self.assertEqual(self.pairs(chain.blocks()), set([(0, 1), (0, 3), (1, 3), (1, 4)]))
+		self.assertEqual(len(chain.seconds), 2)
+
+	def test_BlockingChain_removed(self):
+		chain = BlockingChain([YearWindow(window=0), TitleTokens()])
+
+		self.assertEqual(chain.insert(self.store, [3]), ({(None, "fancy"): [3]}, set()))
+
+		# the block of the entries without a year is gone once there is a year
+		self.assertEqual(chain.insert(self.store, [4]), ({(1999, "fancy"): [3], (1999, "other"): [4]}, set([(None, "fancy")])))
+		self.assertEqual(chain.blocks(1), {(1999,): [3, 4]})
+
+	def test_BlockingChain_none(self):
+		chain = BlockingChain([])
+
+		self.assertEqual(chain.insert(self.store, [0, 1]), ({(): [0, 1]}, set()))
+		self.assertEqual(chain.insert(self.store, [2]), ({(): [0, 1, 2]}, set()))
+
+if __name__ == '__main__':
+	unittest.main()
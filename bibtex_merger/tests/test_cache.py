@@ -0,0 +1,116 @@
+import unittest, os, tempfile, shutil
+
+from bibtex_merger.cache import *
+
+class test_cache(unittest.TestCase):
+
+	###########
+	# Helpers
+	###########
+
+	entries = [{"ID": "small1", "author": [["B.", "Qux"]]}, {"ID": "small2", "title": "A fancy small paper"}]
+
+	def setUp(self):
+		self.tdir = tempfile.mkdtemp()
+		self.cdir = os.path.join(self.tdir, "cache")
+
+		self.source = os.path.join(self.tdir, "sample.bib")
+		with open(self.source, "w") as f:
+			f.write("@misc{small1, title = {A small paper}}\n")
+
+	def tearDown(self):
+		shutil.rmtree(self.tdir)
+
+	def cacheAttemptMaxSizeChange(self):
+		c = ParseCache(self.cdir)
+		c.maxSize = "blue"
+
+	###########
+	# __init__
+	###########
+
+	def test_base(self):
+		ParseCache(self.cdir)
+		ParseCache(self.cdir, salt="abc")
+		ParseCache(self.cdir, maxSize=0)
+
+	def test_base_bad(self):
+		self.assertRaises(ValueError, ParseCache, 12345)
+		self.assertRaises(ValueError, ParseCache, self.cdir, salt=12345)
+		self.assertRaises(ValueError, ParseCache, self.cdir, maxSize=-1)
+		self.assertRaises(ValueError, ParseCache, self.cdir, maxSize="12345")
+
+	def test_maxSize(self):
+		self.assertRaises(AttributeError, self.cacheAttemptMaxSizeChange)
+
+	###########
+	# get/put
+	###########
+
+	def test_get_miss(self):
+		c = ParseCache(self.cdir)
+
+		self.assertEqual(c.get(self.source), None)
+		self.assertEqual((c.hits, c.misses), (0, 1))
+
+	def test_putget(self):
+		c = ParseCache(self.cdir)
+
+		c.put(self.source, self.entries)
+
+		self.assertEqual(c.get(self.source), self.entries)
+		self.assertEqual((c.hits, c.misses), (1, 0))
+
+	def test_putget_changed(self):
+		c = ParseCache(self.cdir)
+
+		c.put(self.source, self.entries)
+
+		with open(self.source, "a") as f:
+			f.write("@misc{small2, title = {A fancy small paper}}\n")
+
+		self.assertEqual(c.get(self.source), None)
+
+	def test_salt(self):
+		c = ParseCache(self.cdir, salt="old")
+		c.put(self.source, self.entries)
+
+		c = ParseCache(self.cdir, salt="new")
+		self.assertEqual(c.get(self.source), None)
+
+		# the outdated namespace is removed
+		self.assertEqual(os.listdir(self.cdir), ["new"])
+
+	def test_evict(self):
+		c = ParseCache(self.cdir, maxSize=0)
+
+		c.put(self.source, self.entries)
+
+		self.assertEqual(c.get(self.source), None)
+
+	def test_clear(self):
+		c = ParseCache(self.cdir)
+
+		c.put(self.source, self.entries)
+		c.clear()
+
+		self.assertEqual(c.get(self.source), None)
+
+	###########
+	# fingerprint
+	###########
+
+	def test_fingerprint(self):
+		def f1(record):
+			return record
+
+		def f2(record):
+			record["type"] = "misc"
+			return record
+
+		self.assertEqual(fingerprint(f1), fingerprint(f1))
+		self.assertNotEqual(fingerprint(f1), fingerprint(f2))
+		self.assertNotEqual(fingerprint(f1, "0.6"), fingerprint(f1, "0.7"))
+
+if __name__ == '__main__':
+	unittest.main()
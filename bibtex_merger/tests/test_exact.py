@@ -0,0 +1,80 @@
+import unittest
+
+from bibtex_merger.store import EntryStore
+from bibtex_merger.exact import *
+
+class test_exact(unittest.TestCase):
+
+	entries = [	{"ID": "f1_a", "ENTRYTYPE": "article", "title": "A  Fancy Paper", "author": [["Foo", "Bar"]]},
+				{"ID": "f2_a", "ENTRYTYPE": "article", "title": "a fancy paper", "author": [["foo", "bar"]]},
+				{"ID": "f1_b", "ENTRYTYPE": "article", "title": "Another paper", "doi": "10.1000/XYZ"},
+				{"ID": "f2_b", "ENTRYTYPE": "article", "title": "Another paper (preprint)", "doi": "https://doi.org/10.1000/xyz"},
+				{"ID": "f1_c", "ENTRYTYPE": "inbook", "title": "Chapter 1", "isbn": "0-306-40615-2"},
+				{"ID": "f2_c", "ENTRYTYPE": "inbook", "title": "Chapter 2", "isbn": "0-306-40615-2"},
+				{"ID": "f1_d", "ENTRYTYPE": "book", "title": "The book", "isbn": "0-306-40615-2"},
+				{"ID": "f2_d", "ENTRYTYPE": "book", "title": "The Book, 2nd ed.", "isbn": "978-0-306-40615-7"},
+				{"ID": "f1_e", "ENTRYTYPE": "inproceedings", "title": "Paper one", "url": "https://example.com/proc"},
+				{"ID": "f2_e", "ENTRYTYPE": "inproceedings", "title": "Paper two", "url": "https://example.com/proc"},
+				{"ID": "f3_b", "ENTRYTYPE": "article", "title": "Another paper (journal)", "doi": "doi:10.1000/xyz"},
+				{"ID": "f1_f", "ENTRYTYPE": "misc", "title": "Preprint", "eprint": "arXiv:1234.5678v1"},
+				{"ID": "f2_f", "ENTRYTYPE": "misc", "title": "Preprint v2", "eprint": "1234.5678v2", "url": "http://www.example.com/p/"},
+				{"ID": "f3_f", "ENTRYTYPE": "misc", "title": "Preprint online", "url": "https://example.com/p"}	]
+
+	###########
+	# contentKey
+	###########
+
+	def test_contentKey(self):
+		self.assertEqual(contentKey(self.entries[0]), contentKey(self.entries[1]))
+		self.assertNotEqual(contentKey(self.entries[2]), contentKey(self.entries[3]))
+		self.assertNotEqual(contentKey(self.entries[0]), contentKey(self.entries[1], ignore=[]))
+
+	###########
+	# exactGroups
+	###########
+
+	def test_exactGroups(self):
+		groups = exactGroups(EntryStore(self.entries))
+
+		# chapters share the ISBN of their book and papers the url of their
+		# proceedings, hence are not matched by these
+		self.assertEqual(groups, [[0, 1], [2, 3, 10], [6, 7], [11, 12, 13]])
+
+	def test_exactGroups_eprint(self):
+		# versions of the same arXiv preprint
+		self.assertEqual(exactGroups(EntryStore(self.entries[11:13])), [[0, 1]])
+
+	def test_exactGroups_url(self):
+		self.assertEqual(exactGroups(EntryStore(self.entries[12:14])), [[0, 1]])
+		self.assertEqual(exactGroups(EntryStore(self.entries[8:10])), [])
+
+	def test_exactGroups_none(self):
+		self.assertEqual(exactGroups(EntryStore(self.entries[4:6])), [])
+		self.assertEqual(exactGroups(EntryStore()), [])
+
+	###########
+	# ExactIndex
+	###########
+
+	def test_ExactIndex(self):
+		store = EntryStore(self.entries[:9])
+		index = ExactIndex()
+
+		self.assertEqual(index.extend(store), [[0, 1], [2, 3], [6, 7]])
+		self.assertEqual(len(index), 9)
+		self.assertEqual(index.pairs, 3)
+
+		# only the groups that gained a row
+		for e in self.entries[9:]:
+			store.append(e)
+		self.assertEqual(index.extend(store), [[2, 3, 10], [11, 12, 13]])
+		self.assertEqual(index.extend(store), [])
+
+		self.assertEqual(index.groups(), exactGroups(EntryStore(self.entries)))
+		self.assertEqual(index.pairs, 8)
+
+	def test_identifiers(self):
+		self.assertEqual(sorted(identifiers.keys()), ["doi", "eprint", "isbn", "url"])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from bibtex_merger.index import *
+
+class test_prefix_index(unittest.TestCase):
+
+	keys = ["bqfb", "fbbq", "bq", "fbbqaa", "a", ""]
+
+	###########
+	# __init__
+	###########
+
+	def test_base(self):
+		i = PrefixIndex()
+		self.assertEqual(len(i), 0)
+
+		i = PrefixIndex(self.keys)
+		self.assertEqual(len(i), len(self.keys))
+		self.assertEqual(i.keys(), sorted(self.keys))
+
+	###########
+	# add
+	###########
+
+	def test_add(self):
+		i = PrefixIndex()
+
+		self.assertEqual(i.add("fb"), [])
+		self.assertEqual(i.add("bq", [1]), [1])
+		self.assertEqual(i.add("bq", [2]), [1])
+
+		i["fb"].append(3)
+		self.assertEqual(i.items(), [("bq", [1]), ("fb", [3])])
+		self.assertEqual("fb" in i, True)
+		self.assertEqual("qq" in i, False)
+
+	###########
+	# startingWith
+	###########
+
+	def test_startingWith(self):
+		i = PrefixIndex(self.keys)
+
+		self.assertEqual(list(i.startingWith("fbbq")), ["fbbq", "fbbqaa"])
+		self.assertEqual(list(i.startingWith("bq")), ["bq", "bqfb"])
+		self.assertEqual(list(i.startingWith("z")), [])
+		self.assertEqual(list(i.startingWith("")), sorted(self.keys))
+
+	def test_startingWith_scan(self):
+		# same keys as the linear key.find(prefix) == 0 scan
+		i = PrefixIndex(self.keys)
+
+		for prefix in self.keys + ["f", "fbb", "bqf", "x"]:
+			self.assertEqual(list(i.startingWith(prefix)), sorted(k for k in self.keys if k.find(prefix) == 0))
+
+if __name__ == '__main__':
+	unittest.main()
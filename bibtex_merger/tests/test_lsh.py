@@ -0,0 +1,84 @@
+import unittest
+
+from bibtex_merger.lsh import *
+
+class test_lsh(unittest.TestCase):
+
+	titles = [	"A fast algorithm for merging bibliographies",
+				"A Fast Algorithm for Merging Bibliographies.",
+				"The fast algorithm for merging bibliography",
+				"Completely different topic of research",
+				""	]
+
+	###########
+	# shingles
+	###########
+
+	def test_shingles(self):
+		self.assertEqual(shingles("The Fancy", 3), set(["fan", "anc", "ncy"]))
+		self.assertEqual(shingles("Of ab", 3), set(["ab"]))
+		self.assertEqual(shingles("The", 3), set())
+
+	###########
+	# __init__
+	###########
+
+	def test_base(self):
+		l = MinHashLSH(numBands=20, numRows=5)
+
+		self.assertEqual(l.numBands, 20)
+		self.assertEqual(l.numRows, 5)
+		self.assertEqual(l.shingleSize, 3)
+		self.assertEqual(l.maxBucketSize, None)
+		self.assertEqual(len(l), 0)
+		self.assertAlmostEqual(l.threshold, (1.0 / 20) ** (1.0 / 5))
+
+	def test_base_bad(self):
+		self.assertRaises(ValueError, MinHashLSH, numBands=0)
+		self.assertRaises(ValueError, MinHashLSH, numBands="16")
+		self.assertRaises(ValueError, MinHashLSH, numRows=0)
+		self.assertRaises(ValueError, MinHashLSH, shingleSize=0)
+		self.assertRaises(ValueError, MinHashLSH, maxBucketSize=1)
+
+	###########
+	# signature
+	###########
+
+	def test_signature(self):
+		l = MinHashLSH(numBands=4, numRows=2)
+
+		self.assertEqual(len(l.signature(self.titles[0])), 8)
+		self.assertEqual(list(l.signature(self.titles[0])), list(l.signature(self.titles[1])))
+		self.assertEqual(l.signature(self.titles[4]), None)
+
+		# same seed, same hash functions
+		self.assertEqual(list(l.signature(self.titles[2])), list(MinHashLSH(numBands=4, numRows=2).signature(self.titles[2])))
+
+	###########
+	# candidates
+	###########
+
+	def test_candidates(self):
+		l = MinHashLSH()
+
+		self.assertEqual([l.add(i, t) for i, t in enumerate(self.titles)], [True, True, True, True, False])
+		self.assertEqual(len(l), 4)
+
+		pairs = list(l.candidates())
+		self.assertEqual(len(pairs), len(set(pairs)))
+		self.assertEqual(all(a < b for a, b in pairs), True)
+		self.assertEqual(sorted(pairs), [(0, 1), (0, 2), (1, 2)])
+		self.assertEqual(l.skipped, 0)
+
+	def test_candidates_maxBucketSize(self):
+		l = MinHashLSH(numBands=4, numRows=2, maxBucketSize=2)
+
+		# the identical titles share every bucket, all of them too large
+		for i in range(3):
+			l.add(i, self.titles[0])
+
+		self.assertEqual(list(l.candidates()), [])
+		self.assertEqual(l.skipped, 4)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -1,4 +1,4 @@
-import unittest, sys, os, tempfile, shutil
+import unittest, sys, os, tempfile, shutil, subprocess, numpy
 
 python2 = sys.version_info < (3, 0, 0)
 
@@ -8,7 +8,16 @@ else:
     from io import StringIO
 
 from bibtex_merger.merger import *
+from bibtex_merger.merger import comb2, authorArrays, shallowScores, deepDistances
+from bibtex_merger.blocking import AuthorCount, YearWindow
 from bibtex_merger.core import CoreError
+from bibtex_merger.scores import ScoreHistogram, ScoreReservoir
+
+class CustomMerger(BibTeX_Merger):
+	def __customizations__(self, record):
+		record = super(CustomMerger, self).__customizations__(record)
+		record["note"] = "customized"
+		return record
 
 class test_merger(unittest.TestCase):
 
@@ -48,6 +57,14 @@ class test_merger(unittest.TestCase):
 		m = BibTeX_Merger()
 		m.theta = "blue"
 
+	def mergerAttemptNumWorkersChange(self):
+		m = BibTeX_Merger(importDir=self.dataDir)
+		m.numWorkers = "blue"
+
+	def mergerAttemptStreamBudgetChange(self):
+		m = BibTeX_Merger(importDir=self.dataDir)
+		m.streamBudget = "blue"
+
 	###########
 	# __init__
 	###########
@@ -74,6 +91,12 @@ class test_merger(unittest.TestCase):
 		BibTeX_Merger(doLearning='remakeData')
 		BibTeX_Merger(doLearning='remakeModel')
 
+		BibTeX_Merger(numWorkers=1)
+		BibTeX_Merger(numWorkers=4)
+
+		BibTeX_Merger(streamBudget=None)
+		BibTeX_Merger(streamBudget=1024)
+
 	def test_base_bad(self):
 		self.assertRaises(ValueError, BibTeX_Merger, importDir=12345)
 		self.assertRaises(ValueError, BibTeX_Merger, importDir='12345')
@@ -94,6 +117,98 @@ class test_merger(unittest.TestCase):
 		self.assertRaises(ValueError, BibTeX_Merger, doLearning=12345)
 		self.assertRaises(ValueError, BibTeX_Merger, doLearning='12345')
 
+		self.assertRaises(ValueError, BibTeX_Merger, numWorkers='12345')
+		self.assertRaises(ValueError, BibTeX_Merger, numWorkers=0)
+
+		self.assertRaises(ValueError, BibTeX_Merger, streamBudget='12345')
+		self.assertRaises(ValueError, BibTeX_Merger, streamBudget=0)
+
+		self.assertRaises(ValueError, BibTeX_Merger, cacheSize='12345')
+		self.assertRaises(ValueError, BibTeX_Merger, cacheSize=-1)
+
+		self.assertRaises(ValueError, BibTeX_Merger, chunkSize='12345')
+		self.assertRaises(ValueError, BibTeX_Merger, chunkSize=0)
+
+		self.assertRaises(ValueError, BibTeX_Merger, nameCacheSize='12345')
+		self.assertRaises(ValueError, BibTeX_Merger, nameCacheSize=-1)
+
+		self.assertRaises(ValueError, BibTeX_Merger, blocking='authors')
+		self.assertRaises(ValueError, BibTeX_Merger, blocking=['nonexistent'])
+		self.assertRaises(ValueError, BibTeX_Merger, blocking=[AuthorCount])
+
+		self.assertRaises(ValueError, BibTeX_Merger, lshBands='16')
+		self.assertRaises(ValueError, BibTeX_Merger, lshBands=0)
+		self.assertRaises(ValueError, BibTeX_Merger, lshRows=None)
+		self.assertRaises(ValueError, BibTeX_Merger, lshRows=0)
+		self.assertRaises(ValueError, BibTeX_Merger, lshMaxBucketSize=1)
+		self.assertRaises(ValueError, BibTeX_Merger, lshMaxBucketSize='1000')
+
+		self.assertRaises(ValueError, BibTeX_Merger, tfidfK='5')
+		self.assertRaises(ValueError, BibTeX_Merger, tfidfK=0)
+		self.assertRaises(ValueError, BibTeX_Merger, tfidfChunk=0)
+		self.assertRaises(ValueError, BibTeX_Merger, tfidfFields='title')
+		self.assertRaises(ValueError, BibTeX_Merger, tfidfFields=[])
+		self.assertRaises(ValueError, BibTeX_Merger, tfidfMaxDF=0)
+		self.assertRaises(ValueError, BibTeX_Merger, tfidfMaxDF='0.1')
+
+		self.assertRaises(ValueError, BibTeX_Merger, exactMatch='True')
+		self.assertRaises(ValueError, BibTeX_Merger, exactMatch=1)
+
+		self.assertRaises(ValueError, BibTeX_Merger, maxBagSize=1)
+		self.assertRaises(ValueError, BibTeX_Merger, maxBagSize='10')
+		self.assertRaises(ValueError, BibTeX_Merger, splitting=['nonexistent'])
+
+		self.assertRaises(ValueError, BibTeX_Merger, reportFile=1)
+
+		self.assertRaises(ValueError, BibTeX_Merger, noAuthorBlocking='title')
+		self.assertRaises(ValueError, BibTeX_Merger, noAuthorBlocking=['nonexistent'])
+
+		self.assertRaises(ValueError, BibTeX_Merger, pipeline='True')
+		self.assertRaises(ValueError, BibTeX_Merger, pipeline=1)
+		self.assertRaises(ValueError, BibTeX_Merger, pipeline=True, maxBagSize=3)
+		self.assertRaises(ValueError, BibTeX_Merger, prefetch=0)
+		self.assertRaises(ValueError, BibTeX_Merger, prefetch='2')
+
+		self.assertRaises(ValueError, BibTeX_Merger, compareWorkers=0)
+		self.assertRaises(ValueError, BibTeX_Merger, compareWorkers='2')
+		self.assertRaises(ValueError, BibTeX_Merger, compareChunk=0)
+		self.assertRaises(ValueError, BibTeX_Merger, compareChunk=1.5)
+
+		self.assertRaises(ValueError, BibTeX_Merger, shallowBound=1)
+
+		self.assertRaises(ValueError, BibTeX_Merger, scoreBins=0)
+		self.assertRaises(ValueError, BibTeX_Merger, scoreExamples=-1)
+		self.assertRaises(ValueError, BibTeX_Merger, scoreReportFile=1)
+
+		self.assertRaises(ValueError, BibTeX_Merger, deepWorkers=0)
+		self.assertRaises(ValueError, BibTeX_Merger, deepWorkers='2')
+		self.assertRaises(ValueError, BibTeX_Merger, compareQueue=0)
+		self.assertRaises(ValueError, BibTeX_Merger, compareQueue=None)
+
+	###########
+	# import
+	###########
+
+	importTimeLimit = 5.0
+
+	def test_import_lazy(self):
+		code = "; ".join([
+			"import sys, time",
+			"start = time.time()",
+			"import bibtex_merger",
+			"print(time.time() - start)",
+			"print(' '.join(m for m in ['sklearn', 'scipy', 'bibtexparser'] if m in sys.modules))"])
+
+		out = subprocess.check_output([sys.executable, "-c", code]).decode("utf-8").split()
+
+		# the target is under 1 second (see README), the limit is generous
+		# enough for a loaded CI machine
+		self.assertLess(float(out[0]), self.importTimeLimit)
+
+		# the learning stack is only loaded once Learner runs, bibtexparser
+		# once a .bib file is first read
+		self.assertEqual(out[1:], [])
+
 	###########
 	# Properties
 	###########
@@ -146,6 +261,18 @@ class test_merger(unittest.TestCase):
 		m.doLearning
 		self.assertRaises(AttributeError, self.mergerAttemptDoLearningChange)
 
+	def test_numWorkers(self):
+		m = BibTeX_Merger(importDir=self.dataDir)
+
+		m.numWorkers
+		self.assertRaises(AttributeError, self.mergerAttemptNumWorkersChange)
+
+	def test_streamBudget(self):
+		m = BibTeX_Merger(importDir=self.dataDir)
+
+		m.streamBudget
+		self.assertRaises(AttributeError, self.mergerAttemptStreamBudgetChange)
+
 	###########
 	# Bib Extension
 	###########
@@ -157,6 +284,28 @@ class test_merger(unittest.TestCase):
 
 		m.__read__("{}/sample.bib".format(self.dataDir))
 
+	def test_bib_extension_stream(self):
+		m = BibTeX_Merger(importDir=self.dataDir, streamBudget=64)
+
+		entries = list(m.__parseFile__("{}/sample.bib".format(self.dataDir)))
+
+		self.assertEqual(len(entries), 6)
+		self.assertEqual([e["ID"] for e in entries], ["small1", "small2", "medium1", "medium2", "big1", "big2"])
+
+	def test_bib_extension_write(self):
+		m = BibTeX_Merger(importDir=self.dataDir)
+
+		f = "sample2.bib"
+		c = [{"ID": "a1", "ENTRYTYPE": "article", "title": "A title", "year": "2000"}]
+
+		m.__write__("{}/{}".format(self.dataDir, f), c)
+
+		c2 = m.__read__("{}/{}".format(self.dataDir, f))
+
+		self.assertEqual([dict((k, e[k]) for k in ["ID", "ENTRYTYPE", "title", "year"]) for e in c2.entries], c)
+
+		os.remove("{}/{}".format(self.dataDir, f))
+
 	def test_csv_extension_read(self):
 		m = BibTeX_Merger()
 
@@ -223,6 +372,44 @@ class test_merger(unittest.TestCase):
 
 		m.__run__()
 
+	def test_run_pipeline(self):
+		m = BibTeX_Merger(importDir=self.dataDir, exactMatch=False, pipeline=True, prefetch=1)
+
+		self.assertEqual(m.pipeline, True)
+		self.assertEqual(m.prefetch, 1)
+
+		# the default blocking bags every pair of entries in the round of its
+		# later entry, hence the pipeline compares exactly the same pairs
+		default = BibTeX_Merger(importDir=self.dataDir, exactMatch=False)
+		self.assertEqual(default.pipeline, False)
+
+		self.assertEqual(list(m.store), list(default.store))
+		self.assertEqual(m.deepCompared, default.deepCompared)
+		self.assertEqual(m.shallowCompares, default.shallowCompares)
+		self.assertEqual(m.maxCompares, default.maxCompares)
+		self.assertEqual(sum(m.allPredictionsClass), sum(default.allPredictionsClass))
+
+	def test_prefetch(self):
+		m = BibTeX_Merger(importDir=self.dataDir, pipeline=True)
+
+		importFiles, importPaths = m.__importInit__()
+		parsed = list(m.__prefetch__(importPaths))
+
+		# the list of entries of every file, parsed on its own
+		self.assertEqual(all(isinstance(entries, list) for entries in parsed), True)
+		self.assertEqual([len(entries) for entries in parsed], [len(m.__read__(path).entries) for path in importPaths])
+
+	def test_run_pipeline_exact(self):
+		m = BibTeX_Merger(importDir=self.dataDir, exactMatch=True, pipeline=True)
+		default = BibTeX_Merger(importDir=self.dataDir, exactMatch=True)
+
+		# the exact duplicates are looked up file by file
+		self.assertEqual(m.exactGroups, default.exactGroups)
+		self.assertEqual(m.exactCompares, default.exactCompares)
+		self.assertEqual(list(m.exactRedundant), list(default.exactRedundant))
+		self.assertEqual(m.blockingReport["entries"], default.blockingReport["entries"])
+		self.assertEqual(sum(len(d) for d in m.bag.values()), len(m.workUnits))
+
 	###########
 	# Import
 	###########
@@ -287,6 +474,133 @@ volume = {MMXV,
 
 		shutil.rmtree(tdir)
 
+	def test_Import_parallel(self):
+		tdir = tempfile.mkdtemp()
+
+		with open("{}/sample.bib".format(self.dataDir), "r") as o:
+			c = o.read()
+			for i in range(4):
+				with open("{}/sampleBib{}.bib".format(tdir, i), "w") as f:
+					f.write(c)
+
+		serial = BibTeX_Merger(importDir=tdir, numWorkers=1)
+		parallel = BibTeX_Merger(importDir=tdir, numWorkers=3)
+
+		self.assertEqual(parallel.__customized__(), False)
+		self.assertEqual(serial.tags, parallel.tags)
+		self.assertEqual(list(serial.store), list(parallel.store))
+
+		shutil.rmtree(tdir)
+
+	def test_Import_chunked(self):
+		tdir = tempfile.mkdtemp()
+
+		with open("{}/sample.bib".format(self.dataDir), "r") as o:
+			c = '@string{jsp = "The journal of small papers"}\n\n' + o.read()
+			c += '\n\n@article{small3,\nauthor = {Qux, B.},\ntitle = {Another small paper},\njournal = jsp,\n}\n'
+			with open("{}/sampleBib.bib".format(tdir), "w") as f:
+				f.write(c)
+
+		serial = BibTeX_Merger(importDir=tdir, numWorkers=1)
+		chunked = BibTeX_Merger(importDir=tdir, numWorkers=3, chunkSize=128)
+
+		self.assertEqual(list(serial.store), list(chunked.store))
+		self.assertEqual(chunked.store.get(len(chunked.store) - 1, "journal"), "The journal of small papers")
+
+		shutil.rmtree(tdir)
+
+	def test_Import_parallel_customized(self):
+		tdir = tempfile.mkdtemp()
+
+		with open("{}/sample.bib".format(self.dataDir), "r") as o:
+			c = o.read()
+			for i in range(2):
+				with open("{}/sampleBib{}.bib".format(tdir, i), "w") as f:
+					f.write(c)
+
+		serial = CustomMerger(importDir=tdir, numWorkers=1)
+		parallel = CustomMerger(importDir=tdir, numWorkers=3, chunkSize=128)
+
+		self.assertEqual(serial.__customized__(), True)
+		self.assertEqual(BibTeX_Merger.__customized__(parallel), True)
+		self.assertEqual(list(serial.store), list(parallel.store))
+		self.assertEqual(set(parallel.store.column("note")), set(["customized"]))
+
+		stream = CustomMerger(importDir=tdir, streamBudget=64)
+		self.assertEqual(list(serial.store), list(stream.store))
+
+		shutil.rmtree(tdir)
+
+	def test_Import_stream(self):
+		whole = BibTeX_Merger(importDir=self.dataDir)
+		stream = BibTeX_Merger(importDir=self.dataDir, streamBudget=64)
+
+		self.assertEqual(whole.tags, stream.tags)
+		self.assertEqual(list(whole.store), list(stream.store))
+
+	def test_Import_cache(self):
+		tdir = tempfile.mkdtemp()
+		home = os.environ.get("HOME")
+		os.environ["HOME"] = tdir
+
+		try:
+			first = BibTeX_Merger(importDir=self.dataDir, cacheSize=1048576)
+			self.assertEqual((first.parseCache.hits, first.parseCache.misses), (0, 1))
+
+			second = BibTeX_Merger(importDir=self.dataDir, cacheSize=1048576)
+			self.assertEqual((second.parseCache.hits, second.parseCache.misses), (1, 0))
+
+			self.assertEqual(list(first.store), list(second.store))
+		finally:
+			if home != None:
+				os.environ["HOME"] = home
+			shutil.rmtree(tdir)
+
+	###########
+	# ExactMatch
+	###########
+
+	def test_ExactMatch(self):
+		m = BibTeX_Merger(importDir=self.dataDir, exactMatch=True)
+
+		m.Import()
+		m.ExactMatch()
+
+		self.assertEqual(m.exactRedundant.dtype, numpy.bool_)
+		self.assertEqual(int(m.exactRedundant.sum()), sum(len(g) - 1 for g in m.exactGroups))
+		self.assertEqual(m.exactCompares, sum(len(g) * (len(g) - 1) // 2 for g in m.exactGroups))
+
+		# the first of every group stays, the others are left out of the bags
+		m.Bagging()
+		self.assertEqual(len(m.static_authors) + len(m.etal_authors) + len(m.no_authors) + int(m.exactRedundant.sum()), len(m.store))
+		for g in m.exactGroups:
+			self.assertEqual(m.exactRedundant[g[0]], False)
+
+	def test_ExactMatch_off(self):
+		m = BibTeX_Merger(importDir=self.dataDir, exactMatch=False)
+
+		self.assertEqual(BibTeX_Merger(importDir=self.dataDir).exactMatch, False)
+		self.assertEqual(m.exactGroups, [])
+		self.assertEqual(int(m.exactRedundant.sum()), 0)
+
+	###########
+	# Normalize
+	###########
+
+	def test_Normalize(self):
+		m = BibTeX_Merger(importDir=self.dataDir)
+
+		m.Import()
+		m.Normalize()
+
+		self.assertEqual(len(m.authorIDs), len(m.store))
+		# Qux B., Qix B., Bar Foo, Mutter Bell, Yall Howdy and others
+		self.assertEqual(len(m.authorTable), 6)
+
+		for row, ids in enumerate(m.authorIDs):
+			authors = m.store.get(row, "author")
+			self.assertEqual(len(ids), len(authors))
+
 	###########
 	# Bagging
 	###########
@@ -297,6 +611,120 @@ volume = {MMXV,
 		m.Import()
 		m.Bagging()
 
+	def test_Bagging_rows(self):
+		m = BibTeX_Merger(importDir=self.dataDir)
+
+		m.Import()
+		m.Bagging()
+
+		self.assertEqual(len(m.static_authors) + len(m.etal_authors) + len(m.no_authors), len(m.store))
+
+		for numAuthors, alpha_bag in m.bag.items():
+			for alpha_key, rows in alpha_bag.items():
+				self.assertEqual(rows.dtype, numpy.int32)
+				self.assertEqual(all(len(m.store.get(int(r), "author")) <= numAuthors for r in rows), True)
+
+	def test_Bagging_pairs(self):
+		m = BibTeX_Merger(importDir=self.dataDir)
+
+		m.Import()
+		m.Bagging()
+
+		pairs = [(e1, int(e2)) for l, a, e1, partners in m.__candidatePairs__() for e2 in partners]
+		unique = set(tuple(sorted(p)) for p in pairs)
+
+		# every unordered pair exactly once, never an entry with itself
+		self.assertEqual(len(pairs), len(unique))
+		self.assertEqual(all(e1 != e2 for e1, e2 in pairs), True)
+
+		# and no pair of any bag is lost
+		bagged = set()
+		for numAuthors, alpha_bag in m.bag.items():
+			for alpha_key, rows in alpha_bag.items():
+				rows = [int(r) for r in rows]
+				bagged.update(tuple(sorted((rows[i], rows[j]))) for i in range(len(rows)) for j in range(i + 1, len(rows)) if rows[i] != rows[j])
+		self.assertEqual(unique, bagged)
+
+		self.assertEqual(m.maxCompares, len(pairs))
+		self.assertEqual(m.redundantCompares, m.bagCompares - m.maxCompares)
+
+	def test_Bagging_blocking(self):
+		m = BibTeX_Merger(importDir=self.dataDir, blocking=['authors', YearWindow(window=1), 'venue'])
+
+		self.assertEqual([s.name for s in m.blocking], ['authors', 'year', 'venue'])
+		self.assertEqual([name for name, n in m.blockingCompares], ['authors', 'year', 'venue'])
+
+		# the first strategy splits the entries just like the default blocking
+		default = BibTeX_Merger(importDir=self.dataDir)
+		self.assertEqual(m.blockingCompares[0], default.blockingCompares[0])
+
+		for numAuthors, alpha_bag in m.bag.items():
+			for (year, venue), rows in alpha_bag.items():
+				self.assertEqual(all(len(m.store.get(int(r), "author")) <= numAuthors for r in rows), True)
+
+	def test_Bagging_split(self):
+		m = BibTeX_Merger(importDir=self.dataDir, maxBagSize=4)
+		default = BibTeX_Merger(importDir=self.dataDir)
+
+		self.assertEqual(m.maxBagSize, 4)
+		self.assertEqual([s.name for s in m.splitting], ['lastnames', 'year', 'title'])
+
+		sizes = [len(m.bag[l][a]) for l, a in m.workUnits]
+		self.assertEqual(sizes, sorted(sizes, reverse=True))
+		self.assertEqual(len(m.workUnits), sum(len(d) for d in m.bag.values()))
+
+		# splitting only ever drops pairs
+		self.assertEqual(m.maxCompares <= default.maxCompares, True)
+		self.assertEqual(max(sizes) <= max(len(m.bag[l][a]) for l, a in default.workUnits), True)
+
+	def test_Bagging_report(self):
+		d = tempfile.mkdtemp()
+		try:
+			f = os.path.join(d, "report.json")
+			m = BibTeX_Merger(importDir=self.dataDir, reportFile=f)
+
+			report = m.__read__(f)
+		finally:
+			shutil.rmtree(d)
+
+		self.assertEqual(report["stages"][0]["stage"], "none")
+		self.assertEqual([s["stage"] for s in report["stages"]], ["none", "authors", "initials"])
+		self.assertEqual(report["allPairs"], report["stages"][0]["uniquePairs"])
+
+		for stage in report["stages"]:
+			self.assertEqual(sum(n for size, n in stage["histogram"]), stage["bags"])
+			self.assertEqual(stage["uniquePairs"] <= stage["pairs"], True)
+			self.assertEqual(0.0 <= stage["reductionRatio"] <= 1.0, True)
+
+		self.assertEqual(report["stages"][-1]["uniquePairs"], m.maxCompares)
+		self.assertEqual(report["uniquePairs"], m.maxCompares)
+
+	def test_Bagging_report_off(self):
+		m = BibTeX_Merger(importDir=self.dataDir)
+
+		# the report is kept, only without the deduplicated counts
+		self.assertEqual([s["stage"] for s in m.blockingReport["stages"]], ["none", "authors", "initials"])
+		self.assertEqual("uniquePairs" in m.blockingReport["stages"][-1], False)
+
+	def test_Bagging_noAuthors(self):
+		m = BibTeX_Merger(importDir=self.dataDir, noAuthorBlocking=['title', 'year', 'imprint'])
+
+		self.assertEqual([s.name for s in m.noAuthorBlocking], ['title', 'year', 'imprint'])
+
+		for key, rows in m.noAuthorBag.items():
+			self.assertEqual(all(m.store.get(int(r), "author") == None for r in rows), True)
+
+		self.assertEqual(m.blockingReport["noAuthors"]["entries"], len(m.no_authors))
+		self.assertEqual(m.noAuthorCompares <= comb2(len(m.no_authors)), True)
+
+	def test_Bagging_noAuthors_off(self):
+		m = BibTeX_Merger(importDir=self.dataDir, noAuthorBlocking=None)
+
+		self.assertEqual(BibTeX_Merger(importDir=self.dataDir).noAuthorBlocking, None)
+		self.assertEqual(m.noAuthorBag, {})
+		self.assertEqual(m.noAuthorCompares, 0)
+		self.assertEqual("noAuthors" in m.blockingReport, False)
+
 	###########
 	# ShallowCompare
 	###########
@@ -305,6 +733,197 @@ volume = {MMXV,
 		m = BibTeX_Merger(importDir=self.dataDir)
 
 		m.Import()
+		m.Normalize()
 		m.Bagging()
 		m.ShallowCompare()
 
+	def test_ShallowCompare_nameCache(self):
+		cached = BibTeX_Merger(importDir=self.dataDir)
+		uncached = BibTeX_Merger(importDir=self.dataDir, nameCacheSize=0)
+
+		self.assertEqual(cached.shallowCompares, uncached.shallowCompares)
+		self.assertEqual(cached.deepCompares, uncached.deepCompares)
+		self.assertEqual(cached.nameCache.hits + cached.nameCache.misses, uncached.nameCache.misses)
+		self.assertEqual(uncached.nameCache.hits, 0)
+
+	def test_authorArrays(self):
+		others = [False, False, True]
+		ptr, flat, lengths = authorArrays([(0, 1), None, (1, 2)], others)
+
+		self.assertEqual(ptr.tolist(), [0, 2, 2, 4])
+		self.assertEqual(flat.tolist(), [0, 1, 1, 2])
+		self.assertEqual(lengths.tolist(), [2, 0, 1])
+
+	def test_shallowScores(self):
+		# authors: 0 = J. Smith, 1 = Jane Smith, 2 = Bob Brown, 3 = others
+		table = (["J.", "Jane", "Bob", ""], ["Smith", "Smith", "Brown", ""], numpy.array([True, False, False, False]), ["J", "J", "B", ""], ["S", "S", "B", ""])
+		authorIDs = [(0,), (1, 3), (2,), (1, 2)]
+		authors = (authorIDs,) + authorArrays(authorIDs, [False, False, False, True])
+
+		def scores(name1, soundex1, name2, soundex2):
+			return (1.0, 1.0) if name1 == name2 else (0.5, 0.5)
+
+		chunk = [(0, numpy.array([1, 2, 3])), (1, numpy.array([2, 3])), (2, numpy.array([3]))]
+		histogram = ScoreHistogram(numBins=4)
+		reservoir = ScoreReservoir(size=2, target=3.4)
+		compared, deep, authorCompares, authorSkipped = shallowScores(chunk, authors, table, scores, 3.4, histogram=histogram, reservoir=reservoir)
+
+		# only the first authors are compared, an abbreviation always matches
+		self.assertEqual(compared, 6)
+		self.assertEqual(deep, [(0, 1), (0, 3), (1, 3)])
+		self.assertEqual((authorCompares, authorSkipped), (6, 0))
+
+		# scores 4, 2.25, 4, 1, 4, 1
+		self.assertEqual(histogram.counts.tolist(), [0, 2, 1, 3])
+		self.assertEqual(reservoir.items(), [(4.0, (0, 1)), (4.0, (0, 3))])
+
+		self.assertEqual(shallowScores([(0, numpy.array([], dtype=numpy.int32))], authors, table, scores, 3.4), (0, [], 0, 0))
+
+	def test_shallowScores_bound(self):
+		# authors: 0 = Bob Brown, 1 = Jane Smith, 2 = Carl White
+		table = (["Bob", "Jane", "Carl"], ["Brown", "Smith", "White"], numpy.array([False, False, False]), ["B", "J", "C"], ["B", "S", "W"])
+		authorIDs = [(0, 1, 2), (1, 1, 2), (0, 1, 2)]
+		authors = (authorIDs,) + authorArrays(authorIDs, [False, False, False])
+
+		def scores(name1, soundex1, name2, soundex2):
+			return (1.0, 1.0) if name1 == name2 else (0.0, 0.0)
+
+		chunk = [(0, numpy.array([1, 2]))]
+		histogram = ScoreHistogram()
+		full = shallowScores(chunk, authors, table, scores, 3.4)
+		bounded = shallowScores(chunk, authors, table, scores, 3.4, bound=True, histogram=histogram)
+
+		# 0 and 1 differ on their first author, hence can reach at most
+		# (4 / 3) ** 2 < 3.4 and are abandoned right away
+		self.assertEqual(full[:2], (2, [(0, 2)]))
+		self.assertEqual(bounded[:2], (2, [(0, 2)]))
+		self.assertEqual(full[2:], (6, 0))
+		self.assertEqual(bounded[2:], (4, 2))
+
+		# only the pair scored in full is counted
+		self.assertEqual(len(histogram), 1)
+
+	def test_ShallowCompare_scores(self):
+		tdir = tempfile.mkdtemp()
+		try:
+			f = os.path.join(tdir, "scores.json")
+			m = BibTeX_Merger(importDir=self.dataDir, scoreBins=8, scoreExamples=3, scoreReportFile=f)
+
+			self.assertEqual((m.scoreBins, m.scoreExamples, m.scoreReportFile), (8, 3, f))
+
+			# every shallow comparison is counted, only a few examples are kept
+			self.assertEqual(len(m.scoreHistogram.counts), 8)
+			self.assertEqual(len(m.scoreHistogram), m.shallowCompares)
+			self.assertEqual(len(m.scoreReport["examples"]), min(3, m.shallowCompares))
+
+			self.assertEqual(m.__read__(f), m.scoreReport)
+		finally:
+			shutil.rmtree(tdir)
+
+	def test_ShallowCompare_bound(self):
+		m = BibTeX_Merger(importDir=self.dataDir, shallowBound=True)
+		default = BibTeX_Merger(importDir=self.dataDir)
+
+		self.assertEqual(m.shallowBound, True)
+		self.assertEqual(default.shallowBound, False)
+
+		# only the hopeless pairs are abandoned, the deep comparisons are the same
+		self.assertEqual(m.deepCompared, default.deepCompared)
+		self.assertEqual(m.allPredictions, default.allPredictions)
+		self.assertEqual(m.authorCompares + m.authorSkipped, default.authorCompares)
+		self.assertEqual(default.authorSkipped, 0)
+
+	def test_ShallowCompare_parallel(self):
+		serial = BibTeX_Merger(importDir=self.dataDir, compareChunk=7)
+		parallel = BibTeX_Merger(importDir=self.dataDir, compareWorkers=2, compareChunk=7)
+
+		self.assertEqual(parallel.compareWorkers, 2)
+		self.assertEqual(parallel.compareChunk, 7)
+
+		# the chunks are merged back in order, hence the very same results
+		self.assertEqual(parallel.shallowCompares, serial.shallowCompares)
+		self.assertEqual(parallel.deepCompares, serial.deepCompares)
+		self.assertEqual(parallel.numComp, serial.numComp)
+		self.assertEqual(parallel.allPredictions, serial.allPredictions)
+		self.assertEqual(parallel.allPredictionsClass, serial.allPredictionsClass)
+		self.assertEqual(parallel.nameCache.hits + parallel.nameCache.misses, serial.nameCache.hits + serial.nameCache.misses)
+
+	def test_ShallowCompare_parallel_report(self):
+		serialOut, parallelOut = StringIO(), StringIO()
+		BibTeX_Merger(out=serialOut, importDir=self.dataDir)
+		BibTeX_Merger(out=parallelOut, importDir=self.dataDir, compareWorkers=2)
+
+		# the worker caches are reported on their own, the statistics before them are the same
+		serialReport, serialCache = serialOut.getvalue().split("name pair cache (")
+		parallelReport, parallelCache = parallelOut.getvalue().split("name pair cache (")
+		self.assertEqual(parallelReport, serialReport)
+		self.assertTrue(serialCache.startswith("one cache)"))
+		self.assertTrue(parallelCache.startswith("summed over 2 worker caches)"))
+
+	def test_ShallowCompare_deepWorkers(self):
+		serial = BibTeX_Merger(importDir=self.dataDir)
+		staged = BibTeX_Merger(importDir=self.dataDir, compareWorkers=2, deepWorkers=3, compareChunk=5, compareQueue=1)
+
+		self.assertEqual(staged.deepWorkers, 3)
+		self.assertEqual(staged.compareQueue, 1)
+
+		# the deep pairs are labeled in the very same order
+		self.assertEqual(staged.deepCompares, serial.deepCompares)
+		self.assertEqual(staged.deepCompared, serial.deepCompared)
+		self.assertEqual(staged.allPredictions, serial.allPredictions)
+		self.assertEqual(staged.numComp, serial.numComp)
+
+	###########
+	# DeepCompare
+	###########
+
+	def test_deepDistances(self):
+		m = BibTeX_Merger(importDir=self.dataDir)
+
+		l = deepDistances(m.store, m.defaultKeysToDeepComp, 0, 0)
+		self.assertEqual(all(d == 0 for d in l.values()), True)
+		self.assertEqual(set(l) <= set(m.defaultKeysToDeepComp), True)
+
+	###########
+	# TitleCompare
+	###########
+
+	def test_TitleCompare(self):
+		m = BibTeX_Merger(importDir=self.dataDir, lshBands=16, lshRows=4, lshMaxBucketSize=100)
+
+		self.assertEqual(m.lshBands, 16)
+		self.assertEqual(m.lshRows, 4)
+		self.assertEqual(m.lshMaxBucketSize, 100)
+
+		# every title pair is deep compared at most once, whichever stage found it
+		self.assertEqual(len(m.deepCompared), m.deepCompares)
+
+		default = BibTeX_Merger(importDir=self.dataDir)
+		self.assertEqual(default.lshBands, None)
+		self.assertEqual(m.deepCompares >= default.deepCompares, True)
+
+	###########
+	# NeighbourCompare
+	###########
+
+	def test_NeighbourCompare(self):
+		m = BibTeX_Merger(importDir=self.dataDir, tfidfK=3, tfidfChunk=16, tfidfFields=['title', 'journal', 'booktitle'], tfidfMaxDF=0.5)
+
+		self.assertEqual(m.tfidfK, 3)
+		self.assertEqual(m.tfidfChunk, 16)
+		self.assertEqual(m.tfidfFields, ['title', 'journal', 'booktitle'])
+		self.assertEqual(m.tfidfMaxDF, 0.5)
+
+		# at most k neighbours per entry, each pair deep compared at most once
+		self.assertEqual(m.neighbourCompares <= 3 * len(m.store), True)
+		self.assertEqual(len(m.deepCompared), m.deepCompares)
+
+	def test_NeighbourCompare_maxDF(self):
+		m = BibTeX_Merger(importDir=self.dataDir, tfidfK=3)
+
+		self.assertEqual(m.tfidfMaxDF, 0.1)
+
+		# a few entries still give candidate pairs at the default maxDF
+		self.assertEqual(len(m.store) < 20, True)
+		self.assertEqual(m.neighbourCompares > 0, True)
+
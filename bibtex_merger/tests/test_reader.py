@@ -0,0 +1,138 @@
+import unittest, sys, os, tempfile, shutil
+
+python2 = sys.version_info < (3, 0, 0)
+
+if python2:
+    from StringIO import StringIO
+else:
+    from io import StringIO
+
+from bibtex_merger.reader import *
+
+class test_reader(unittest.TestCase):
+
+	dataDir = "bibtex_merger/tests/data"
+
+	sample = """% leading comment
+@string(jsp = "The journal of small papers")
+
+@article{small1,
+author = {Qux, B.},
+title = {A {small} paper},
+journal = jsp,
+}
+
+stray text @ between entries
+
+@misc{misc1, title = {(unbalanced) parens are fine}}
+"""
+
+	###########
+	# entryBlocks
+	###########
+
+	def test_entryBlocks(self):
+		blocks = list(entryBlocks(StringIO(self.sample)))
+
+		self.assertEqual(len(blocks), 3)
+		self.assertEqual(blocks[0], '@string(jsp = "The journal of small papers")')
+		self.assertEqual(blocks[1][:15], "@article{small1")
+		self.assertEqual(blocks[1][-1], "}")
+		self.assertEqual(blocks[2], "@misc{misc1, title = {(unbalanced) parens are fine}}")
+
+	def test_entryBlocks_chunkSize(self):
+		expected = list(entryBlocks(StringIO(self.sample)))
+
+		for chunkSize in [1, 2, 3, 7, 64]:
+			self.assertEqual(list(entryBlocks(StringIO(self.sample), chunkSize=chunkSize)), expected)
+
+	def test_entryBlocks_file(self):
+		with open("{}/sample.bib".format(self.dataDir), "r") as f:
+			blocks = list(entryBlocks(f, chunkSize=16))
+
+		self.assertEqual(len(blocks), 6)
+		self.assertEqual(all(b[0] == "@" and b[-1] == "}" for b in blocks), True)
+
+	def test_entryBlocks_unbalanced(self):
+		c = "@article{bad,\ntitle = {oops,\n}\n\n@article{good,\ntitle = {fine},\n}\n"
+
+		blocks = list(entryBlocks(StringIO(c)))
+
+		self.assertEqual(len(blocks), 2)
+		self.assertEqual(blocks[1], "@article{good,\ntitle = {fine},\n}")
+
+	def test_entryBlocks_bad(self):
+		self.assertRaises(ValueError, list, entryBlocks(StringIO(self.sample), chunkSize=0))
+		self.assertRaises(ValueError, list, entryBlocks(StringIO(self.sample), chunkSize="1"))
+
+	###########
+	# streamEntries
+	###########
+
+	def test_streamEntries_bad(self):
+		self.assertRaises(ValueError, list, streamEntries(StringIO(self.sample), None, budget=0))
+
+	###########
+	# chunkRanges
+	###########
+
+	strings = """@string{a = "x"}
+@misc{m1, title = a}
+@STRING(b = "y")
+@misc{m2, title = b}
+@misc{m3, title = {b}}
+"""
+
+	def tFile(self, content):
+		self.tdir = tempfile.mkdtemp()
+
+		filename = os.path.join(self.tdir, "sample.bib")
+		with open(filename, "w") as f:
+			f.write(content)
+
+		return filename
+
+	def tearDown(self):
+		if hasattr(self, "tdir"):
+			shutil.rmtree(self.tdir)
+
+	def test_chunkRanges(self):
+		filename = self.tFile(self.sample)
+
+		whole = list(entryBlocks(StringIO(readRange(filename, 0, len(self.sample)))))
+
+		for chunkSize in [1, 16, 64, 4096]:
+			blocks = []
+			for start, end, strings in chunkRanges(filename, chunkSize):
+				blocks += list(entryBlocks(StringIO(readRange(filename, start, end))))
+
+			self.assertEqual([b.rstrip() for b in blocks], [b.rstrip() for b in whole])
+
+	def test_chunkRanges_strings(self):
+		filename = self.tFile(self.strings)
+
+		ranges = chunkRanges(filename, 1)
+
+		self.assertEqual(len(ranges), 5)
+		self.assertEqual([r[2] for r in ranges], [
+			b'',
+			b'@string{a = "x"}',
+			b'@string{a = "x"}',
+			b'@string{a = "x"}\n\n@STRING(b = "y")',
+			b'@string{a = "x"}\n\n@STRING(b = "y")'])
+
+		self.assertEqual(readRange(filename, *ranges[3]), '@string{a = "x"}\n\n@STRING(b = "y")\n\n@misc{m2, title = b}\n')
+
+	def test_chunkRanges_empty(self):
+		filename = self.tFile("")
+
+		self.assertEqual(chunkRanges(filename, 16), [(0, 0, b"")])
+
+	def test_chunkRanges_bad(self):
+		filename = self.tFile(self.sample)
+
+		self.assertRaises(ValueError, chunkRanges, filename, 0)
+		self.assertRaises(ValueError, chunkRanges, filename, "16")
+
+if __name__ == '__main__':
+	unittest.main()
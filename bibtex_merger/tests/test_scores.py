@@ -0,0 +1,121 @@
+import unittest, numpy
+
+from bibtex_merger.scores import *
+
+class test_score_histogram(unittest.TestCase):
+
+	###########
+	# __init__
+	###########
+
+	def test_base(self):
+		h = ScoreHistogram()
+		self.assertEqual((h.low, h.high, h.numBins), (0.0, 4.0, 40))
+		self.assertEqual(len(h), 0)
+		self.assertEqual(len(h.edges), 41)
+
+	def test_base_bad(self):
+		self.assertRaises(ValueError, ScoreHistogram, low=1, high=1)
+		self.assertRaises(ValueError, ScoreHistogram, high='4')
+		self.assertRaises(ValueError, ScoreHistogram, numBins=0)
+		self.assertRaises(ValueError, ScoreHistogram, numBins=2.0)
+
+	###########
+	# add
+	###########
+
+	def test_add(self):
+		h = ScoreHistogram(0, 4, 4)
+
+		h.add(numpy.array([0.0, 0.5, 1.0, 3.9, 4.0, 5.0, -1.0, numpy.nan]))
+
+		# out of range scores go in the first/last bin, NaNs are not counted
+		self.assertEqual(h.counts.tolist(), [3, 1, 0, 3])
+		self.assertEqual(len(h), 7)
+
+	###########
+	# merge
+	###########
+
+	def test_merge(self):
+		a = ScoreHistogram(0, 4, 4)
+		b = a.empty()
+
+		a.add([0.5, 1.5])
+		b.add([1.5, 2.5])
+		a.merge(b)
+
+		self.assertEqual(a.counts.tolist(), [1, 2, 1, 0])
+		self.assertEqual(b.counts.tolist(), [0, 1, 1, 0])
+
+		self.assertRaises(ValueError, a.merge, ScoreHistogram(0, 4, 8))
+
+	def test_report(self):
+		h = ScoreHistogram(0, 2, 2)
+		h.add([1.5])
+
+		self.assertEqual(h.report(), {"low": 0.0, "high": 2.0, "total": 1, "counts": [0, 1]})
+
+class test_score_reservoir(unittest.TestCase):
+
+	###########
+	# __init__
+	###########
+
+	def test_base(self):
+		r = ScoreReservoir()
+		self.assertEqual((r.size, r.target), (0, 0.0))
+		self.assertEqual(len(r), 0)
+
+	def test_base_bad(self):
+		self.assertRaises(ValueError, ScoreReservoir, size=-1)
+		self.assertRaises(ValueError, ScoreReservoir, size=1.0)
+		self.assertRaises(ValueError, ScoreReservoir, target='3.4')
+
+	###########
+	# add
+	###########
+
+	def test_add(self):
+		r = ScoreReservoir(size=2, target=3.0)
+
+		r.add(numpy.array([1.0, 3.5, 2.9, 4.0]), [(0, 1), (0, 2), (0, 3), (0, 4)])
+		self.assertEqual(r.items(), [(2.9, (0, 3)), (3.5, (0, 2))])
+
+		r.add(numpy.array([3.0]), [(1, 2)])
+		self.assertEqual(r.items(), [(3.0, (1, 2)), (2.9, (0, 3))])
+
+	def test_add_off(self):
+		r = ScoreReservoir(size=0, target=3.0)
+
+		r.add(numpy.array([3.0]), [(1, 2)])
+		self.assertEqual(r.items(), [])
+
+	def test_add_ties(self):
+		# ties are broken by item, whatever the order they come in
+		a = ScoreReservoir(size=2, target=1.0)
+		b = ScoreReservoir(size=2, target=1.0)
+
+		a.add(numpy.array([1.0, 1.0, 1.0]), [(3, 4), (1, 2), (2, 3)])
+		b.add(numpy.array([1.0]), [(2, 3)])
+		b.add(numpy.array([1.0, 1.0]), [(1, 2), (3, 4)])
+
+		self.assertEqual(a.items(), [(1.0, (1, 2)), (1.0, (2, 3))])
+		self.assertEqual(a.items(), b.items())
+
+	###########
+	# merge
+	###########
+
+	def test_merge(self):
+		a = ScoreReservoir(size=2, target=0.0)
+		b = a.empty()
+
+		a.add(numpy.array([0.5, 2.0]), [(0, 1), (0, 2)])
+		b.add(numpy.array([-0.1, 1.0]), [(1, 2), (1, 3)])
+		a.merge(b)
+
+		self.assertEqual(a.items(), [(-0.1, (1, 2)), (0.5, (0, 1))])
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+
+from bibtex_merger.similarity import *
+
+class test_similarity(unittest.TestCase):
+
+	###########
+	# nameScores
+	###########
+
+	def test_nameScores(self):
+		self.assertEqual(nameScores("Qux", "Q200", "Qux", "Q200"), (1.0, 1.0))
+
+		edit, phon = nameScores("Qux", "Q200", "Qix", "Q200")
+		self.assertEqual(edit < 1.0, True)
+		self.assertEqual(phon, 1.0)
+
+		edit, phon = nameScores("Qux", "Q200", "Bar", "B600", lenSoundex=4)
+		self.assertEqual(phon, 0.5)
+
+	###########
+	# NamePairCache
+	###########
+
+	def test_base(self):
+		NamePairCache()
+		NamePairCache(lenSoundex=4, maxSize=0)
+
+	def test_base_bad(self):
+		self.assertRaises(ValueError, NamePairCache, lenSoundex=0)
+		self.assertRaises(ValueError, NamePairCache, lenSoundex="10")
+		self.assertRaises(ValueError, NamePairCache, maxSize=-1)
+		self.assertRaises(ValueError, NamePairCache, maxSize="10")
+
+	def test_scores(self):
+		c = NamePairCache()
+
+		self.assertEqual(c.scores("Qux", "Q200", "Qix", "Q200"), nameScores("Qux", "Q200", "Qix", "Q200"))
+		self.assertEqual((c.hits, c.misses), (0, 1))
+
+		# unordered pair
+		self.assertEqual(c.scores("Qix", "Q200", "Qux", "Q200"), nameScores("Qux", "Q200", "Qix", "Q200"))
+		self.assertEqual((c.hits, c.misses), (1, 1))
+
+	def test_lru(self):
+		c = NamePairCache(maxSize=2)
+
+		c.scores("a", "A000", "b", "B000")
+		c.scores("a", "A000", "c", "C000")
+		# touch (a, b) s.t. (a, c) is the least recently used
+		c.scores("a", "A000", "b", "B000")
+		c.scores("a", "A000", "d", "D000")
+
+		self.assertEqual(len(c), 2)
+
+		c.scores("a", "A000", "b", "B000")
+		self.assertEqual((c.hits, c.misses), (2, 3))
+
+		c.scores("a", "A000", "c", "C000")
+		self.assertEqual((c.hits, c.misses), (2, 4))
+
+	def test_disabled(self):
+		c = NamePairCache(maxSize=0)
+
+		c.scores("a", "A000", "b", "B000")
+		c.scores("a", "A000", "b", "B000")
+
+		self.assertEqual(len(c), 0)
+		self.assertEqual((c.hits, c.misses), (0, 2))
+
+	def test_clear(self):
+		c = NamePairCache()
+
+		c.scores("a", "A000", "b", "B000")
+		c.clear()
+
+		self.assertEqual(len(c), 0)
+		self.assertEqual((c.hits, c.misses), (0, 0))
+
+	def test_tally(self):
+		c = NamePairCache()
+
+		c.scores("a", "A000", "b", "B000")
+		c.tally(3, 2)
+
+		self.assertEqual(len(c), 1)
+		self.assertEqual((c.hits, c.misses), (3, 3))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+from bibtex_merger.store import *
+
+class test_store(unittest.TestCase):
+
+	entries = [	{"ID": "small1", "author": [["B.", "Qux"]], "title": "A small paper"},
+				{"ID": "small2", "journal": "The journal of fancy papers"},
+				{"ID": "big1", "author": [["Foo", "Bar"]], "year": "5102"}	]
+
+	###########
+	# __init__
+	###########
+
+	def test_base(self):
+		s = EntryStore()
+		self.assertEqual(len(s), 0)
+
+		s = EntryStore(self.entries)
+		self.assertEqual(len(s), 3)
+
+	def test_append_bad(self):
+		s = EntryStore()
+
+		self.assertRaises(ValueError, s.append, "nondict")
+		self.assertRaises(ValueError, s.append, [("ID", "small1")])
+
+	###########
+	# rows
+	###########
+
+	def test_append(self):
+		s = EntryStore()
+
+		self.assertEqual([s.append(e) for e in self.entries], [0, 1, 2])
+
+	def test_row(self):
+		s = EntryStore(self.entries)
+
+		self.assertEqual([s.row(i) for i in range(len(s))], self.entries)
+		self.assertEqual(list(s), self.entries)
+
+		self.assertRaises(IndexError, s.row, 3)
+		self.assertRaises(IndexError, s.row, -1)
+
+	###########
+	# columns
+	###########
+
+	def test_fields(self):
+		s = EntryStore(self.entries)
+
+		self.assertEqual(sorted(s.fields), ["ID", "author", "journal", "title", "year"])
+
+	def test_column(self):
+		s = EntryStore(self.entries)
+
+		self.assertEqual(s.column("ID"), ["small1", "small2", "big1"])
+		self.assertEqual(s.column("year"), [None, None, "5102"])
+		self.assertEqual(s.column("missing"), [None, None, None])
+
+	def test_get(self):
+		s = EntryStore(self.entries)
+
+		self.assertEqual(s.get(0, "title"), "A small paper")
+		self.assertEqual(s.get(1, "title"), None)
+		self.assertEqual(s.get(1, "title", ""), "")
+		self.assertEqual(s.get(1, "missing"), None)
+
+	def test_has(self):
+		s = EntryStore(self.entries)
+
+		self.assertEqual(s.has(0, "author"), True)
+		self.assertEqual(s.has(1, "author"), False)
+		self.assertEqual(s.has(1, "missing"), False)
+
+if __name__ == '__main__':
+	unittest.main()
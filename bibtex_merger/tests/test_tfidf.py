@@ -0,0 +1,84 @@
+import unittest
+
+from bibtex_merger.tfidf import *
+
+class test_tfidf(unittest.TestCase):
+
+	texts = [	"A fast algorithm for merging bibliographies",
+				"Completely different topic of research",
+				"A Fast Algorithm for Merging Bibliographies.",
+				None,
+				"Fast merging of bibliographies",
+				"A different research topic"	]
+
+	###########
+	# __init__
+	###########
+
+	def test_base(self):
+		t = TfidfNeighbours(k=2, chunkSize=3)
+
+		self.assertEqual(t.k, 2)
+		self.assertEqual(t.chunkSize, 3)
+		self.assertEqual(t.ngram, 3)
+		self.assertEqual(t.maxDF, 0.1)
+		self.assertEqual(len(t), 0)
+		self.assertEqual(list(t.neighbours()), [])
+
+	def test_base_bad(self):
+		self.assertRaises(ValueError, TfidfNeighbours, k=0)
+		self.assertRaises(ValueError, TfidfNeighbours, k="5")
+		self.assertRaises(ValueError, TfidfNeighbours, chunkSize=0)
+		self.assertRaises(ValueError, TfidfNeighbours, ngram=0)
+		self.assertRaises(ValueError, TfidfNeighbours, maxDF=0)
+		self.assertRaises(ValueError, TfidfNeighbours, maxDF=1.5)
+		self.assertRaises(ValueError, TfidfNeighbours, maxProducts=0)
+		self.assertRaises(ValueError, TfidfNeighbours, minScore=None)
+
+	###########
+	# neighbours
+	###########
+
+	def test_neighbours(self):
+		t = TfidfNeighbours(k=1, maxDF=1).fit(self.texts)
+
+		self.assertEqual(len(t), len(self.texts))
+
+		top = dict((text, (neighbour, score)) for text, neighbour, score in t.neighbours())
+
+		self.assertEqual(top[0][0], 2)
+		self.assertAlmostEqual(top[0][1], 1.0)
+		self.assertEqual(top[1][0], 5)
+		self.assertEqual(3 in top, False)
+
+	def test_neighbours_maxDF(self):
+		# the default maxDF of a handful of texts still keeps the n-grams of
+		# (only) two texts
+		top = dict((text, neighbour) for text, neighbour, score in TfidfNeighbours(k=1).fit(self.texts).neighbours())
+
+		self.assertEqual(top[0], 2)
+		self.assertEqual(top[2], 0)
+
+	def test_neighbours_chunked(self):
+		whole	= list(TfidfNeighbours(k=2, chunkSize=len(self.texts)).fit(self.texts).neighbours())
+		chunked	= list(TfidfNeighbours(k=2, chunkSize=1).fit(self.texts).neighbours())
+
+		self.assertEqual(whole, chunked)
+
+	def test_neighbours_maxProducts(self):
+		whole	= list(TfidfNeighbours(k=2, maxDF=1).fit(self.texts).neighbours())
+		bounded	= list(TfidfNeighbours(k=2, maxDF=1, maxProducts=1).fit(self.texts).neighbours())
+
+		self.assertEqual(len(whole) > 0, True)
+		self.assertEqual(whole, bounded)
+
+	def test_pairs(self):
+		pairs = list(TfidfNeighbours(k=2, maxDF=1).fit(self.texts).pairs())
+
+		self.assertEqual(len(pairs), len(set(pairs)))
+		self.assertEqual(all(a < b for a, b in pairs), True)
+		self.assertEqual((0, 2) in pairs, True)
+		self.assertEqual(any(3 in p for p in pairs), False)
+
+if __name__ == '__main__':
+	unittest.main()
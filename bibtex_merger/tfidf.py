@@ -0,0 +1,222 @@
+import logging
+
+import numpy
+
+from bibtex_merger.lsh import shingles
+
+logger = logging.getLogger(__name__)
+__all__ = [	'TfidfNeighbours'	]
+
+class TfidfNeighbours(object):
+	"""Top-k nearest neighbours of texts by TF-IDF cosine similarity.
+
+	Every text becomes a sparse, L2 normalized TF-IDF vector over its
+	character n-grams (see lsh.shingles), kept in CSR form (plain numpy
+	arrays) together with its transpose, i.e. the postings of every n-gram.
+	The similarities are the sparse product of the matrix with its
+	transpose, computed for chunkSize texts at a time s.t. only one chunk of
+	partial products is ever held in memory; of each text only its k most
+	similar texts are kept.
+
+	N-grams found in more than maxDF of the texts are dropped, they carry
+	little weight but would dominate the cost of the product. N-grams of
+	only two texts are always kept though, or a small set of texts could
+	not pair up at all. As the
+	postings of the n-grams kept still grow with the number of texts, a
+	chunk is also cut short once it reaches maxProducts partial products
+	(a single text always makes a chunk).
+
+	Attributes:
+		k			--	number of neighbours per text, int > 0
+		chunkSize	--	number of texts per chunk of the product, int > 0
+		ngram		--	length of the character n-grams, int > 0
+		maxDF		--	maximum document frequency (fraction) of an n-gram
+		maxProducts	--	maximum number of partial products of a chunk, int > 0
+		minScore	--	minimum similarity of a neighbour
+	"""
+
+	def __init__(self, k=5, chunkSize=256, ngram=3, maxDF=0.1, maxProducts=1 << 22, minScore=0.0):
+		if not (isinstance(k, int) and k > 0):
+			raise ValueError("TfidfNeighbours k argument must be int > 0 not ({} -> {})".format(type(k), k))
+		self._k = k
+
+		if not (isinstance(chunkSize, int) and chunkSize > 0):
+			raise ValueError("TfidfNeighbours chunkSize argument must be int > 0 not ({} -> {})".format(type(chunkSize), chunkSize))
+		self._chunkSize = chunkSize
+
+		if not (isinstance(ngram, int) and ngram > 0):
+			raise ValueError("TfidfNeighbours ngram argument must be int > 0 not ({} -> {})".format(type(ngram), ngram))
+		self._ngram = ngram
+
+		if not ((isinstance(maxDF, int) or isinstance(maxDF, float)) and 0 < maxDF <= 1):
+			raise ValueError("TfidfNeighbours maxDF argument must be int|float in (0, 1] not ({} -> {})".format(type(maxDF), maxDF))
+		self._maxDF = maxDF
+
+		if not (isinstance(maxProducts, int) and maxProducts > 0):
+			raise ValueError("TfidfNeighbours maxProducts argument must be int > 0 not ({} -> {})".format(type(maxProducts), maxProducts))
+		self._maxProducts = maxProducts
+
+		if not (isinstance(minScore, int) or isinstance(minScore, float)):
+			raise ValueError("TfidfNeighbours minScore argument must be int|float not ({} -> {})".format(type(minScore), minScore))
+		self._minScore = minScore
+
+		self.fit([])
+
+		return
+
+	def __len__(self):
+		return self._numDocs
+
+	@property
+	def k(self):
+		return self._k
+
+	@property
+	def chunkSize(self):
+		return self._chunkSize
+
+	@property
+	def ngram(self):
+		return self._ngram
+
+	@property
+	def maxDF(self):
+		return self._maxDF
+
+	@property
+	def maxProducts(self):
+		return self._maxProducts
+
+	@property
+	def minScore(self):
+		return self._minScore
+
+	@property
+	def numTerms(self):
+		"""
+		Number of distinct n-grams kept.
+		"""
+		return self._numTerms
+
+	def fit(self, texts):
+		"""
+		Build the TF-IDF matrix of texts (a list of str, None for no text);
+		the neighbours are given by their index in texts.
+		"""
+		vocab	= {}
+		indptr	= [0]
+		indices	= []
+		for text in texts:
+			indices.extend(vocab.setdefault(g, len(vocab)) for g in (shingles(text, self.ngram) if text else ()))
+			indptr.append(len(indices))
+
+		numDocs	= len(texts)
+		indptr	= numpy.array(indptr, dtype=numpy.int64)
+		indices	= numpy.array(indices, dtype=numpy.int64)
+		rows	= numpy.repeat(numpy.arange(numDocs, dtype=numpy.int64), numpy.diff(indptr))
+
+		df	= numpy.bincount(indices, minlength=len(vocab))
+		idf	= numpy.log((1.0 + numDocs) / (1.0 + df)) + 1.0
+
+		# drop the n-grams that are too common
+		keep	= (df <= max(2, self.maxDF * numDocs))[indices]
+		rows	= rows[keep]
+		indices	= indices[keep]
+
+		# binary TF times IDF, L2 normalized per text
+		data	= idf[indices]
+		norms	= numpy.sqrt(numpy.bincount(rows, weights=data ** 2, minlength=numDocs))
+		data	= data / norms[rows]
+
+		self._numDocs	= numDocs
+		self._numTerms	= len(numpy.unique(indices))
+
+		# CSR of the texts
+		self._rows		= rows
+		self._indices	= indices
+		self._data		= data
+		self._indptr	= numpy.concatenate(([0], numpy.cumsum(numpy.bincount(rows, minlength=numDocs)))).astype(numpy.int64)
+
+		# CSC, i.e. the postings of every n-gram
+		order			= numpy.argsort(indices, kind="mergesort")
+		self._postDocs	= rows[order]
+		self._postData	= data[order]
+		self._postPtr	= numpy.concatenate(([0], numpy.cumsum(numpy.bincount(indices, minlength=len(vocab))))).astype(numpy.int64)
+
+		# partial products of the texts before every text, to cut the chunks
+		work			= numpy.diff(self._postPtr)[indices]
+		self._workPtr	= numpy.concatenate(([0], numpy.cumsum(numpy.bincount(rows, weights=work, minlength=numDocs)))).astype(numpy.int64)
+
+		return self
+
+	def __chunk__(self, start, stop):
+		# (text, neighbour, similarity) of the texts start..stop-1, the sparse
+		# product of their rows with the postings
+		lo, hi	= self._indptr[start], self._indptr[stop]
+		qRows	= self._rows[lo:hi]
+		qTerms	= self._indices[lo:hi]
+		qData	= self._data[lo:hi]
+
+		counts	= self._postPtr[qTerms + 1] - self._postPtr[qTerms]
+		total	= int(counts.sum())
+		if total == 0:
+			return None
+
+		# every (text, n-gram) expanded to the postings of that n-gram
+		ends	= numpy.cumsum(counts)
+		pos		= numpy.repeat(self._postPtr[qTerms] - (ends - counts), counts) + numpy.arange(total)
+		q		= numpy.repeat(qRows, counts)
+		d		= self._postDocs[pos]
+		w		= numpy.repeat(qData, counts) * self._postData[pos]
+
+		other	= d != q
+		keys, inverse = numpy.unique(q[other] * self._numDocs + d[other], return_inverse=True)
+		scores	= numpy.bincount(inverse, weights=w[other])
+
+		return keys // self._numDocs, keys % self._numDocs, scores
+
+	def neighbours(self):
+		"""
+		Generator of (text, neighbour, similarity) of the (at most) k most
+		similar texts of every text, most similar first.
+		"""
+		start = 0
+		while start < self._numDocs:
+			stop = numpy.searchsorted(self._workPtr, self._workPtr[start] + self.maxProducts, side="right") - 1
+			stop = max(start + 1, min(start + self.chunkSize, self._numDocs, int(stop)))
+
+			chunk = self.__chunk__(start, stop)
+			start = stop
+			if chunk == None:
+				continue
+			q, d, scores = chunk
+
+			# by text, then by descending similarity (ties by neighbour)
+			order	= numpy.lexsort((-scores, q))
+			q		= q[order]
+			d		= d[order]
+			scores	= scores[order]
+
+			rank	= numpy.arange(len(q)) - numpy.searchsorted(q, q, side="left")
+			top		= (rank < self.k) & (scores > self.minScore)
+
+			for text, neighbour, score in zip(q[top], d[top], scores[top]):
+				yield int(text), int(neighbour), float(score)
+
+		return
+
+	def pairs(self):
+		"""
+		Generator of the unordered pairs (text1, text2) with text1 < text2 of
+		which either one is among the k most similar of the other, every pair
+		once.
+		"""
+		seen = set()
+
+		for text, neighbour, score in self.neighbours():
+			pair = (min(text, neighbour), max(text, neighbour))
+			if pair not in seen:
+				seen.add(pair)
+				yield pair
+
+		return
@@ -1,8 +1,23 @@
 #!/usr/bin/env python
 
+import sys
+
 from distutils.core import setup
+from distutils.command.build_py import build_py
 from bibtex_merger import __version__ as version
 
+class BuildPy(build_py):
+    """
+    Leaves out the asyncio modules, which are python 3 syntax, on python 2.
+    """
+    asyncModules = ['aio']
+
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+        if sys.version_info < (3,):
+            modules = [m for m in modules if m[1] not in self.asyncModules]
+        return modules
+
 setup(
     name         = 'BibTeX Merger',
     version      = version,
@@ -12,4 +27,5 @@ setup(
     author_email = "",
     description  = "The BibTeX merger tool.",
     packages = ['bibtex_merger'],
+    cmdclass = {'build_py': BuildPy},
 )